@@ -3,6 +3,9 @@
 The worker process runs this as its entry point:
     celery -A app.celery_app worker --loglevel=info -Q audit
 
+Judge worker (submissions are judged here, not in the HTTP request):
+    celery -A app.celery_app worker --loglevel=info -Q judge --concurrency=4 --prefetch-multiplier=1
+
 Beat scheduler for periodic tasks:
     celery -A app.celery_app beat --loglevel=info
 """
@@ -35,11 +38,19 @@ celery_app.conf.update(
     task_time_limit=int(settings.audit_llm_timeout) + 120,
     # result expiry — audit results kept for 7 days
     result_expires=86400 * 7,
-    # route all background tasks to the audit queue
+    # Redis emulates priorities with one list per level (0 = served first);
+    # bulk rejudges are enqueued behind live submissions
+    broker_transport_options={
+        "queue_order_strategy": "priority",
+        "priority_steps": list(range(10)),
+        "sep": ":",
+    },
+    # route background tasks to the audit queue, judging to its own queue
     task_routes={
         "app.tasks.problem_auditor.*": {"queue": "audit"},
         "app.tasks.submission_events.*": {"queue": "audit"},
         "app.tasks.batch_import.*": {"queue": "audit"},
+        "app.tasks.judge.*": {"queue": settings.judge_queue},
     },
     # Beat schedule: periodic problem audit + submission fallback compensation
     beat_schedule={
@@ -52,6 +63,10 @@ celery_app.conf.update(
             "schedule": 300,
             "kwargs": {"limit": 20},
         },
+        "requeue-stale-submissions-every-60s": {
+            "task": "app.tasks.judge.requeue_stale_submissions",
+            "schedule": 60,
+        },
     },
 )
 
@@ -60,4 +75,4 @@ celery_app.conf.update(
 # resolve correctly inside Docker containers; explicit imports are more robust.
 celery_app.autodiscover_tasks(["app.tasks"], related_name=None)
 # Also force-import to guarantee registration
-from app.tasks import problem_auditor, submission_events, batch_import  # noqa: E402, F401
\ No newline at end of file
+from app.tasks import problem_auditor, submission_events, batch_import, judge  # noqa: E402, F401
\ No newline at end of file
@@ -45,6 +45,40 @@ class Settings:
 
     # Judge sandbox
     judge_sandbox_url: str = os.getenv("LITE_JUDGE_SANDBOX_URL", "http://cdut-sandbox:8899")
+    # Comma-separated sandbox nodes; empty means just judge_sandbox_url
+    judge_sandbox_urls: str = os.getenv("LITE_JUDGE_SANDBOX_URLS", "").strip()
+    # Seconds a failed sandbox node is skipped before it is tried again
+    judge_sandbox_retry_after_sec: float = float(os.getenv("LITE_JUDGE_SANDBOX_RETRY_AFTER_SEC", "10"))
+    # Consecutive failures that open a node's circuit breaker
+    judge_sandbox_breaker_failures: int = int(os.getenv("LITE_JUDGE_SANDBOX_BREAKER_FAILURES", "3"))
+    # Rounds of backoff when every node answers 429, and the longest single wait
+    judge_sandbox_overload_retries: int = int(os.getenv("LITE_JUDGE_SANDBOX_OVERLOAD_RETRIES", "3"))
+    judge_sandbox_max_backoff_sec: float = float(os.getenv("LITE_JUDGE_SANDBOX_MAX_BACKOFF_SEC", "30"))
+    judge_sandbox_health_interval_sec: float = float(os.getenv("LITE_JUDGE_SANDBOX_HEALTH_INTERVAL_SEC", "5"))
+    judge_sandbox_max_connections: int = int(os.getenv("LITE_JUDGE_SANDBOX_MAX_CONNECTIONS", "100"))
+    # Send test inputs by file name; requires the sandbox to mount /data/test_cases too
+    judge_test_data_by_reference: bool = os.getenv("LITE_JUDGE_TEST_DATA_BY_REF", "1") == "1"
+    # Async judging: Celery queue consumed by the judge worker
+    judge_queue: str = os.getenv("LITE_JUDGE_QUEUE", "judge")
+    # PENDING/JUDGING rows untouched this long are re-enqueued by beat
+    judge_requeue_after_sec: int = int(os.getenv("LITE_JUDGE_REQUEUE_AFTER_SEC", "300"))
+    # Max time a result WebSocket waits for the verdict
+    judge_ws_timeout_sec: float = float(os.getenv("LITE_JUDGE_WS_TIMEOUT_SEC", "600"))
+    # Reuse results of identical (code, test data, limits) judge runs
+    judge_cache_enabled: bool = os.getenv("LITE_JUDGE_CACHE_ENABLED", "1") == "1"
+    judge_cache_local_size: int = int(os.getenv("LITE_JUDGE_CACHE_LOCAL_SIZE", "1024"))
+    # Shared cache level; empty keeps the cache in-process only
+    judge_cache_redis_url: str = os.getenv(
+        "LITE_JUDGE_CACHE_REDIS", os.getenv("LITE_CELERY_BACKEND", "redis://cdut-redis:6379/2"),
+    )
+    judge_cache_ttl_sec: int = int(os.getenv("LITE_JUDGE_CACHE_TTL_SEC", "86400"))
+    # Bulk rejudge: broker priority (0 = first, live submissions use 0)
+    judge_rejudge_priority: int = int(os.getenv("LITE_JUDGE_REJUDGE_PRIORITY", "9"))
+    # Feed a rejudge batch only while fewer submissions wait for the judge
+    judge_rejudge_max_backlog: int = int(os.getenv("LITE_JUDGE_REJUDGE_MAX_BACKLOG", "50"))
+    judge_rejudge_batch: int = int(os.getenv("LITE_JUDGE_REJUDGE_BATCH", "20"))
+    judge_rejudge_interval_sec: float = float(os.getenv("LITE_JUDGE_REJUDGE_INTERVAL_SEC", "5"))
+    judge_rejudge_max_submissions: int = int(os.getenv("LITE_JUDGE_REJUDGE_MAX_SUBMISSIONS", "20000"))
 
     # Application
     max_context_messages: int = int(os.getenv("LITE_MAX_CONTEXT_MESSAGES", "20"))
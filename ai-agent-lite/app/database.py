@@ -45,6 +45,19 @@ async def init_db() -> None:
                     f"ADD COLUMN IF NOT EXISTS {col} {col_type}"
                 )
             )
+        for col, col_type in [
+            ("score", "INTEGER NULL"),
+            ("contest_id", "UUID NULL"),
+            ("is_contest", "BOOLEAN NOT NULL DEFAULT FALSE"),
+            ("test_case_id", "VARCHAR(64) NULL"),
+            ("rejudge_job", "VARCHAR(32) NULL"),
+        ]:
+            await conn.execute(
+                sqlalchemy.text(
+                    f"ALTER TABLE {settings.db_schema}.submissions "
+                    f"ADD COLUMN IF NOT EXISTS {col} {col_type}"
+                )
+            )
 
 
 async def get_session() -> AsyncSession:
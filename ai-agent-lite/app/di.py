@@ -1,6 +1,7 @@
 """Dependency Injection container — factory functions for service instances.
 
-Provides centralized access to LLM client, supervisor, workers, and suggester.
+Provides centralized access to LLM client, supervisor, workers, suggester,
+the sandbox client and the verdict cache.
 Application code should use these getters rather than constructing services inline.
 """
 import logging
@@ -9,6 +10,8 @@ from app.llm_client import LlmClient
 from app.services.supervisor import Supervisor
 from app.services.next_step_suggester import NextStepSuggester
 from app.services.emotion_analyzer import EmotionAnalyzer
+from app.services.judge_service import SandboxClient
+from app.services.verdict_cache import VerdictCache
 from app.i18n import AGENT_DISPLAY, AgentDisplayInfo
 
 logger = logging.getLogger("ai-agent-lite.di")
@@ -19,6 +22,8 @@ _supervisor: Supervisor | None = None
 _workers: dict | None = None
 _suggester: NextStepSuggester | None = None
 _emotion_analyzer: EmotionAnalyzer | None = None
+_sandbox: SandboxClient | None = None
+_verdict_cache: VerdictCache | None = None
 
 
 def get_llm_client() -> LlmClient:
@@ -76,6 +81,22 @@ def get_emotion_analyzer() -> EmotionAnalyzer:
     return _emotion_analyzer
 
 
+def get_sandbox_client() -> SandboxClient:
+    """Return the shared sandbox client (connection pool, node health, breaker)."""
+    global _sandbox
+    if _sandbox is None:
+        _sandbox = SandboxClient()
+    return _sandbox
+
+
+def get_verdict_cache() -> VerdictCache:
+    """Return the shared judge verdict cache (in-process LRU + Redis)."""
+    global _verdict_cache
+    if _verdict_cache is None:
+        _verdict_cache = VerdictCache()
+    return _verdict_cache
+
+
 def get_agent_display_name(agent_type) -> str:
     """Return the human-readable display name for an agent type."""
     from app.models.enums import AgentType
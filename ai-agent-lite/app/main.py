@@ -19,7 +19,7 @@ from app.middleware import RequestMiddleware
 from app.routers import (
     admin_accounts,
     auth, contests, health, metrics_router,
-    oj_test_cases, problem_audit, problem_upload, problems,
+    oj_test_cases, problem_audit, problem_upload, problems, rejudge,
     submission_events, submission_judge, submissions, websocket,
 )
 
@@ -28,16 +28,19 @@ logger = logging.getLogger("ai-agent-lite")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database tables on startup."""
+    """Initialize database tables and the sandbox client on startup."""
     logger.info("Initializing database...")
     await init_db()
-    from app.di import get_llm_client
+    from app.di import get_llm_client, get_sandbox_client
     llm = get_llm_client()
     logger.info(
         "Database initialized. LLM enabled=%s model=%s",
         llm.enabled, llm.model,
     )
+    sandbox = get_sandbox_client()
+    await sandbox.start()
     yield
+    await sandbox.close()
 
 
 def create_app() -> FastAPI:
@@ -62,6 +65,7 @@ def create_app() -> FastAPI:
     app.include_router(problem_audit.router)
     app.include_router(problem_upload.router)
     app.include_router(admin_accounts.router)
+    app.include_router(rejudge.router)
     app.include_router(submission_events.router)
     app.include_router(submission_judge.router)
     app.include_router(websocket.router)
@@ -51,6 +51,13 @@ submission_dlq_pending_rows = Gauge(
     "Current pending submission DLQ rows",
 )
 
+# Judge metrics
+judge_verdict_cache_total = Counter(
+    "judge_verdict_cache_total",
+    "Verdict cache lookups (hit rate = local + redis over all)",
+    ["outcome"],
+)
+
 
 def metrics_text() -> str:
     """Return Prometheus-format metrics text."""
@@ -32,6 +32,10 @@ class Verdict(str, Enum):
     WA = "WA"
     TLE = "TLE"
     MLE = "MLE"
+    OLE = "OLE"  # output limit exceeded
     RE = "RE"
     CE = "CE"
-    SE = "SE"
\ No newline at end of file
+    SE = "SE"
+    # Not final: queued for the judge worker / being judged
+    PENDING = "PENDING"
+    JUDGING = "JUDGING"
\ No newline at end of file
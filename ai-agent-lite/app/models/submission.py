@@ -31,6 +31,10 @@ class Submission(Base):
     memory_kb = Column(Integer, nullable=True)
     test_case_results = Column(JSONB, nullable=True)
     compile_error = Column(Text, nullable=True)
+    score = Column(Integer, nullable=True)  # OI: sum of accepted case weights
+    test_case_id = Column(String(64), nullable=True)  # test data judged against
+    rejudge_job = Column(String(32), nullable=True)  # bulk rejudge that reset it to PENDING
+    contest_id = Column(UUID(as_uuid=True), nullable=True)  # judged under the contest's rule
     created_at = Column(
         DateTime(timezone=True),
         nullable=False,
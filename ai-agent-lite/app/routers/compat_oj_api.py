@@ -30,7 +30,9 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy import text
 
 from app.database import async_session
-from app.services.judge_service import SandboxClient, judge_submission
+from app.di import get_sandbox_client
+from app.services.judge_queue import UNRANKED_VERDICTS
+from app.services.judge_service import judge_submission
 
 router = APIRouter(prefix="/api", tags=["compat-oj-api"])
 
@@ -77,6 +79,7 @@ def _status_code_from_verdict(verdict: str) -> int:
         "MLE": 3,
         "RE": 4,
         "SE": 5,
+        "OLE": 9,
     }
     return mapping.get(verdict, 5)
 
@@ -90,6 +93,7 @@ def _status_label(verdict: str) -> str:
         "MLE": "MEMORY_LIMIT_EXCEEDED",
         "RE": "RUNTIME_ERROR",
         "SE": "SYSTEM_ERROR",
+        "OLE": "OUTPUT_LIMIT_EXCEEDED",
     }
     return mapping.get(verdict, "SYSTEM_ERROR")
 
@@ -563,8 +567,8 @@ async def submit_code_compat(request: Request, payload: dict = Body(...)):
     lang_map = {"C++": "cpp", "C": "c", "Java": "java", "Python3": "python3", "cpp": "cpp", "c": "c", "java": "java", "python3": "python3"}
     normalized_lang = lang_map.get(language, language)
 
-    sandbox = SandboxClient()
-    if not await sandbox.health():
+    sandbox = get_sandbox_client()
+    if not sandbox.available:
         raise HTTPException(status_code=503, detail="Sandbox unavailable")
 
     result = await judge_submission(
@@ -573,6 +577,7 @@ async def submit_code_compat(request: Request, payload: dict = Body(...)):
         problem_id=problem_id,
         sandbox=sandbox,
         user_id=username,
+        priority="contest" if parsed_contest_id is not None else "practice",
     )
 
     async with async_session() as db:
@@ -975,8 +980,8 @@ async def contest_submit_code(request: Request, payload: dict = Body(...)):
     }
     normalized_lang = lang_map.get(language, language)
 
-    sandbox = SandboxClient()
-    if not await sandbox.health():
+    sandbox = get_sandbox_client()
+    if not sandbox.available:
         raise HTTPException(status_code=503, detail="Sandbox unavailable")
 
     result = await judge_submission(
@@ -985,6 +990,7 @@ async def contest_submit_code(request: Request, payload: dict = Body(...)):
         problem_id=problem_id,
         sandbox=sandbox,
         user_id=username,
+        priority="contest" if parsed_contest_id is not None else "practice",
     )
 
     async with async_session() as db:
@@ -1088,7 +1094,8 @@ async def contest_rank(contest_id: str = Query(...)):
             {"solved": False, "wrong_before_ac": 0},
         )
 
-        if prob_state["solved"]:
+        # Queued/being judged (incl. rejudged) rows are not attempts yet
+        if prob_state["solved"] or verdict in UNRANKED_VERDICTS:
             continue
 
         if verdict == "AC":
@@ -2,16 +2,16 @@
 
 from __future__ import annotations
 
-import json
 from datetime import datetime, timezone
 from typing import Any
 
-from fastapi import APIRouter, Body, HTTPException, Query, Request
+from fastapi import APIRouter, Body, Query, Request
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import text
 
 from app.database import async_session
-from app.services.judge_service import SandboxClient, judge_submission
+from app.services.judge_queue import UNRANKED_VERDICTS, submit_for_judging
+from app.services.problem_service import VALID_RULE_TYPES
 from app.utils.auth_helpers import current_username, require_admin_username
 from app.utils.oj_helpers import (
     parse_uuid, utc_now, contest_status, normalize_language,
@@ -72,6 +72,11 @@ async def ensure_contest_schema() -> None:
             "ALTER TABLE ai_agent.contests "
             "ADD COLUMN IF NOT EXISTS visible boolean NOT NULL DEFAULT true",
         ))
+        # NULL: judge each problem by its own rule_type
+        await db.execute(text(
+            "ALTER TABLE ai_agent.contests "
+            "ADD COLUMN IF NOT EXISTS rule_type varchar(8) NULL",
+        ))
         await db.commit()
 
 
@@ -151,11 +156,14 @@ async def contest_create(request: Request, payload: dict = Body(...)):
     end_time_raw = str(payload.get("end_time", "")).strip()
     visible = bool(payload.get("visible", True))
     problem_ids = payload.get("problem_ids")
+    rule_type = payload.get("rule_type") or None
 
     if not title or len(title) > 255:
         return {"error": "Invalid title", "data": "Invalid title"}
     if not isinstance(problem_ids, list) or not problem_ids:
         return {"error": "problem_ids is required", "data": "problem_ids is required"}
+    if rule_type is not None and rule_type not in VALID_RULE_TYPES:
+        return {"error": "Invalid rule_type", "data": "Invalid rule_type"}
 
     normalized_pids: list[str] = list(dict.fromkeys(
         str(pid).strip() for pid in problem_ids if str(pid).strip()
@@ -206,14 +214,14 @@ async def contest_create(request: Request, payload: dict = Body(...)):
                 text(
                     "INSERT INTO ai_agent.contests "
                     "(id,title,description,start_time,end_time,status,visible,"
-                    " created_by,created_at,updated_at) "
-                    "VALUES (gen_random_uuid(),:t,:d,:st,:et,:s,:v,:cb,:n,:n) "
+                    " rule_type,created_by,created_at,updated_at) "
+                    "VALUES (gen_random_uuid(),:t,:d,:st,:et,:s,:v,:rt,:cb,:n,:n) "
                     "RETURNING id",
                 ),
                 {
                     "t": title, "d": description or None,
                     "st": start_time, "et": end_time,
-                    "s": status, "v": visible,
+                    "s": status, "v": visible, "rt": rule_type,
                     "cb": admin_username, "n": now,
                 },
             )
@@ -290,7 +298,7 @@ async def contest_detail(request: Request, contest_id: str = Query(...)):
             await db.execute(
                 text(
                     "SELECT id,title,description,start_time,end_time,"
-                    "created_by,created_at,updated_at "
+                    "created_by,created_at,updated_at,rule_type "
                     "FROM ai_agent.contests WHERE id=:cid LIMIT 1",
                 ),
                 {"cid": cid},
@@ -339,6 +347,7 @@ async def contest_detail(request: Request, contest_id: str = Query(...)):
             "created_at": contest[6].isoformat() if contest[6] else "",
             "updated_at": contest[7].isoformat() if contest[7] else "",
             "joined": joined,
+            "rule_type": contest[8],
             "problems": [
                 {
                     "problem_id": r[0], "id": r[1], "_id": r[2],
@@ -417,45 +426,13 @@ async def contest_submit_code(request: Request, payload: dict = Body(...)):
         return validation  # error dict
     contest_id = validation
 
-    normalized_lang = normalize_language(language)
-
-    sandbox = SandboxClient()
-    if not await sandbox.health():
-        raise HTTPException(status_code=503, detail="Sandbox unavailable")
-
-    result = await judge_submission(
-        code=code, language=normalized_lang, problem_id=problem_id,
-        sandbox=sandbox, user_id=username,
+    submission_id = await submit_for_judging(
+        problem_id=problem_id, user_id=username,
+        language=normalize_language(language), code=code,
+        contest_id=contest_id,
     )
 
-    async with async_session() as db:
-        now = utc_now()
-        row = (
-            await db.execute(
-                text(
-                    "INSERT INTO ai_agent.submissions "
-                    "(id,problem_id,user_id,language,code,verdict,time_sec,"
-                    " memory_kb,test_case_results,compile_error,contest_id,"
-                    " is_contest,created_at,updated_at) "
-                    "VALUES (gen_random_uuid(),:pid,:uid,:lang,:code,:verdict,"
-                    ":time,:mem,CAST(:tcr AS jsonb),:ce,:cid,true,:n,:n) "
-                    "RETURNING id",
-                ),
-                {
-                    "pid": problem_id, "uid": username,
-                    "lang": normalized_lang, "code": code,
-                    "verdict": result.verdict,
-                    "time": float(result.total_time_sec or 0),
-                    "mem": int(result.max_rss_kb or 0),
-                    "tcr": json.dumps(result.test_case_results or [], ensure_ascii=False),
-                    "ce": result.compile_error or "",
-                    "cid": contest_id, "n": now,
-                },
-            )
-        ).fetchone()
-        await db.commit()
-
-    return {"error": None, "data": {"submission_id": str(row[0])}}
+    return {"error": None, "data": {"submission_id": submission_id}}
 
 
 # ── rank ───────────────────────────────────────────────────────────────
@@ -529,7 +506,8 @@ async def contest_rank(contest_id: str = Query(...)):
             pid, {"solved": False, "wrong_before_ac": 0},
         )
 
-        if prob["solved"]:
+        # Queued/being judged (incl. rejudged) rows are not attempts yet
+        if prob["solved"] or verdict in UNRANKED_VERDICTS:
             continue
 
         if verdict == "AC":
@@ -35,9 +35,13 @@ async def readyz() -> dict:
         logging.getLogger("ai-agent-lite").error("Readiness DB check failed: %s", exc)
         db_ok = False
 
+    from app.di import get_sandbox_client
+
     return {
         "ok": db_ok and llm.enabled,
         "db": db_ok,
         "llm": llm.enabled,
         "model": llm.model,
+        # Cached by the background health refresh; judging is async, so not gating "ok"
+        "sandbox": get_sandbox_client().available,
     }
\ No newline at end of file
@@ -88,7 +88,7 @@ def _fetch_submission_detail_db(submission_id: str) -> Optional[dict]:
         verdict, time_sec, memory_kb, compile_error, test_case_results_raw = row
         # Build QDUOJ-like detail for frontend parser compatibility
         def verdict_to_code(v: str) -> int:
-            mapping = {"AC": 0, "WA": -1, "CE": -2, "TLE": 1, "MLE": 3, "RE": 4, "SE": 5}
+            mapping = {"AC": 0, "WA": -1, "CE": -2, "TLE": 1, "MLE": 3, "RE": 4, "SE": 5, "OLE": 9}
             return mapping.get(str(v or "SE"), 5)
 
         tc_rows = []
@@ -0,0 +1,67 @@
+"""Admin bulk rejudge endpoints.
+
+Endpoints:
+  POST /admin/rejudge                 — select submissions and start a job
+  GET  /admin/rejudge/{job_id}        — progress, throughput and ETA
+  POST /admin/rejudge/{job_id}/cancel — stop feeding the judge
+"""
+
+import logging
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel
+
+from app.services import rejudge
+from app.utils.auth_helpers import require_admin_username
+
+logger = logging.getLogger("ai-agent-lite.rejudge_api")
+
+router = APIRouter(prefix="/admin/rejudge", tags=["admin-rejudge"])
+
+
+class RejudgeRequest(BaseModel):
+    """Which submissions to rejudge; at least one filter is required."""
+    problem_id: Optional[str] = None
+    contest_id: Optional[str] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    # Skip submissions whose result the changed test cases cannot alter
+    only_affected: bool = True
+
+
+@router.post("")
+async def create_rejudge(payload: RejudgeRequest, request: Request):
+    username = await require_admin_username(request)
+    try:
+        job = await rejudge.create_job(
+            problem_id=(payload.problem_id or "").strip() or None,
+            contest_id=(payload.contest_id or "").strip() or None,
+            since=payload.since,
+            until=payload.until,
+            only_affected=payload.only_affected,
+            created_by=username,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info("rejudge job %s created by %s", job["job_id"], username)
+    return job
+
+
+@router.get("/{job_id}")
+async def rejudge_status(job_id: str, request: Request):
+    await require_admin_username(request)
+    job = await rejudge.job_progress(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Rejudge job not found")
+    return job
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_rejudge(job_id: str, request: Request):
+    await require_admin_username(request)
+    job = await rejudge.cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Rejudge job not found")
+    return job
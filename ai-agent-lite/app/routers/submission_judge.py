@@ -1,5 +1,6 @@
 """
-POST /api/submit — accept code submissions and return judging results.
+POST /api/submit — accept code submissions for asynchronous judging.
+GET  /api/submit/{id} — poll a submission's verdict and results.
 
 This is the replacement for QDUOJ's judge server flow.
 """
@@ -7,15 +8,18 @@ This is the replacement for QDUOJ's judge server flow.
 from __future__ import annotations
 
 import logging
-from datetime import datetime, timezone
+import uuid
+from typing import Optional
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
+from sqlalchemy import text
 
-from app.config import settings
 from app.database import async_session
+from app.models.enums import Verdict
 from app.models.submission import Submission
-from app.services.judge_service import SandboxClient, judge_submission
+from app.services.judge_queue import submit_for_judging
+from app.services.judge_service import RULE_ACM, RULE_OI, _get_problem_info
 
 logger = logging.getLogger("ai-agent-lite")
 
@@ -47,6 +51,25 @@ class SubmitResponse(BaseModel):
     test_case_results: list[dict] = []
     total_time_sec: float = 0.0
     max_rss_kb: int = 0
+    rule_type: str = RULE_ACM
+    score: int = 0
+
+
+async def _rule_type(problem_id: str, contest_id: Optional[uuid.UUID] = None) -> str:
+    """Rule a submission is judged under: its contest's, else its problem's (as the judge)."""
+    if contest_id is not None:
+        async with async_session() as session:
+            row = (
+                await session.execute(
+                    text("SELECT rule_type FROM ai_agent.contests WHERE id=:cid LIMIT 1"),
+                    {"cid": contest_id},
+                )
+            ).fetchone()
+        if row is not None and row[0] in (RULE_ACM, RULE_OI):
+            return row[0]
+    problem = await _get_problem_info(problem_id)
+    rule_type = problem.get("rule_type") if problem else None
+    return rule_type if rule_type in (RULE_ACM, RULE_OI) else RULE_ACM
 
 
 # ── endpoint ──────────────────────────────────────────────────────────
@@ -56,53 +79,43 @@ async def submit_code(req: SubmitRequest):
     """
     Submit code for judging.
 
-    - Compiles and runs code against all test cases of the problem
-    - Stores submission record in PostgreSQL
-    - Returns verdict and per-test-case results
+    - Stores the submission as PENDING and hands it to the judge worker
+    - Returns immediately; poll GET /api/submit/{submission_id} or use
+      the /api/submission/ws push for the verdict
     """
-    sandbox = SandboxClient()
-
-    # Check sandbox health first
-    if not await sandbox.health():
-        raise HTTPException(503, "Sandbox service is unavailable")
-
-    # Run the judge
-    result = await judge_submission(
-        code=req.code,
-        language=req.language,
-        problem_id=req.problem_id,
-        sandbox=sandbox,
-        user_id=req.user_id,
-    )
-
-    # Persist submission record
-    submission_id = None
     try:
-        async with async_session() as session:
-            from app.models.submission import Submission
-            sub = Submission(
-                problem_id=req.problem_id,
-                user_id=req.user_id,
-                language=req.language,
-                code=req.code,
-                verdict=result.verdict,
-                time_sec=result.total_time_sec,
-                memory_kb=result.max_rss_kb,
-                test_case_results=result.test_case_results,
-                compile_error=result.compile_error,
-            )
-            session.add(sub)
-            await session.commit()
-            submission_id = str(sub.id)
+        submission_id = await submit_for_judging(
+            problem_id=req.problem_id,
+            user_id=req.user_id,
+            language=req.language,
+            code=req.code,
+        )
     except Exception as exc:
         logger.error("Failed to persist submission: %s", exc)
-        # Still return the result even if persistence fails
+        raise HTTPException(503, "Submission could not be stored")
+
+    return SubmitResponse(
+        submission_id=submission_id,
+        verdict=Verdict.PENDING,
+        rule_type=await _rule_type(req.problem_id),
+    )
+
+
+@router.get("/submit/{submission_id}", response_model=SubmitResponse)
+async def get_submission_result(submission_id: uuid.UUID):
+    """Current state of a submission; verdict stays PENDING/JUDGING until judged."""
+    async with async_session() as session:
+        sub = await session.get(Submission, submission_id)
+    if sub is None:
+        raise HTTPException(404, "Submission not found")
 
     return SubmitResponse(
-        submission_id=submission_id or "unknown",
-        verdict=result.verdict,
-        compile_error=result.compile_error,
-        test_case_results=result.test_case_results,
-        total_time_sec=result.total_time_sec,
-        max_rss_kb=result.max_rss_kb,
+        submission_id=str(sub.id),
+        verdict=sub.verdict or Verdict.SE,
+        compile_error=sub.compile_error or "",
+        test_case_results=sub.test_case_results or [],
+        total_time_sec=sub.time_sec or 0.0,
+        max_rss_kb=sub.memory_kb or 0,
+        rule_type=await _rule_type(sub.problem_id, sub.contest_id),
+        score=sub.score or 0,
     )
@@ -1,17 +1,16 @@
-"""Submission routes: list, submit, detail — QDUOJ-compatible API."""
+"""Submission routes: list, submit, detail, result push — QDUOJ-compatible API."""
 
 from __future__ import annotations
 
-import json
-
-from fastapi import APIRouter, Body, HTTPException, Query, Request
+from fastapi import APIRouter, Body, Query, Request, WebSocket, WebSocketDisconnect
 from sqlalchemy import text
 
+from app.config import settings
 from app.database import async_session
-from app.services.judge_service import SandboxClient, judge_submission
+from app.services.judge_queue import PENDING_VERDICTS, submit_for_judging, subscribe_result
 from app.utils.auth_helpers import current_username
 from app.utils.oj_helpers import (
-    status_code_from_verdict, parse_json, normalize_language, utc_now,
+    status_code_from_verdict, parse_json, normalize_language,
 )
 
 router = APIRouter(prefix="/api", tags=["submissions"])
@@ -35,7 +34,7 @@ async def list_submissions(
             await db.execute(
                 text(
                     "SELECT id, problem_id, user_id, verdict, time_sec, "
-                    "memory_kb, compile_error, test_case_results, created_at "
+                    "memory_kb, compile_error, test_case_results, created_at, score "
                     "FROM ai_agent.submissions "
                     "WHERE user_id=:u "
                     + ("AND problem_id=:pid " if resolved_pid else "")
@@ -61,7 +60,7 @@ async def list_submissions(
                 ),
                 "cpu_time": int(float(case.get("time_sec", 0)) * 1000),
                 "memory": int(case.get("max_rss_kb", 0) or 0) * 1024,
-                "score": 0,
+                "score": int(case.get("score", 0) or 0),
                 "output": case.get("stdout", ""),
             })
 
@@ -71,7 +70,8 @@ async def list_submissions(
             "username": r[2],
             "result": code,
             "statistic_info": {
-                "score": 100 if verdict == "AC" else 0,
+                # Rows judged before scores were stored have none
+                "score": r[9] if r[9] is not None else (100 if verdict == "AC" else 0),
                 "time_cost": int(float(r[4] or 0) * 1000),
                 "memory_cost": int(r[5] or 0),
                 "err_info": r[6] or "",
@@ -102,54 +102,21 @@ async def submit_code(request: Request, payload: dict = Body(...)):
         return {"error": "Invalid payload", "data": "Invalid payload"}
 
     parsed_contest_id = None
-    is_contest = False
     if contest_id_raw:
         result = await validate_contest_submit(
             problem_id, contest_id_raw, username,
         )
         if isinstance(result, dict):
             return result  # error dict returned
-        parsed_contest_id, is_contest = result, True
-
-    normalized_lang = normalize_language(language)
+        parsed_contest_id = result
 
-    sandbox = SandboxClient()
-    if not await sandbox.health():
-        raise HTTPException(status_code=503, detail="Sandbox unavailable")
-
-    result = await judge_submission(
-        code=code, language=normalized_lang, problem_id=problem_id,
-        sandbox=sandbox, user_id=username,
+    # Judged by the judge worker; poll the detail route or the result WebSocket
+    submission_id = await submit_for_judging(
+        problem_id=problem_id, user_id=username,
+        language=normalize_language(language), code=code,
+        contest_id=parsed_contest_id,
     )
 
-    async with async_session() as db:
-        now = utc_now()
-        row = (
-            await db.execute(
-                text(
-                    "INSERT INTO ai_agent.submissions "
-                    "(id,problem_id,user_id,language,code,verdict,time_sec,"
-                    " memory_kb,test_case_results,compile_error,contest_id,"
-                    " is_contest,created_at,updated_at) "
-                    "VALUES (gen_random_uuid(),:pid,:uid,:lang,:code,:verdict,"
-                    ":time,:mem,CAST(:tcr AS jsonb),:ce,:contest_id,"
-                    ":is_contest,:now,:now) RETURNING id",
-                ),
-                {
-                    "pid": problem_id, "uid": username, "lang": normalized_lang,
-                    "code": code, "verdict": result.verdict,
-                    "time": float(result.total_time_sec or 0),
-                    "mem": int(result.max_rss_kb or 0),
-                    "tcr": json.dumps(result.test_case_results or [], ensure_ascii=False),
-                    "ce": result.compile_error or "",
-                    "contest_id": parsed_contest_id,
-                    "is_contest": is_contest, "now": now,
-                },
-            )
-        ).fetchone()
-        await db.commit()
-    submission_id = str(row[0])
-
     return {"error": None, "data": {"submission_id": submission_id}}
 
 
@@ -162,12 +129,52 @@ async def submission_detail(
     if not submission_id:
         return {"error": "id is required", "data": "id is required"}
 
+    data = await _load_submission_detail(submission_id)
+    if data is None:
+        return {"error": "Submission not found", "data": "Submission not found"}
+    return {"error": None, "data": data}
+
+
+@router.websocket("/submission/ws")
+async def submission_result_ws(websocket: WebSocket):
+    """Push a submission's result once judged.
+
+    Sends ``{"type": "submission", "data": <detail>}`` right away and,
+    if the verdict is still pending, once more when the judge worker
+    publishes the result; then closes.
+    """
+    submission_id = websocket.query_params.get("id") or ""
+    await websocket.accept()
+    try:
+        await _push_submission_result(websocket, submission_id)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
+async def _push_submission_result(websocket: WebSocket, submission_id: str) -> None:
+    async with subscribe_result(submission_id) as wait_for_result:
+        data = await _load_submission_detail(submission_id)
+        if data is None:
+            await websocket.send_json({"type": "error", "data": "Submission not found"})
+            return
+        await websocket.send_json({"type": "submission", "data": data})
+        if data["verdict"] not in PENDING_VERDICTS:
+            return
+        if await wait_for_result(settings.judge_ws_timeout_sec):
+            data = await _load_submission_detail(submission_id)
+            await websocket.send_json({"type": "submission", "data": data})
+        else:
+            await websocket.send_json({"type": "timeout", "data": "Still judging, poll later"})
+
+
+async def _load_submission_detail(submission_id: str) -> dict | None:
     async with async_session() as db:
         r = (
             await db.execute(
                 text(
                     "SELECT id, problem_id, verdict, time_sec, memory_kb, "
-                    "compile_error, test_case_results "
+                    "compile_error, test_case_results, score "
                     "FROM ai_agent.submissions WHERE CAST(id AS TEXT)=:sid LIMIT 1",
                 ),
                 {"sid": submission_id},
@@ -175,7 +182,7 @@ async def submission_detail(
         ).fetchone()
 
     if not r:
-        return {"error": "Submission not found", "data": "Submission not found"}
+        return None
 
     verdict = str(r[2] or "SE")
     tcr = parse_json(r[6], [])
@@ -188,22 +195,21 @@ async def submission_detail(
             ),
             "cpu_time": int(float(case.get("time_sec", 0)) * 1000),
             "memory": int(case.get("max_rss_kb", 0) or 0) * 1024,
-            "score": 0,
+            "score": int(case.get("score", 0) or 0),
             "output": case.get("stdout", ""),
         })
 
     return {
-        "error": None,
-        "data": {
-            "id": str(r[0]),
-            "problem": r[1],
-            "result": status_code_from_verdict(verdict),
-            "statistic_info": {
-                "score": 100 if verdict == "AC" else 0,
-                "time_cost": int(float(r[3] or 0) * 1000),
-                "memory_cost": int(r[4] or 0),
-                "err_info": r[5] or "",
-            },
-            "info": {"err": r[5] or "", "data": info_data},
+        "id": str(r[0]),
+        "problem": r[1],
+        "verdict": verdict,
+        "result": status_code_from_verdict(verdict),
+        "statistic_info": {
+            # Rows judged before scores were stored have none
+            "score": r[7] if r[7] is not None else (100 if verdict == "AC" else 0),
+            "time_cost": int(float(r[3] or 0) * 1000),
+            "memory_cost": int(r[4] or 0),
+            "err_info": r[5] or "",
         },
+        "info": {"err": r[5] or "", "data": info_data},
     }
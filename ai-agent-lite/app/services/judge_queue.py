@@ -0,0 +1,330 @@
+"""
+Asynchronous judging — submissions are stored as PENDING and judged by
+the Celery judge worker instead of inside the HTTP request.
+
+Flow:
+  route     → INSERT submission (verdict PENDING) → enqueue_judge(id)
+  worker    → run_judge(id): claim (JUDGING) → judge_submission → store
+              result → publish on Redis channel judge:submission:<id>
+  client    → polls GET /api/submission?id=… or waits on the result
+              WebSocket, which listens for that publish
+
+The Celery broker (Redis, acks_late) makes the hand-off durable; rows
+that still sit in PENDING/JUDGING after ``judge_requeue_after_sec``
+(lost enqueue, killed worker) are re-enqueued by a beat task. A worker
+refreshes its JUDGING row's ``updated_at`` while it judges, so a slow
+judge is never taken for a lost one and claimed a second time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import redis.asyncio as aioredis
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import async_session
+from app.di import get_sandbox_client
+from app.models.enums import Verdict
+from app.services.judge_service import judge_submission
+from app.utils.oj_helpers import utc_now
+
+logger = logging.getLogger("ai-agent-lite.judge_queue")
+
+PENDING_VERDICTS = {Verdict.PENDING.value, Verdict.JUDGING.value}
+# Neither a solve nor a penalised attempt on an ACM scoreboard (yet)
+UNRANKED_VERDICTS = PENDING_VERDICTS | {Verdict.CE.value}
+
+
+def result_channel(submission_id: str) -> str:
+    return f"judge:submission:{submission_id}"
+
+
+def _redis() -> aioredis.Redis:
+    # Same Redis as the Celery result backend, like batch import progress
+    return aioredis.from_url(settings.celery_result_backend)
+
+
+def enqueue_judge(
+    submission_id: str,
+    *,
+    priority: int = 0,
+    rejudge_job: Optional[str] = None,
+) -> None:
+    """Hand a PENDING submission to the judge worker.
+
+    ``priority`` 0 is served first; rejudges go in with
+    ``judge_rejudge_priority`` so live submissions overtake them.
+    """
+    from app.tasks.judge import judge_submission_task
+
+    judge_submission_task.apply_async(
+        args=[submission_id],
+        kwargs={"rejudge_job": rejudge_job} if rejudge_job else {},
+        queue=settings.judge_queue,
+        priority=priority,
+    )
+
+
+async def submit_for_judging(
+    *,
+    problem_id: str,
+    user_id: str,
+    language: str,
+    code: str,
+    contest_id: Optional[str] = None,
+) -> str:
+    """Store a PENDING submission and enqueue it; returns its id.
+
+    The row is committed before enqueueing, so a broker outage only
+    delays judging until the requeue beat picks the row up.
+    """
+    now = utc_now()
+    async with async_session() as db:
+        row = (
+            await db.execute(
+                text(
+                    "INSERT INTO ai_agent.submissions "
+                    "(id,problem_id,user_id,language,code,verdict,test_case_results,"
+                    " contest_id,is_contest,created_at,updated_at) "
+                    "VALUES (gen_random_uuid(),:pid,:uid,:lang,:code,:verdict,"
+                    "CAST('[]' AS jsonb),:cid,:is_contest,:n,:n) RETURNING id",
+                ),
+                {
+                    "pid": problem_id, "uid": user_id, "lang": language,
+                    "code": code, "verdict": Verdict.PENDING.value,
+                    "cid": contest_id, "is_contest": contest_id is not None, "n": now,
+                },
+            )
+        ).fetchone()
+        await db.commit()
+    submission_id = str(row[0])
+
+    try:
+        enqueue_judge(submission_id)
+    except Exception:
+        logger.warning("failed to enqueue submission %s, left for requeue", submission_id, exc_info=True)
+    return submission_id
+
+
+async def _claim(submission_id: str) -> Optional[dict]:
+    """Mark a submission JUDGING; None if it is judged or being judged."""
+    now = utc_now()
+    stale = now - timedelta(seconds=settings.judge_requeue_after_sec)
+    async with async_session() as db:
+        row = (
+            await db.execute(
+                text(
+                    "UPDATE ai_agent.submissions SET verdict=:judging, updated_at=:n "
+                    "WHERE id=CAST(:sid AS uuid) AND (verdict=:pending "
+                    " OR (verdict=:judging AND updated_at < :stale)) "
+                    "RETURNING problem_id, user_id, language, code, contest_id",
+                ),
+                {
+                    "sid": submission_id, "n": now, "stale": stale,
+                    "pending": Verdict.PENDING.value, "judging": Verdict.JUDGING.value,
+                },
+            )
+        ).fetchone()
+        if row is None:
+            await db.rollback()
+            return None
+
+        rule_type = None
+        if row[4] is not None:
+            contest = (
+                await db.execute(
+                    text("SELECT rule_type FROM ai_agent.contests WHERE id=:cid LIMIT 1"),
+                    {"cid": row[4]},
+                )
+            ).fetchone()
+            rule_type = contest[0] if contest else None
+        await db.commit()
+
+    return {
+        "problem_id": row[0], "user_id": row[1], "language": row[2],
+        "code": row[3], "rule_type": rule_type, "contest_id": row[4],
+    }
+
+
+async def _heartbeat(submission_id: str) -> None:
+    """Keep a claimed row fresh until cancelled (see ``_claim``'s stale check)."""
+    interval = settings.judge_requeue_after_sec / 3
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with async_session() as db:
+                await db.execute(
+                    text(
+                        "UPDATE ai_agent.submissions SET updated_at=:n "
+                        "WHERE id=CAST(:sid AS uuid) AND verdict=:judging",
+                    ),
+                    {"sid": submission_id, "n": utc_now(), "judging": Verdict.JUDGING.value},
+                )
+                await db.commit()
+        except Exception:
+            logger.warning("judge heartbeat failed for %s", submission_id, exc_info=True)
+
+
+async def _set_verdict(submission_id: str, verdict: str) -> None:
+    async with async_session() as db:
+        await db.execute(
+            text(
+                "UPDATE ai_agent.submissions SET verdict=:v, updated_at=:n "
+                "WHERE id=CAST(:sid AS uuid)",
+            ),
+            {"sid": submission_id, "v": verdict, "n": utc_now()},
+        )
+        await db.commit()
+
+
+async def publish_result(submission_id: str, verdict: str) -> None:
+    """Notify result WebSockets; failures only delay clients until they poll."""
+    client = _redis()
+    try:
+        await client.publish(
+            result_channel(submission_id),
+            json.dumps({"submission_id": submission_id, "verdict": verdict}),
+        )
+    except Exception:
+        logger.warning("failed to publish judge result for %s", submission_id, exc_info=True)
+    finally:
+        await client.aclose()
+
+
+async def run_judge(submission_id: str, rejudge: bool = False) -> Optional[str]:
+    """Judge one PENDING submission and store its result.
+
+    Returns the verdict, or None if the submission was already claimed.
+    On failure the row goes back to PENDING so a retry can claim it.
+    A ``rejudge`` always runs the code instead of reusing a cached result.
+    The sandbox compiles contest submissions first and rejudges last.
+    """
+    job = await _claim(submission_id)
+    if job is None:
+        return None
+
+    if rejudge:
+        priority = "rejudge"
+    else:
+        priority = "contest" if job.get("contest_id") is not None else "practice"
+    sandbox = get_sandbox_client()
+    await sandbox.start()
+    heartbeat = asyncio.create_task(_heartbeat(submission_id))
+    try:
+        try:
+            result = await judge_submission(
+                code=job["code"], language=job["language"], problem_id=job["problem_id"],
+                sandbox=sandbox, user_id=job["user_id"], rule_type=job["rule_type"],
+                reuse_cached=not rejudge, priority=priority,
+            )
+        finally:
+            heartbeat.cancel()
+        async with async_session() as db:
+            await db.execute(
+                text(
+                    "UPDATE ai_agent.submissions SET verdict=:verdict, time_sec=:time,"
+                    " memory_kb=:mem, test_case_results=CAST(:tcr AS jsonb),"
+                    " compile_error=:ce, score=:score, test_case_id=:tcid,"
+                    " rejudge_job=NULL, updated_at=:n "
+                    "WHERE id=CAST(:sid AS uuid)",
+                ),
+                {
+                    "sid": submission_id, "verdict": result.verdict,
+                    "time": float(result.total_time_sec or 0),
+                    "mem": int(result.max_rss_kb or 0),
+                    "tcr": json.dumps(result.test_case_results or [], ensure_ascii=False),
+                    "ce": result.compile_error or "",
+                    "score": result.score, "tcid": result.test_case_id or None,
+                    "n": utc_now(),
+                },
+            )
+            await db.commit()
+    except BaseException:
+        await _set_verdict(submission_id, Verdict.PENDING.value)
+        raise
+
+    await publish_result(submission_id, result.verdict)
+    return result.verdict
+
+
+async def fail_submission(submission_id: str, message: str) -> None:
+    """Give up on a submission after the worker ran out of retries."""
+    async with async_session() as db:
+        await db.execute(
+            text(
+                "UPDATE ai_agent.submissions SET verdict=:v, compile_error=:ce,"
+                " rejudge_job=NULL, updated_at=:n "
+                "WHERE id=CAST(:sid AS uuid) AND verdict IN (:pending, :judging)",
+            ),
+            {
+                "sid": submission_id, "v": Verdict.SE.value, "ce": message[:2000],
+                "n": utc_now(), "pending": Verdict.PENDING.value,
+                "judging": Verdict.JUDGING.value,
+            },
+        )
+        await db.commit()
+    await publish_result(submission_id, Verdict.SE.value)
+
+
+async def stale_submissions(limit: int = 100) -> list[tuple[str, Optional[str]]]:
+    """PENDING/JUDGING submissions not touched for ``judge_requeue_after_sec``.
+
+    Returns (submission id, rejudge job id or None) pairs, so a lost
+    rejudge is re-sent as a rejudge.
+    """
+    stale = utc_now() - timedelta(seconds=settings.judge_requeue_after_sec)
+    async with async_session() as db:
+        rows = (
+            await db.execute(
+                text(
+                    "SELECT id, rejudge_job FROM ai_agent.submissions "
+                    "WHERE verdict IN (:pending, :judging) AND updated_at < :stale "
+                    "ORDER BY created_at ASC LIMIT :limit",
+                ),
+                {
+                    "pending": Verdict.PENDING.value, "judging": Verdict.JUDGING.value,
+                    "stale": stale, "limit": limit,
+                },
+            )
+        ).fetchall()
+    return [(str(r[0]), r[1]) for r in rows]
+
+
+@asynccontextmanager
+async def subscribe_result(
+    submission_id: str,
+) -> AsyncIterator[Callable[[float], Awaitable[bool]]]:
+    """Subscribe to a submission's result channel.
+
+    Yields ``wait(timeout) -> bool``, True once the worker has published.
+    Subscribe before reading the row so a verdict stored in between is
+    not missed.
+    """
+    client = _redis()
+    pubsub = client.pubsub()
+    await pubsub.subscribe(result_channel(submission_id))
+
+    async def wait(timeout: float) -> bool:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while (remaining := deadline - loop.time()) > 0:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=min(remaining, 1.0),
+            )
+            if message is not None:
+                return True
+        return False
+
+    try:
+        yield wait
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.aclose()
+        await client.aclose()
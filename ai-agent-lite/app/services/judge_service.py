@@ -5,20 +5,31 @@ Replaces QDUOJ's oj-judge with direct isolate sandbox integration.
 
 Architecture:
   ai-agent-lite (this code)
-    → HTTP POST to cdut-sandbox:8899/run
-    → isolate sandbox compiles + executes
-    → compare stdout against expected output
+    → HTTP POST to cdut-sandbox:8899/run_batch (all test cases at once)
+    → isolate sandbox compiles once + executes every case
+    → the sandbox checks each full output against the expected one
+      (or with the problem's SPJ)
     → return verdict
 
 Supports:
   - Standard comparison (exact match, ignoring trailing whitespace)
-  - Special Judge (SPJ) via external Python scripts
+  - Special Judge (SPJ): the checker is compiled once per spj_version
+    in the sandbox and sent along with /run_batch, which runs it over
+    every accepted case's untruncated output
+  - ACM rule (stop at the first failing case) and OI rule (run every
+    case, score = sum of the weights of accepted cases)
+  - Reuse of earlier results for identical submissions
+    (see app.services.verdict_cache)
 """
 
 from __future__ import annotations
 
 import asyncio
 import hashlib
+import json
+import random
+import re
+import time
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
@@ -27,25 +38,182 @@ import httpx
 
 from app.config import settings
 from app.models.enums import Verdict
+from app.services import verdict_cache
 
 
 JAVA_MEMORY_FLOOR_KB = 1024 * 1024
 MARKER_BLOCKS = ("PREPEND", "TEMPLATE", "APPEND")
+RULE_ACM = "ACM"
+RULE_OI = "OI"
 
 
 # ── sandbox API client ────────────────────────────────────────────────
+@dataclass
+class SandboxNode:
+    """Load and health bookkeeping for one cdut-sandbox node."""
+    url: str
+    in_flight: int = 0         # requests this process has open on the node
+    latency_sec: float = 0.0   # moving average of request round-trip time
+    reported_in_use: int = 0   # busy boxes the node reported in /health
+    capacity: int = 1          # the node's box pool parallelism
+    down_until: float = 0.0    # circuit open (node skipped) until this monotonic time
+    failures: int = 0          # consecutive failures
+    busy_until: float = 0.0    # node answered 429: not sent work until this monotonic time
+
+    @property
+    def healthy(self) -> bool:
+        return self.down_until <= time.monotonic()
+
+    @property
+    def busy(self) -> bool:
+        return self.busy_until > time.monotonic()
+
+    @property
+    def load(self) -> float:
+        return (self.in_flight + self.reported_in_use) / max(1, self.capacity)
+
+    def record_success(self, elapsed: float) -> None:
+        self.latency_sec = elapsed if not self.latency_sec else 0.8 * self.latency_sec + 0.2 * elapsed
+        self.failures = 0
+        self.down_until = 0.0
+
+    def record_failure(self) -> None:
+        # After the cool-off one trial request is let through (half-open);
+        # failures stay at the threshold, so a failed trial reopens at once
+        self.failures += 1
+        if self.failures >= settings.judge_sandbox_breaker_failures:
+            self.down_until = time.monotonic() + settings.judge_sandbox_retry_after_sec
+
+    def record_overload(self, retry_after: float) -> None:
+        # Overloaded is not broken: the circuit stays closed
+        self.busy_until = time.monotonic() + retry_after
+
+
+# Per-process node state, shared by every SandboxClient for the same URL
+_nodes: dict[str, SandboxNode] = {}
+
+
+def _node(url: str) -> SandboxNode:
+    url = url.rstrip("/")
+    if url not in _nodes:
+        _nodes[url] = SandboxNode(url=url)
+    return _nodes[url]
+
+
+def _configured_sandbox_urls() -> list[str]:
+    urls = [u.strip() for u in settings.judge_sandbox_urls.split(",") if u.strip()]
+    return urls or [settings.judge_sandbox_url]
+
+
+class SandboxUnavailable(RuntimeError):
+    """No sandbox node could serve the request."""
+
+
+def _retry_after(resp: httpx.Response) -> float:
+    """A 429's Retry-After in seconds (delta form only; 1 if missing)."""
+    try:
+        return max(float(resp.headers.get("Retry-After", "1")), 0.0)
+    except ValueError:
+        return 1.0
+
+
 class SandboxClient:
-    """Async HTTP client for the cdut-sandbox API."""
+    """Async HTTP client for one or more cdut-sandbox nodes.
+
+    Meant to be long-lived (see ``app.di.get_sandbox_client``): it keeps
+    a keep-alive connection pool and, once ``start``-ed, refreshes node
+    health in the background.
+
+    Each request goes to the healthy node with the lowest load (open
+    requests plus the busy boxes it last reported, relative to its box
+    pool size; ties broken by latency). A node that fails with a
+    connection error or 5xx is retried on the next node; after
+    ``judge_sandbox_breaker_failures`` consecutive failures its circuit
+    opens for ``judge_sandbox_retry_after_sec``. With every circuit open,
+    requests fail fast with SandboxUnavailable.
+
+    A node that answers 429 is overloaded, not broken. It gets no work
+    until its Retry-After has passed, and the request goes to the next
+    node. When every node is overloaded, the client sleeps until the
+    earliest Retry-After, with jitter so rejected clients do not return
+    together. It does this for up to ``judge_sandbox_overload_retries``
+    rounds, then raises SandboxUnavailable.
+    """
 
-    def __init__(self, base_url: str | None = None):
-        self.base_url = base_url or settings.judge_sandbox_url
+    def __init__(self, base_url: str | None = None, base_urls: list[str] | None = None):
+        urls = base_urls or ([base_url] if base_url else _configured_sandbox_urls())
+        self.nodes = [_node(url) for url in urls]
+        self.base_url = self.nodes[0].url
         self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._health_task: Optional[asyncio.Task] = None
 
     async def _get_client(self) -> httpx.AsyncClient:
-        if self._client is None:
-            self._client = httpx.AsyncClient(timeout=httpx.Timeout(30.0))
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            # Pooled connections belong to the loop that opened them
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(30.0),
+                limits=httpx.Limits(
+                    max_connections=settings.judge_sandbox_max_connections,
+                    max_keepalive_connections=settings.judge_sandbox_max_connections,
+                    keepalive_expiry=30.0,
+                ),
+            )
+            self._client_loop = loop
         return self._client
 
+    @property
+    def available(self) -> bool:
+        """Cached health: True unless every node's circuit is open."""
+        return any(node.healthy for node in self.nodes)
+
+    def _candidates(self) -> list[SandboxNode]:
+        """Nodes with a closed (or half-open) circuit, least loaded first."""
+        healthy = [n for n in self.nodes if n.healthy]
+        if not healthy:
+            raise SandboxUnavailable("Sandbox circuit open on all nodes")
+        return sorted(healthy, key=lambda n: (n.load, n.latency_sec))
+
+    async def _post(self, path: str, payload: dict, timeout: httpx.Timeout | None = None) -> dict:
+        client = await self._get_client()
+        last_exc: Exception | None = None
+        for _ in range(settings.judge_sandbox_overload_retries + 1):
+            backoff: float | None = None  # earliest Retry-After among busy nodes
+            for node in self._candidates():
+                if node.busy:
+                    wait = node.busy_until - time.monotonic()
+                    backoff = wait if backoff is None else min(backoff, wait)
+                    continue
+                node.in_flight += 1
+                started = time.monotonic()
+                try:
+                    kwargs = {"timeout": timeout} if timeout is not None else {}
+                    resp = await client.post(f"{node.url}{path}", json=payload, **kwargs)
+                    if resp.status_code >= 500:
+                        resp.raise_for_status()
+                except (httpx.TransportError, httpx.HTTPStatusError) as exc:
+                    node.record_failure()
+                    last_exc = exc
+                    continue
+                finally:
+                    node.in_flight -= 1
+                if resp.status_code == 429:
+                    wait = _retry_after(resp)
+                    node.record_overload(wait)
+                    backoff = wait if backoff is None else min(backoff, wait)
+                    last_exc = httpx.HTTPStatusError("429 overloaded", request=resp.request, response=resp)
+                    continue
+                node.record_success(time.monotonic() - started)
+                resp.raise_for_status()  # 4xx: the request itself is bad, no retry
+                return resp.json()
+            if backoff is None:
+                break  # no node is merely busy: every one failed
+            await asyncio.sleep(
+                min(max(backoff, 0.0), settings.judge_sandbox_max_backoff_sec) * random.uniform(1.0, 1.5)
+            )
+        raise SandboxUnavailable(f"All sandbox nodes failed: {last_exc or 'overloaded'}")
+
     async def run(
         self,
         code: str,
@@ -54,10 +222,9 @@ class SandboxClient:
         time_limit: float = 2.0,
         memory_limit_kb: int = 262144,
     ) -> dict:
-        client = await self._get_client()
-        resp = await client.post(
-            f"{self.base_url}/run",
-            json={
+        return await self._post(
+            "/run",
+            {
                 "code": code,
                 "language": language,
                 "input_data": input_data,
@@ -65,15 +232,119 @@ class SandboxClient:
                 "memory_limit_kb": memory_limit_kb,
             },
         )
-        resp.raise_for_status()
-        return resp.json()
+
+    async def run_batch(
+        self,
+        code: str,
+        language: str,
+        inputs: list[str] | None = None,
+        time_limit: float = 2.0,
+        memory_limit_kb: int = 262144,
+        test_case_id: str | None = None,
+        input_names: list[str] | None = None,
+        expected_names: list[str] | None = None,
+        stop_on_failure: bool = False,
+        priority: str = "practice",
+        expecteds: list[str] | None = None,
+        checker: dict | None = None,
+    ) -> dict:
+        """Compile once and run every case in a single sandbox call.
+
+        Cases are given either inline (``inputs``, ``expecteds``) or by
+        reference (``test_case_id`` + ``input_names``, ``expected_names``),
+        in which case the sandbox reads them from its own /data/test_cases
+        mount. With expected answers the sandbox checks each full output
+        itself and returns only a stdout preview plus the first mismatch
+        position. A ``checker`` (``checker_id``, ``language``, ``code``)
+        makes it judge accepted outputs with that special judge instead,
+        the expected answers being its answer files. The sandbox keeps
+        checkers compiled under ``checker_id``, so the source goes out
+        only when the chosen node answers 404 (it does not have that
+        checker yet).
+        With ``stop_on_failure`` cases after the first failing one come
+        back with ``skipped`` set instead of being run. ``priority``
+        ('contest', 'practice' or 'rejudge') orders the compile when the
+        sandbox's compilers are all busy.
+        ``result["results"][i]`` corresponds to the i-th case.
+        """
+        if input_names is not None:
+            cases = [{"input_name": name} for name in input_names]
+            for case, expected in zip(cases, expected_names or []):
+                case["expected_name"] = expected
+        else:
+            cases = [{"input_data": data} for data in inputs or []]
+            for case, expected in zip(cases, expecteds or []):
+                case["expected_data"] = expected
+        # Each case may take up to the sandbox's own per-run ceiling
+        per_case = time_limit * 2 + 5.0
+        payload = {
+            "code": code,
+            "language": language,
+            "cases": cases,
+            "test_case_id": test_case_id,
+            "time_limit": time_limit,
+            "memory_limit_kb": memory_limit_kb,
+            "stop_on_failure": stop_on_failure,
+            "priority": priority,
+        }
+        if checker is None:
+            return await self._post(
+                "/run_batch", payload, timeout=httpx.Timeout(30.0 + per_case * len(cases)),
+            )
+
+        timeout = httpx.Timeout(60.0 + (per_case + 15.0) * len(cases))
+        payload["checker"] = {key: value for key, value in checker.items() if key != "code"}
+        try:
+            return await self._post("/run_batch", payload, timeout=timeout)
+        except httpx.HTTPStatusError as exc:
+            if exc.response.status_code != 404:
+                raise
+        payload["checker"] = checker
+        return await self._post("/run_batch", payload, timeout=timeout)
+
+    async def start(self) -> None:
+        """Probe nodes now and keep their health fresh in the background."""
+        if self._health_task is None or self._health_task.done():
+            await self.health()
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.judge_sandbox_health_interval_sec)
+            await self.health()
 
     async def health(self) -> bool:
+        """Probe every node, refreshing its reported load; True if any is up."""
+        results = await asyncio.gather(*(self._probe(node) for node in self.nodes))
+        return any(results)
+
+    async def _probe(self, node: SandboxNode) -> bool:
         try:
             client = await self._get_client()
-            resp = await client.get(f"{self.base_url}/health", timeout=5.0)
-            return resp.status_code == 200
+            resp = await client.get(f"{node.url}/health", timeout=5.0)
+            if resp.status_code != 200:
+                node.record_failure()
+                return False
+            boxes = resp.json().get("boxes") or {}
+            node.reported_in_use = int(boxes.get("in_use", 0))
+            node.capacity = int(boxes.get("max_parallel", node.capacity) or 1)
+            node.failures = 0
+            node.down_until = 0.0
+            return True
         except Exception:
+            node.record_failure()
             return False
 
 
@@ -98,6 +369,9 @@ class JudgeResult:
     test_case_results: list[dict] = field(default_factory=list)
     total_time_sec: float = 0.0
     max_rss_kb: int = 0
+    rule_type: str = RULE_ACM
+    score: int = 0
+    test_case_id: str = ""  # test data directory actually judged against
 
 
 # ── database helpers ──────────────────────────────────────────────────
@@ -111,7 +385,8 @@ async def _get_problem_info(problem_id: str) -> Optional[dict]:
         result = await session.execute(
             text("""
                 SELECT _id, test_case_id, time_limit, memory_limit,
-                       spj, spj_code, spj_language, spj_version
+                       spj, spj_code, spj_language, spj_version,
+                       rule_type, test_case_score
                 FROM problem
                 WHERE _id = :pid OR CAST(id AS TEXT) = :pid
             """),
@@ -129,9 +404,49 @@ async def _get_problem_info(problem_id: str) -> Optional[dict]:
             "spj_code": row[5],
             "spj_language": row[6],
             "spj_version": row[7],
+            "rule_type": row[8] or RULE_ACM,
+            "test_case_score": row[9],
         }
 
 
+def _case_sort_key(input_file: Path) -> tuple:
+    """Numeric stems in numeric order (2.in before 10.in), then the rest."""
+    stem = input_file.stem
+    return (0, int(stem), "") if stem.isdigit() else (1, 0, stem)
+
+
+def _case_scores(test_case_score, input_files: list[Path]) -> list[int]:
+    """OI weight of each input file, from the problem's ``test_case_score``.
+
+    Entries are matched by ``input_name`` when present, otherwise by
+    position (``N.in`` is the N-th entry, as written by
+    ``write_test_case_files``). Without usable weights 100 points are
+    split evenly.
+    """
+    if isinstance(test_case_score, str):
+        try:
+            test_case_score = json.loads(test_case_score)
+        except ValueError:
+            test_case_score = None
+    entries = [e for e in test_case_score or [] if isinstance(e, dict)]
+    by_name = {e["input_name"]: e.get("score") for e in entries if e.get("input_name")}
+
+    scores = []
+    for input_file in input_files:
+        score = by_name.get(input_file.name)
+        if score is None and input_file.stem.isdigit() and 0 < int(input_file.stem) <= len(entries):
+            score = entries[int(input_file.stem) - 1].get("score")
+        try:
+            scores.append(max(0, int(score or 0)))
+        except (TypeError, ValueError):
+            scores.append(0)
+
+    if not any(scores) and input_files:
+        base, remainder = divmod(100, len(input_files))
+        scores = [base + (1 if i < remainder else 0) for i in range(len(input_files))]
+    return scores
+
+
 def _get_test_case_path(test_case_id: str) -> Path:
     """Get the path to test case files for a problem."""
     return Path("/data/test_cases") / test_case_id
@@ -215,6 +530,15 @@ def _compare_output(stdout: str, expected: str) -> bool:
     return _normalize(stdout) == _normalize(expected)
 
 
+def _read_head(path: Path, limit: int) -> str:
+    """Decode at most ``limit`` bytes from the start of ``path``."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(limit).decode("utf-8", errors="replace")
+    except OSError:
+        return ""
+
+
 def _extract_marker_block(code: str, block_name: str) -> Optional[str]:
     """Extract a marker block body from wrapped template source."""
     begin_marker = f"//{block_name} BEGIN"
@@ -270,59 +594,130 @@ def _effective_memory_limit_kb(language: str, configured_limit_kb: int) -> int:
 
 # ── SPJ execution ─────────────────────────────────────────────────────
 
-async def _run_spj(
-    sandbox: SandboxClient,
-    input_path: Path,
-    output_path: Path,
-    spj_code: str,
-    spj_language: str,
-) -> bool:
-    """
-    Run Special Judge script.
+def _checker_id(problem: dict) -> str:
+    """Sandbox checker-store id: one compiled checker per (problem, spj_version).
 
-    The SPJ receives:
-      stdin:  input_file_content + "\n" + output_file_content
-    Returns True if accepted.
+    A hash of the source is appended so an edited checker whose version
+    was not bumped is never confused with the old binary.
     """
-    input_data = input_path.read_text(encoding="utf-8", errors="replace")
-    output_data = output_path.read_text(encoding="utf-8", errors="replace")
-    spj_input = f"{input_data}\n{output_data}"
-
-    result = await sandbox.run(
-        code=spj_code,
-        language=spj_language,
-        input_data=spj_input,
-        time_limit=5.0,
-        memory_limit_kb=262144,
-    )
+    digest = hashlib.sha256(
+        f"{problem.get('spj_language')}\0{problem['spj_code']}".encode("utf-8"),
+    ).hexdigest()[:12]
+    base = re.sub(r"[^A-Za-z0-9_-]", "_", f"{problem['_id']}-{problem.get('spj_version') or 'v0'}")
+    return f"{base[:100]}-{digest}"
+
+
+def _spj_checker(problem: dict) -> dict:
+    """``run_batch`` checker spec for the problem's special judge.
 
-    # SPJ returns 0 for AC, non-zero for WA
-    return result.get("exit_code", 1) == 0 and result.get("verdict") == "AC"
+    The checker gets stdin ``input + "\n" + output`` and, as arguments,
+    input/output/answer files; exit code 0 accepts.
+    """
+    return {
+        "checker_id": _checker_id(problem),
+        "language": problem.get("spj_language") or "python3",
+        "code": problem["spj_code"],
+    }
 
 
 # ── judge orchestration ───────────────────────────────────────────────
 
+def _stops_judging(verdict: str, fail_fast: bool) -> bool:
+    """Whether no case after one with ``verdict`` counts.
+
+    ACM stops at the first failure; every rule stops at OLE (the sandbox
+    skips the cases that had not started yet).
+    """
+    return verdict == Verdict.OLE or (fail_fast and verdict != Verdict.AC)
+
+
+def _evaluate_case(
+    idx: int,
+    expected_file: Path,
+    result: dict,
+    is_spj: bool,
+) -> dict:
+    """Turn one sandbox run result into a per-case judge result.
+
+    With an SPJ the sandbox's checker has decided; a result it did not
+    check is an SE, never an exact-match AC.
+    """
+    verdict = result.get("verdict", Verdict.SE)
+    stdout = result.get("stdout", "")
+
+    tc_result = {
+        "case_index": idx,
+        "verdict": verdict,
+        "time_sec": result.get("time_sec", 0),
+        "max_rss_kb": result.get("max_rss_kb", 0),
+        "stdout": stdout[:1024],
+        "expected": "",
+        "stderr": result.get("stderr", "")[:512],
+    }
+
+    # Sandbox already compared the output (or the run itself failed):
+    # its verdict is final and only a failure needs a preview of the
+    # answer. Accepted cases leave the answer file unread, so the md5
+    # fast accept saves all answer-file I/O.
+    if result.get("compared") or verdict != Verdict.AC:
+        if verdict != Verdict.AC:
+            tc_result["expected"] = _read_head(expected_file, 1024)
+        if result.get("mismatch_line") is not None:
+            tc_result["mismatch_line"] = result["mismatch_line"]
+            tc_result["mismatch_column"] = result.get("mismatch_column")
+        return tc_result
+
+    if is_spj:
+        tc_result["expected"] = _read_head(expected_file, 1024)
+        tc_result.update(verdict=Verdict.SE, message="Special judge result missing")
+        return tc_result
+
+    expected_data = expected_file.read_text(encoding="utf-8", errors="replace")
+    tc_result["expected"] = expected_data[:1024]
+    if not _compare_output(stdout, expected_data):
+        tc_result["verdict"] = Verdict.WA
+
+    return tc_result
+
+
 async def judge_submission(
     code: str,
     language: str,
     problem_id: str,
     sandbox: Optional[SandboxClient] = None,
     user_id: str = "anonymous",
+    rule_type: Optional[str] = None,
+    cache: Optional[verdict_cache.VerdictCache] = None,
+    reuse_cached: bool = True,
+    priority: str = "practice",
 ) -> JudgeResult:
     """
-    Judge a code submission against all test cases of a problem.
+    Judge a code submission against the test cases of a problem.
 
     Args:
         code: Source code
         language: One of 'c', 'cpp', 'python3', 'java'
         problem_id: Problem _id from the database
-        sandbox: SandboxClient instance (created if None)
+        sandbox: SandboxClient instance (the shared client if None)
+        rule_type: 'ACM' or 'OI', overriding the problem's own rule
+            (e.g. a contest-wide setting). ACM stops at the first failing
+            case; OI runs every case and sums the weights of accepted ones.
+        cache: VerdictCache to consult and fill (the shared cache if None
+            and ``judge_cache_enabled``)
+        reuse_cached: False to always run (a rejudge); the fresh result
+            still refreshes the cache
+        priority: Sandbox compile queue class: 'contest', 'practice'
+            or 'rejudge'
 
     Returns:
         JudgeResult with final verdict and per-test-case details
     """
     if sandbox is None:
-        sandbox = SandboxClient()
+        from app.di import get_sandbox_client
+        sandbox = get_sandbox_client()
+    if cache is None and settings.judge_cache_enabled:
+        from app.di import get_verdict_cache
+        cache = get_verdict_cache()
 
     code_to_judge = _sanitize_submission_code(code, language)
 
@@ -331,6 +726,12 @@ async def judge_submission(
     if not problem:
         return JudgeResult(verdict=Verdict.SE, compile_error=f"Problem not found: {problem_id}")
 
+    if rule_type not in (RULE_ACM, RULE_OI):
+        rule_type = problem.get("rule_type")
+    if rule_type not in (RULE_ACM, RULE_OI):
+        rule_type = RULE_ACM
+    fail_fast = rule_type == RULE_ACM
+
     test_case_id = problem["test_case_id"]
     if not test_case_id:
         return JudgeResult(verdict=Verdict.SE, compile_error=f"No test cases for problem: {problem_id}")
@@ -347,35 +748,53 @@ async def judge_submission(
         test_case_dir = generated
 
     # 2. Discover test cases (pairs of .in / .out or .in / .ans)
-    input_files = sorted(test_case_dir.glob("*.in"))
+    input_files = sorted(test_case_dir.glob("*.in"), key=_case_sort_key)
     if not input_files:
         # One more attempt: directory exists but empty
         generated = await _ensure_test_case_files(test_case_id, problem_id)
         if generated is not None:
             test_case_dir = generated
-            input_files = sorted(test_case_dir.glob("*.in"))
+            input_files = sorted(test_case_dir.glob("*.in"), key=_case_sort_key)
     if not input_files:
         return JudgeResult(
             verdict=Verdict.SE,
             compile_error=f"No .in files in test case directory: {test_case_dir}",
         )
 
-    # 3. Compile once (outside sandbox — the /run endpoint handles this)
-    # We do a dry-run to detect CE early.
+    # 3. Resolve limits
     time_limit_ms = problem["time_limit"]
     time_limit_sec = max(1.0, time_limit_ms / 1000.0) if time_limit_ms else 2.0
     memory_limit_mb = problem["memory_limit"] or 256
     memory_limit_kb = memory_limit_mb * 1024
     effective_memory_limit_kb = _effective_memory_limit_kb(language, memory_limit_kb)
+    case_scores = _case_scores(problem.get("test_case_score"), input_files)
+    is_spj = bool(problem.get("spj") and problem.get("spj_code"))
+
+    cache_key = None
+    if cache is not None:
+        cache_key = verdict_cache.cache_key(
+            code=code_to_judge,
+            language=language,
+            test_case_id=test_case_dir.name,
+            test_data=verdict_cache.test_data_fingerprint(test_case_dir),
+            time_limit_sec=time_limit_sec,
+            memory_limit_kb=effective_memory_limit_kb,
+            spj_version=problem.get("spj_version") if is_spj else None,
+            rule_type=rule_type,
+            case_scores=case_scores,
+        )
+        cached = await cache.get(cache_key) if reuse_cached else None
+        if cached is not None:
+            return JudgeResult(**cached)
 
-    # 4. Run against each test case
+    # 4. Pair each input with its expected output (.out or .ans)
     test_case_results: list[dict] = []
     final_verdict = Verdict.AC
     total_time = 0.0
     max_rss = 0
 
+    runnable: list[tuple[int, Path, Path]] = []
     for idx, input_file in enumerate(input_files, start=1):
-        # Find matching output file (.out or .ans)
         expected_file = input_file.with_suffix(".out")
         if not expected_file.is_file():
             expected_file = input_file.with_suffix(".ans")
@@ -385,97 +804,119 @@ async def judge_submission(
                 "verdict": Verdict.SE,
                 "message": f"No expected output for {input_file.name}",
             })
-            if final_verdict == Verdict.AC:
-                final_verdict = Verdict.SE
+            if fail_fast:
+                break
             continue
-
-        # Read input
-        input_data = input_file.read_text(encoding="utf-8", errors="replace")
-        expected_data = expected_file.read_text(encoding="utf-8", errors="replace")
-
-        # Call sandbox
+        runnable.append((idx, input_file, expected_file))
+
+    # 5. Compile once and run every case in a single sandbox call
+    if runnable:
+        # The sandbox checks every full output itself (against the answer,
+        # or with the SPJ), so no verdict rests on a truncated stdout
+        if settings.judge_test_data_by_reference:
+            case_args = {
+                "test_case_id": test_case_dir.name,
+                "input_names": [input_file.name for _, input_file, _ in runnable],
+                "expected_names": [expected_file.name for _, _, expected_file in runnable],
+            }
+        else:
+            case_args = {
+                "inputs": [
+                    input_file.read_text(encoding="utf-8", errors="replace")
+                    for _, input_file, _ in runnable
+                ],
+                "expecteds": [
+                    expected_file.read_text(encoding="utf-8", errors="replace")
+                    for _, _, expected_file in runnable
+                ],
+            }
+        if is_spj:
+            case_args["checker"] = _spj_checker(problem)
         try:
-            result = await sandbox.run(
+            batch = await sandbox.run_batch(
                 code=code_to_judge,
                 language=language,
-                input_data=input_data,
                 time_limit=time_limit_sec,
                 memory_limit_kb=effective_memory_limit_kb,
+                stop_on_failure=fail_fast,
+                priority=priority,
+                **case_args,
             )
+        except SandboxUnavailable:
+            # No node reachable: let the caller (judge worker) retry later
+            raise
         except Exception as exc:
-            test_case_results.append({
-                "case_index": idx,
-                "verdict": Verdict.SE,
-                "message": f"Sandbox error: {exc}",
-            })
-            if final_verdict == Verdict.AC:
-                final_verdict = Verdict.SE
-            continue
-
-        verdict = result.get("verdict", Verdict.SE)
-        compile_success = result.get("compile_success", True)
-
-        if not compile_success:
-            # CE — compilation failed, stop here
+            for idx, _, _ in runnable:
+                test_case_results.append({
+                    "case_index": idx,
+                    "verdict": Verdict.SE,
+                    "message": f"Sandbox error: {exc}",
+                })
+            test_case_results.sort(key=lambda r: r["case_index"])
             return JudgeResult(
+                verdict=Verdict.SE, test_case_results=test_case_results, rule_type=rule_type,
+            )
+
+        if not batch.get("compile_success", True):
+            # CE — compilation failed, nothing was run
+            ce_result = JudgeResult(
                 verdict=Verdict.CE,
-                compile_error=result.get("compile_stderr", "Compilation failed"),
+                compile_error=batch.get("compile_stderr", "Compilation failed"),
+                rule_type=rule_type,
+                test_case_id=test_case_dir.name,
             )
+            if cache_key is not None:
+                await cache.put(cache_key, ce_result)
+            return ce_result
 
-        time_sec = result.get("time_sec", 0)
-        rss = result.get("max_rss_kb", 0)
-        stdout = result.get("stdout", "")
-
-        total_time += time_sec
-        max_rss = max(max_rss, rss)
-
-        tc_result = {
-            "case_index": idx,
-            "verdict": verdict,
-            "time_sec": time_sec,
-            "max_rss_kb": rss,
-            "stdout": stdout[:1024],
-            "expected": expected_data[:1024],
-            "stderr": result.get("stderr", "")[:512],
-        }
+        case_results = batch.get("results") or []
+        if len(case_results) != len(runnable):
+            return JudgeResult(
+                verdict=Verdict.SE,
+                compile_error=batch.get("message") or "Sandbox returned incomplete results",
+                rule_type=rule_type,
+            )
 
-        # If sandbox already returned non-AC, use that verdict
-        if verdict != Verdict.AC:
-            tc_result["verdict"] = verdict
+        for (idx, _, expected_file), result in zip(runnable, case_results):
+            if result.get("skipped"):
+                continue
+            tc_result = _evaluate_case(idx, expected_file, result, is_spj)
+            total_time += tc_result["time_sec"]
+            max_rss = max(max_rss, tc_result["max_rss_kb"])
             test_case_results.append(tc_result)
-            if final_verdict == Verdict.AC:
-                final_verdict = verdict
-            continue
-
-        # Compare output
-        if problem.get("spj") and problem.get("spj_code"):
-            # SPJ mode
-            try:
-                accepted = await _run_spj(
-                    sandbox, input_file,
-                    test_case_dir / f"{input_file.stem}.out_tmp",
-                    problem["spj_code"],
-                    problem.get("spj_language", "python3"),
-                )
-                if not accepted:
-                    tc_result["verdict"] = Verdict.WA
-                    if final_verdict == Verdict.AC:
-                        final_verdict = Verdict.WA
-            except Exception:
-                tc_result["verdict"] = Verdict.SE
-                if final_verdict == Verdict.AC:
-                    final_verdict = Verdict.SE
-        else:
-            if not _compare_output(stdout, expected_data):
-                tc_result["verdict"] = Verdict.WA
-                if final_verdict == Verdict.AC:
-                    final_verdict = Verdict.WA
-
-        test_case_results.append(tc_result)
+            if _stops_judging(tc_result["verdict"], fail_fast):
+                # Later cases may have run concurrently; report up to here
+                break
+
+    # Final verdict is the first non-AC verdict in case order
+    test_case_results.sort(key=lambda r: r["case_index"])
+    for pos, tc_result in enumerate(test_case_results):
+        if _stops_judging(tc_result["verdict"], fail_fast):
+            del test_case_results[pos + 1:]
+            break
+    for tc_result in test_case_results:
+        if tc_result["verdict"] != Verdict.AC:
+            final_verdict = tc_result["verdict"]
+            break
+
+    for tc_result in test_case_results:
+        tc_result["score"] = (
+            case_scores[tc_result["case_index"] - 1] if tc_result["verdict"] == Verdict.AC else 0
+        )
+    if rule_type == RULE_OI:
+        score = sum(tc_result["score"] for tc_result in test_case_results)
+    else:
+        score = sum(case_scores) if final_verdict == Verdict.AC else 0
 
-    return JudgeResult(
+    judge_result = JudgeResult(
         verdict=final_verdict,
         test_case_results=test_case_results,
         total_time_sec=total_time,
         max_rss_kb=max_rss,
+        rule_type=rule_type,
+        score=score,
+        test_case_id=test_case_dir.name,
     )
+    if cache_key is not None:
+        await cache.put(cache_key, judge_result)
+    return judge_result
@@ -0,0 +1,490 @@
+"""
+Bulk rejudge — rerun stored submissions after test data or limits change.
+
+Flow:
+  admin     → create_job(filters): select submissions by problem, contest
+              and/or time window, keep the ones affected by the change,
+              store the job in Redis and start the feeder
+  feeder    → feed(job) (Celery task, re-schedules itself): while the
+              judge backlog is below ``judge_rejudge_max_backlog``, reset a
+              batch of rows to PENDING and enqueue them with the low
+              ``judge_rejudge_priority``, so live submissions go first
+  worker    → judges as usual, then record_result(job, …) counts progress
+              and verdict changes
+  admin     → job_progress(job): done / total, changed verdicts,
+              throughput and ETA
+
+Change impact: every submission remembers the test_case_id it was judged
+against. Test data directories are content-addressed (the id is the md5
+of the ``info`` manifest), so the old directory is still on disk and the
+two are compared case by case: the manifest's ``stripped_output_md5``
+plus an md5 of the input file. A submission is skipped when the first
+changed case cannot alter its result: compile errors, or an ACM
+submission that already failed on an earlier, unchanged case. Limit or
+checker changes are not visible in the manifest; rejudge those with
+``only_affected=False``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import redis.asyncio as aioredis
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import async_session
+from app.models.enums import Verdict
+from app.services.judge_queue import enqueue_judge
+from app.services.judge_service import (
+    RULE_ACM,
+    _case_sort_key,
+    _get_problem_info,
+    _get_test_case_path,
+)
+from app.utils.oj_helpers import utc_now
+
+logger = logging.getLogger("ai-agent-lite.rejudge")
+
+JOB_TTL_SEC = 7 * 86400
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_CANCELLED = "cancelled"
+
+
+def _job_key(job_id: str) -> str:
+    return f"rejudge:job:{job_id}"
+
+
+def _redis() -> aioredis.Redis:
+    # Same Redis as the Celery result backend, like batch import progress
+    return aioredis.from_url(settings.celery_result_backend, decode_responses=True)
+
+
+# ── change impact ─────────────────────────────────────────────────────
+
+def _file_md5(path: Path) -> str:
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def case_signatures(test_case_dir: Path) -> Optional[list[tuple[str, str]]]:
+    """(input name, content hash) per case, in judging order.
+
+    None if the directory is gone. The output hash comes from the
+    ``info`` manifest when it has one for the case.
+    """
+    if not test_case_dir.is_dir():
+        return None
+    try:
+        manifest = json.loads((test_case_dir / "info").read_text(encoding="utf-8"))
+        entries = list((manifest.get("test_cases") or {}).values())
+    except (OSError, ValueError, AttributeError):
+        entries = []
+    output_md5 = {
+        e["input_name"]: e.get("stripped_output_md5")
+        for e in entries
+        if isinstance(e, dict) and e.get("input_name")
+    }
+
+    signatures = []
+    for input_file in sorted(test_case_dir.glob("*.in"), key=_case_sort_key):
+        out_md5 = output_md5.get(input_file.name)
+        if not out_md5:
+            expected = input_file.with_suffix(".out")
+            if not expected.is_file():
+                expected = input_file.with_suffix(".ans")
+            out_md5 = (
+                hashlib.md5(expected.read_bytes().strip()).hexdigest()
+                if expected.is_file() else ""
+            )
+        signatures.append((input_file.name, f"{_file_md5(input_file)}:{out_md5}"))
+    return signatures
+
+
+def first_changed_case(
+    old: list[tuple[str, str]],
+    new: list[tuple[str, str]],
+) -> Optional[int]:
+    """1-based position of the first case that differs; None if identical."""
+    for pos, (old_case, new_case) in enumerate(zip(old, new), start=1):
+        if old_case != new_case:
+            return pos
+    if len(old) != len(new):
+        return min(len(old), len(new)) + 1
+    return None
+
+
+def is_affected(
+    verdict: str,
+    test_case_results: list[dict],
+    rule_type: str,
+    first_changed: Optional[int],
+) -> bool:
+    """Whether a change starting at case ``first_changed`` can alter the result."""
+    if first_changed is None or verdict == Verdict.CE:
+        return False
+    if rule_type == RULE_ACM and verdict not in (Verdict.AC, Verdict.SE):
+        # ACM stops at the first failure; later cases were never judged
+        failed_at = next(
+            (r.get("case_index") for r in test_case_results or [] if r.get("verdict") != Verdict.AC),
+            None,
+        )
+        if isinstance(failed_at, int):
+            return first_changed <= failed_at
+    return True
+
+
+# ── selection ─────────────────────────────────────────────────────────
+
+async def _problem_id_forms(problem_id: str) -> list[str]:
+    """Every form a submission may store for a problem: display _id and numeric id."""
+    async with async_session() as db:
+        row = (
+            await db.execute(
+                text(
+                    "SELECT _id, CAST(id AS TEXT) FROM problem "
+                    "WHERE _id = :pid OR CAST(id AS TEXT) = :pid LIMIT 1",
+                ),
+                {"pid": problem_id},
+            )
+        ).fetchone()
+    if row is None:
+        return [problem_id]
+    return sorted({problem_id, *(str(v) for v in row if v is not None)})
+
+
+async def _select_submissions(
+    problem_id: Optional[str],
+    contest_id: Optional[str],
+    since: Optional[datetime],
+    until: Optional[datetime],
+) -> list[dict]:
+    clauses = ["verdict NOT IN (:pending, :judging)"]
+    params: dict = {
+        "pending": Verdict.PENDING.value,
+        "judging": Verdict.JUDGING.value,
+        "limit": settings.judge_rejudge_max_submissions,
+    }
+    if problem_id:
+        clauses.append("problem_id = ANY(:pids)")
+        params["pids"] = await _problem_id_forms(problem_id)
+    if contest_id:
+        clauses.append("contest_id=CAST(:cid AS uuid)")
+        params["cid"] = contest_id
+    if since:
+        clauses.append("created_at >= :since")
+        params["since"] = since
+    if until:
+        clauses.append("created_at < :until")
+        params["until"] = until
+
+    async with async_session() as db:
+        rows = (
+            await db.execute(
+                text(
+                    "SELECT id, problem_id, verdict, test_case_results, test_case_id, contest_id "
+                    "FROM ai_agent.submissions WHERE " + " AND ".join(clauses) + " "
+                    "ORDER BY created_at ASC LIMIT :limit",
+                ),
+                params,
+            )
+        ).fetchall()
+
+        contest_ids = sorted({str(r[5]) for r in rows if r[5] is not None})
+        contest_rules: dict[str, Optional[str]] = {}
+        if contest_ids:
+            contest_rows = (
+                await db.execute(
+                    text(
+                        "SELECT id, rule_type FROM ai_agent.contests "
+                        "WHERE CAST(id AS TEXT) = ANY(:ids)",
+                    ),
+                    {"ids": contest_ids},
+                )
+            ).fetchall()
+            contest_rules = {str(r[0]): r[1] for r in contest_rows}
+
+    submissions = []
+    for r in rows:
+        results = r[3]
+        if isinstance(results, str):
+            try:
+                results = json.loads(results)
+            except ValueError:
+                results = []
+        submissions.append({
+            "id": str(r[0]),
+            "problem_id": r[1],
+            "verdict": r[2],
+            "test_case_results": results if isinstance(results, list) else [],
+            "test_case_id": r[4],
+            "contest_rule_type": contest_rules.get(str(r[5])) if r[5] is not None else None,
+        })
+    return submissions
+
+
+async def _affected_submissions(submissions: list[dict]) -> list[dict]:
+    """Keep the submissions whose result the current test data may change."""
+    problems: dict[str, Optional[dict]] = {}
+    signatures: dict[str, Optional[list]] = {}
+
+    async def signatures_of(test_case_id: str) -> Optional[list]:
+        if test_case_id not in signatures:
+            signatures[test_case_id] = await asyncio.to_thread(
+                case_signatures, _get_test_case_path(test_case_id),
+            )
+        return signatures[test_case_id]
+
+    affected = []
+    for sub in submissions:
+        pid = sub["problem_id"]
+        if pid not in problems:
+            problems[pid] = await _get_problem_info(pid)
+        problem = problems[pid]
+        if problem is None or not sub["test_case_id"]:
+            affected.append(sub)  # unknown baseline: rejudge to be safe
+            continue
+        if sub["test_case_id"] == problem["test_case_id"]:
+            continue
+        old = await signatures_of(sub["test_case_id"])
+        new = await signatures_of(problem["test_case_id"])
+        if old is None or new is None:
+            affected.append(sub)
+            continue
+        rule_type = sub["contest_rule_type"] or problem.get("rule_type") or RULE_ACM
+        if is_affected(sub["verdict"], sub["test_case_results"], rule_type, first_changed_case(old, new)):
+            affected.append(sub)
+    return affected
+
+
+# ── jobs ──────────────────────────────────────────────────────────────
+
+async def create_job(
+    *,
+    problem_id: Optional[str] = None,
+    contest_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    only_affected: bool = True,
+    created_by: str = "",
+) -> dict:
+    """Select submissions, store a rejudge job and start feeding it."""
+    if not (problem_id or contest_id or since or until):
+        raise ValueError("Select submissions by problem, contest or time window")
+
+    submissions = await _select_submissions(problem_id, contest_id, since, until)
+    selected = await _affected_submissions(submissions) if only_affected else submissions
+
+    job_id = uuid.uuid4().hex[:12]
+    key = _job_key(job_id)
+    now = time.time()
+    job = {
+        "job_id": job_id,
+        "status": STATUS_RUNNING if selected else STATUS_COMPLETED,
+        "filters": json.dumps({
+            "problem_id": problem_id, "contest_id": contest_id,
+            "since": since.isoformat() if since else None,
+            "until": until.isoformat() if until else None,
+            "only_affected": only_affected,
+        }),
+        "created_by": created_by,
+        "matched": len(submissions),
+        "total": len(selected),
+        "enqueued": 0,
+        "done": 0,
+        "changed": 0,
+        "skipped": 0,
+        "created_at": now,
+        "started_at": now,
+        "finished_at": now if not selected else "",
+    }
+
+    client = _redis()
+    try:
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=job)
+            if selected:
+                pipe.rpush(f"{key}:queue", *(s["id"] for s in selected))
+                pipe.hset(f"{key}:old", mapping={s["id"]: s["verdict"] or "" for s in selected})
+            for suffix in ("", ":queue", ":old"):
+                pipe.expire(key + suffix, JOB_TTL_SEC)
+            await pipe.execute()
+    finally:
+        await client.aclose()
+
+    if selected:
+        from app.tasks.judge import feed_rejudge_task
+
+        feed_rejudge_task.apply_async(args=[job_id], queue=settings.judge_queue)
+    logger.info(
+        "rejudge job %s: %d of %d submissions selected", job_id, len(selected), len(submissions),
+    )
+    return await job_progress(job_id)
+
+
+async def _judge_backlog() -> int:
+    """Submissions currently waiting for or in judging (live and rejudge)."""
+    async with async_session() as db:
+        row = (
+            await db.execute(
+                text("SELECT COUNT(*) FROM ai_agent.submissions WHERE verdict IN (:pending, :judging)"),
+                {"pending": Verdict.PENDING.value, "judging": Verdict.JUDGING.value},
+            )
+        ).fetchone()
+    return int(row[0] or 0) if row else 0
+
+
+async def _reset_to_pending(submission_id: str, job_id: str) -> bool:
+    """Put a judged submission back to PENDING; False if it is in judging.
+
+    The row remembers ``job_id`` so a lost judge task is requeued as part
+    of the job (see requeue_stale_submissions).
+    """
+    async with async_session() as db:
+        row = (
+            await db.execute(
+                text(
+                    "UPDATE ai_agent.submissions SET verdict=:pending, rejudge_job=:job,"
+                    " updated_at=:n "
+                    "WHERE id=CAST(:sid AS uuid) AND verdict NOT IN (:pending, :judging) "
+                    "RETURNING id",
+                ),
+                {
+                    "sid": submission_id, "job": job_id, "n": utc_now(),
+                    "pending": Verdict.PENDING.value, "judging": Verdict.JUDGING.value,
+                },
+            )
+        ).fetchone()
+        await db.commit()
+    return row is not None
+
+
+async def feed(job_id: str) -> bool:
+    """Enqueue the next batch of a job; True while submissions remain."""
+    key = _job_key(job_id)
+    client = _redis()
+    try:
+        if await client.hget(key, "status") != STATUS_RUNNING:
+            return False
+        room = settings.judge_rejudge_max_backlog - await _judge_backlog()
+        count = min(settings.judge_rejudge_batch, room)
+        ids = await client.lpop(f"{key}:queue", count) if count > 0 else None
+        for submission_id in ids or []:
+            if await _reset_to_pending(submission_id, job_id):
+                enqueue_judge(
+                    submission_id,
+                    priority=settings.judge_rejudge_priority,
+                    rejudge_job=job_id,
+                )
+                await client.hincrby(key, "enqueued", 1)
+            else:
+                # Being judged right now, so its result is fresh anyway
+                await client.hincrby(key, "skipped", 1)
+                await _count_done(client, key, submission_id)
+        return await client.llen(f"{key}:queue") > 0
+    finally:
+        await client.aclose()
+
+
+async def _count_done(client: aioredis.Redis, key: str, submission_id: str) -> bool:
+    """Count a submission as done, once; a running job completes with its last one.
+
+    False if it was already counted (a requeued duplicate finishing too).
+    """
+    if not await client.sadd(f"{key}:done", submission_id):
+        return False
+    await client.expire(f"{key}:done", JOB_TTL_SEC)
+    done = await client.hincrby(key, "done", 1)
+    if (
+        await client.hget(key, "status") == STATUS_RUNNING
+        and done >= int(await client.hget(key, "total") or 0)
+    ):
+        await client.hset(key, mapping={"status": STATUS_COMPLETED, "finished_at": time.time()})
+    return True
+
+
+async def record_result(job_id: str, submission_id: str, verdict: Optional[str]) -> None:
+    """Count one rejudged submission (called by the judge worker).
+
+    A None ``verdict`` (the claim failed: another task is judging it) is
+    left for that task to count.
+    """
+    if verdict is None:
+        return
+    key = _job_key(job_id)
+    client = _redis()
+    try:
+        if await _count_done(client, key, submission_id):
+            old = await client.hget(f"{key}:old", submission_id)
+            if old is not None and old != verdict:
+                await client.hincrby(key, "changed", 1)
+    except Exception:
+        logger.warning("failed to record rejudge progress for %s", job_id, exc_info=True)
+    finally:
+        await client.aclose()
+
+
+async def cancel_job(job_id: str) -> Optional[dict]:
+    """Stop feeding a job; submissions already enqueued still finish."""
+    key = _job_key(job_id)
+    client = _redis()
+    try:
+        if not await client.exists(key):
+            return None
+        await client.delete(f"{key}:queue")
+        if await client.hget(key, "status") == STATUS_RUNNING:
+            await client.hset(key, mapping={"status": STATUS_CANCELLED, "finished_at": time.time()})
+    finally:
+        await client.aclose()
+    return await job_progress(job_id)
+
+
+async def job_progress(job_id: str) -> Optional[dict]:
+    """Progress, throughput (submissions/min) and ETA of a job."""
+    client = _redis()
+    try:
+        raw = await client.hgetall(_job_key(job_id))
+        queued = await client.llen(f"{_job_key(job_id)}:queue")
+    finally:
+        await client.aclose()
+    if not raw:
+        return None
+
+    total = int(raw.get("total") or 0)
+    done = int(raw.get("done") or 0)
+    started = float(raw.get("started_at") or time.time())
+    finished = float(raw["finished_at"]) if raw.get("finished_at") else None
+    elapsed = max((finished or time.time()) - started, 1e-6)
+    per_sec = done / elapsed if done else 0.0
+    remaining = max(total - done, 0)
+    running = raw.get("status") == STATUS_RUNNING
+
+    return {
+        "job_id": job_id,
+        "status": raw.get("status"),
+        "filters": json.loads(raw.get("filters") or "{}"),
+        "created_by": raw.get("created_by") or "",
+        "matched": int(raw.get("matched") or 0),
+        "total": total,
+        "queued": queued,
+        "enqueued": int(raw.get("enqueued") or 0),
+        "done": done,
+        "changed": int(raw.get("changed") or 0),
+        "skipped": int(raw.get("skipped") or 0),
+        "progress": round(done / total, 4) if total else 1.0,
+        "elapsed_sec": round(elapsed, 1),
+        "throughput_per_min": round(per_sec * 60, 2),
+        "eta_sec": round(remaining / per_sec, 1) if running and per_sec else None,
+    }
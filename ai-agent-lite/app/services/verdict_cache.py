@@ -0,0 +1,181 @@
+"""
+Verdict cache — reuse the result of an identical earlier judge run.
+
+Resubmitting unchanged code (or double-clicking submit) would otherwise
+recompile and rerun every test case. A result is reused only when all
+judge inputs match, so the key hashes:
+
+  sanitized code, language, test_case_id, a stat fingerprint of the
+  test case directory, time/memory limits, SPJ version, rule type and
+  case weights
+
+Changing the test data, limits, checker or scoring therefore yields a
+new key; stale entries are never read again and expire after
+``judge_cache_ttl_sec``.
+
+Lookups go to an in-process LRU first, then Redis (shared by all judge
+workers). Redis errors only turn a lookup into a miss. Only verdicts
+that do not depend on machine load are stored (see CACHEABLE_VERDICTS).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import dataclasses
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import redis.asyncio as aioredis
+
+from app.config import settings
+from app.metrics import judge_verdict_cache_total
+from app.models.enums import Verdict
+
+logger = logging.getLogger("ai-agent-lite.verdict_cache")
+
+# Bump when the stored JudgeResult layout changes
+CACHE_VERSION = 2
+KEY_PREFIX = "judge:verdict:"
+# TLE/MLE/RE/SE can flip with machine load or a sandbox hiccup
+CACHEABLE_VERDICTS = {Verdict.AC.value, Verdict.WA.value, Verdict.CE.value}
+
+
+def test_data_fingerprint(test_case_dir: Path) -> str:
+    """Name, size and mtime of every file in a test case directory.
+
+    ``test_case_id`` is already a hash of the ``info`` manifest; this also
+    catches files edited in place under the same id.
+    """
+    entries = []
+    for path in sorted(test_case_dir.iterdir()):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        entries.append(f"{path.name}:{st.st_size}:{st.st_mtime_ns}")
+    return hashlib.sha256("\n".join(entries).encode("utf-8")).hexdigest()
+
+
+def cache_key(
+    *,
+    code: str,
+    language: str,
+    test_case_id: str,
+    test_data: str,
+    time_limit_sec: float,
+    memory_limit_kb: int,
+    spj_version: Optional[str],
+    rule_type: str,
+    case_scores: list[int],
+) -> str:
+    payload = json.dumps(
+        [
+            CACHE_VERSION, code, language, test_case_id, test_data,
+            time_limit_sec, memory_limit_kb, spj_version or "", rule_type, case_scores,
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(result) -> bool:
+    """Whether every verdict in ``result`` is reproducible."""
+    if result.verdict not in CACHEABLE_VERDICTS:
+        return False
+    return all(r.get("verdict") in CACHEABLE_VERDICTS for r in result.test_case_results)
+
+
+class VerdictCache:
+    """Two-level (in-process LRU, then Redis) store of judge results."""
+
+    def __init__(self, local_size: Optional[int] = None, redis_url: Optional[str] = None):
+        self.local_size = settings.judge_cache_local_size if local_size is None else local_size
+        self.redis_url = redis_url if redis_url is not None else settings.judge_cache_redis_url
+        self._local: OrderedDict[str, dict] = OrderedDict()
+        self._redis: Optional[aioredis.Redis] = None
+        self._redis_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "stores": 0}
+
+    def _get_redis(self) -> Optional[aioredis.Redis]:
+        if not self.redis_url:
+            return None
+        loop = asyncio.get_running_loop()
+        if self._redis is None or self._redis_loop is not loop:
+            # Pooled connections belong to the loop that opened them
+            self._redis = aioredis.from_url(self.redis_url)
+            self._redis_loop = loop
+        return self._redis
+
+    def _remember(self, key: str, data: dict) -> None:
+        if self.local_size <= 0:
+            return
+        self._local[key] = data
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    def _count(self, outcome: str) -> None:
+        self.stats["misses" if outcome == "miss" else f"{outcome}_hits"] += 1
+        judge_verdict_cache_total.labels(outcome=outcome).inc()
+
+    async def get(self, key: str) -> Optional[dict]:
+        """Stored JudgeResult fields for ``key``, or None."""
+        data = self._local.get(key)
+        if data is not None:
+            self._local.move_to_end(key)
+            self._count("local")
+            # Callers get their own copy of the per-case result dicts
+            return copy.deepcopy(data)
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                raw = await client.get(KEY_PREFIX + key)
+            except Exception:
+                logger.warning("verdict cache lookup failed", exc_info=True)
+                raw = None
+            if raw is not None:
+                try:
+                    data = json.loads(raw)
+                except ValueError:
+                    data = None
+            if data is not None:
+                self._remember(key, copy.deepcopy(data))
+                self._count("redis")
+                return data
+
+        self._count("miss")
+        return None
+
+    async def put(self, key: str, result) -> None:
+        """Store a JudgeResult if its verdicts are reproducible."""
+        if not is_cacheable(result):
+            return
+        data = dataclasses.asdict(result)
+        self._remember(key, data)
+        self.stats["stores"] += 1
+        client = self._get_redis()
+        if client is None:
+            return
+        try:
+            await client.set(
+                KEY_PREFIX + key,
+                json.dumps(data, ensure_ascii=False),
+                ex=settings.judge_cache_ttl_sec,
+            )
+        except Exception:
+            logger.warning("verdict cache store failed", exc_info=True)
+
+    def hit_rate(self) -> float:
+        hits = self.stats["local_hits"] + self.stats["redis_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def clear(self) -> None:
+        """Drop the in-process entries (Redis entries expire by TTL)."""
+        self._local.clear()
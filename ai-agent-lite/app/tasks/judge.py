@@ -0,0 +1,94 @@
+"""Celery tasks for asynchronous submission judging."""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from app.celery_app import celery_app
+from app.config import settings
+from app.models.enums import Verdict
+from app.services import judge_queue, rejudge
+
+logger = logging.getLogger("ai-agent-lite.judge-task")
+
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _run(coro):
+    """Run a coroutine on this worker process's event loop.
+
+    The loop outlives the task, so the DB pool and the shared sandbox
+    client keep their connections (which are bound to the loop that
+    opened them) between submissions.
+    """
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop.run_until_complete(coro)
+
+
+@celery_app.task(
+    name="app.tasks.judge.judge_submission",
+    bind=True,
+    max_retries=3,
+    soft_time_limit=900,
+    time_limit=960,
+)
+def judge_submission_task(self, submission_id: str, rejudge_job: str | None = None) -> dict:
+    """Judge one PENDING submission and push its result."""
+    try:
+        verdict = _run(judge_queue.run_judge(submission_id, rejudge=rejudge_job is not None))
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            logger.exception("judge failed for submission %s, giving up", submission_id)
+            _run(judge_queue.fail_submission(submission_id, f"Judge failed: {exc}"))
+            if rejudge_job:
+                _run(rejudge.record_result(rejudge_job, submission_id, Verdict.SE.value))
+            return {"ok": False, "submission_id": submission_id}
+        logger.warning("judge failed for submission %s, retrying: %s", submission_id, exc)
+        raise self.retry(exc=exc, countdown=10 * (self.request.retries + 1))
+
+    if verdict is None:
+        logger.info("submission %s already judged or claimed, skipping", submission_id)
+    if rejudge_job:
+        _run(rejudge.record_result(rejudge_job, submission_id, verdict))
+    return {"ok": True, "submission_id": submission_id, "verdict": verdict}
+
+
+@celery_app.task(
+    name="app.tasks.judge.feed_rejudge",
+    soft_time_limit=120,
+    time_limit=180,
+)
+def feed_rejudge_task(job_id: str) -> dict:
+    """Enqueue the next rejudge batch, then re-schedule until the job is fed."""
+    more = _run(rejudge.feed(job_id))
+    if more:
+        feed_rejudge_task.apply_async(
+            args=[job_id],
+            queue=settings.judge_queue,
+            countdown=settings.judge_rejudge_interval_sec,
+        )
+    return {"ok": True, "job_id": job_id, "more": more}
+
+
+@celery_app.task(
+    name="app.tasks.judge.requeue_stale_submissions",
+    queue=settings.judge_queue,
+    soft_time_limit=60,
+    time_limit=90,
+)
+def requeue_stale_submissions_task(limit: int = 100) -> dict:
+    """Re-enqueue submissions whose judge job was lost."""
+    stale = _run(judge_queue.stale_submissions(limit=limit))
+    for submission_id, rejudge_job in stale:
+        if rejudge_job:
+            judge_queue.enqueue_judge(
+                submission_id, priority=settings.judge_rejudge_priority, rejudge_job=rejudge_job,
+            )
+        else:
+            judge_queue.enqueue_judge(submission_id)
+    if stale:
+        logger.warning("re-enqueued %d stale submissions", len(stale))
+    return {"ok": True, "requeued": len(stale)}
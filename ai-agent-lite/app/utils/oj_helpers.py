@@ -18,6 +18,9 @@ def status_code_from_verdict(verdict: str) -> int:
         "MLE": 3,
         "RE": 4,
         "SE": 5,
+        "PENDING": 6,
+        "JUDGING": 7,
+        "OLE": 9,
     }
     return mapping.get(verdict, 5)
 
@@ -32,6 +35,9 @@ def status_label(verdict: str) -> str:
         "MLE": "MEMORY_LIMIT_EXCEEDED",
         "RE": "RUNTIME_ERROR",
         "SE": "SYSTEM_ERROR",
+        "PENDING": "PENDING",
+        "JUDGING": "JUDGING",
+        "OLE": "OUTPUT_LIMIT_EXCEEDED",
     }
     return mapping.get(verdict, "SYSTEM_ERROR")
 
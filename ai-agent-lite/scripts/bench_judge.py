@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""End-to-end judge load benchmark.
+
+Drives ``judge_service.judge_submission`` through a real ``SandboxClient``
+with concurrent submitters and reports throughput plus latency
+percentiles. Problems are synthetic: N cases of S bytes each, written
+with ``write_test_case_files`` into a temporary test data root, with the
+expected output equal to the input (so an echo program is accepted).
+
+Sandbox modes:
+  fake  (default) an in-process stand-in sandbox HTTP server with
+        configurable compile/per-case latency, box parallelism and
+        verdict mix — measures the judge side alone
+  real  --sandbox-url http://host:8899 — a real cdut-sandbox; test data
+        is sent inline unless the sandbox mounts --data-root as
+        /data/test_cases (then pass --by-reference)
+
+Usage (from ai-agent-lite/):
+    python scripts/bench_judge.py --submissions 200 --concurrency 16 --cases 10
+    python scripts/bench_judge.py --case-latency-ms 20 --verdicts AC=0.8,WA=0.15,TLE=0.05
+    python scripts/bench_judge.py --sandbox-url http://localhost:8899 --language cpp
+
+Results are written as JSON (--output, default
+bench-results/judge-<timestamp>.json) for comparison across releases.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services import judge_service  # noqa: E402
+from app.services.problem_service import write_test_case_files  # noqa: E402
+
+SCHEMA_VERSION = 1
+
+ECHO_PROGRAMS = {
+    "python3": "import sys\nsys.stdout.write(sys.stdin.read())\n",
+    "c": (
+        "#include <stdio.h>\n"
+        "int main(void){int c;while((c=getchar())!=EOF)putchar(c);return 0;}\n"
+    ),
+    "cpp": (
+        "#include <iostream>\n"
+        "int main(){std::cout<<std::cin.rdbuf();return 0;}\n"
+    ),
+    "java": (
+        "public class Main{public static void main(String[] a)throws Exception{"
+        "System.in.transferTo(System.out);}}\n"
+    ),
+}
+
+
+# ── fake sandbox ──────────────────────────────────────────────────────
+
+@dataclasses.dataclass
+class FakeSandboxConfig:
+    compile_ms: float = 50.0
+    case_latency_ms: float = 5.0
+    jitter: float = 0.2  # +/- fraction of the per-case latency
+    parallelism: int = 8  # concurrent "boxes"
+    verdicts: dict[str, float] = dataclasses.field(default_factory=lambda: {"AC": 1.0})
+    seed: int = 0
+
+
+def parse_verdicts(spec: str) -> dict[str, float]:
+    """``AC=0.8,WA=0.2`` -> {"AC": 0.8, "WA": 0.2}."""
+    mix = {}
+    for part in spec.split(","):
+        verdict, _, weight = part.partition("=")
+        mix[verdict.strip().upper()] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError(f"Invalid verdict mix: {spec!r}")
+    return mix
+
+
+def make_fake_sandbox(config: FakeSandboxConfig, data_root: Path):
+    """FastAPI app speaking the /health and /run_batch protocol."""
+    from fastapi import FastAPI
+
+    app = FastAPI()
+    boxes = asyncio.Semaphore(config.parallelism)
+    rng = random.Random(config.seed)
+    verdicts, weights = zip(*config.verdicts.items())
+    state = {"in_use": 0}
+
+    async def run_one(case: dict, test_case_id: str | None, skip) -> dict:
+        async with boxes:
+            if skip():
+                return {"verdict": "SE", "skipped": True}
+            state["in_use"] += 1
+            try:
+                jitter = 1 + rng.uniform(-config.jitter, config.jitter)
+                await asyncio.sleep(config.case_latency_ms * jitter / 1000)
+            finally:
+                state["in_use"] -= 1
+        verdict = rng.choices(verdicts, weights)[0]
+        if case.get("input_name"):
+            stdout = (data_root / test_case_id / case["input_name"]).read_text()
+        else:
+            stdout = case.get("input_data", "")
+        result = {"verdict": verdict, "time_sec": config.case_latency_ms / 1000, "max_rss_kb": 2048}
+        if verdict not in ("AC", "WA"):
+            return result
+        if case.get("expected_name") or "expected_data" in case:
+            # Output checked "in the sandbox": only a preview goes back
+            result.update(compared=True, stdout=stdout[:1024])
+            if verdict == "WA":
+                result.update(mismatch_line=1, mismatch_column=1)
+        else:
+            # The judge compares: a wrong answer is an accepted run with other output
+            result.update(verdict="AC", stdout=stdout if verdict == "AC" else stdout + "x")
+        return result
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "boxes": {"in_use": state["in_use"], "max_parallel": config.parallelism}}
+
+    @app.post("/run_batch")
+    async def run_batch(req: dict):
+        await asyncio.sleep(config.compile_ms / 1000)
+        cases = req["cases"]
+        first_failure = len(cases)
+
+        async def run_case(index: int, case: dict) -> dict:
+            nonlocal first_failure
+            stop = req.get("stop_on_failure")
+            result = await run_one(case, req.get("test_case_id"), lambda: stop and index > first_failure)
+            if not result.get("skipped") and result["verdict"] != "AC":
+                first_failure = min(first_failure, index)
+            return result
+
+        results = await asyncio.gather(*(run_case(i, c) for i, c in enumerate(cases)))
+        return {"compile_success": True, "verdict": "AC", "results": list(results)}
+
+    return app
+
+
+async def serve_fake_sandbox(app) -> tuple[str, "object", asyncio.Task]:
+    """Start ``app`` on a free localhost port; returns (url, server, task)."""
+    import uvicorn
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", access_log=False))
+    task = asyncio.get_running_loop().create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.01)
+    return f"http://127.0.0.1:{port}", server, task
+
+
+# ── synthetic problems ────────────────────────────────────────────────
+
+def make_problems(data_root: Path, count: int, cases: int, case_bytes: int, seed: int) -> list[dict]:
+    """Write ``count`` problems of ``cases`` echo cases of ``case_bytes`` each."""
+    rng = random.Random(seed)
+    problems = []
+    for p in range(count):
+        test_cases = []
+        for _ in range(cases):
+            line = "".join(rng.choices("0123456789 ", k=max(1, case_bytes - 1)))
+            data = line.strip() + "\n"
+            test_cases.append({"input": data, "output": data})
+        staging = data_root / f"staging-{p}"
+        test_case_id, test_case_score = write_test_case_files(staging, test_cases)
+        shutil.rmtree(data_root / test_case_id, ignore_errors=True)
+        staging.rename(data_root / test_case_id)
+        problems.append({
+            "_id": f"bench-{p}",
+            "test_case_id": test_case_id,
+            "time_limit": 1000,
+            "memory_limit": 256,
+            "spj": False,
+            "spj_code": None,
+            "spj_language": None,
+            "spj_version": None,
+            "rule_type": "OI",
+            "test_case_score": test_case_score,
+        })
+    return problems
+
+
+# ── driver ────────────────────────────────────────────────────────────
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    """Run one benchmark configuration and return the result document."""
+    data_root = Path(tempfile.mkdtemp(prefix="bench_judge_", dir=args.data_root))
+    server = server_task = None
+    try:
+        problems = make_problems(data_root, args.problems, args.cases, args.case_bytes, args.seed)
+        by_id = {p["_id"]: p for p in problems}
+
+        if args.sandbox_url:
+            sandbox_url = args.sandbox_url
+            mode = "real"
+        else:
+            fake = FakeSandboxConfig(
+                compile_ms=args.compile_ms,
+                case_latency_ms=args.case_latency_ms,
+                jitter=args.jitter,
+                parallelism=args.fake_parallelism,
+                verdicts=args.verdicts,
+                seed=args.seed,
+            )
+            sandbox_url, server, server_task = await serve_fake_sandbox(make_fake_sandbox(fake, data_root))
+            mode = "fake"
+
+        by_reference = args.by_reference if args.sandbox_url else True
+        bench_settings = dataclasses.replace(
+            judge_service.settings,
+            judge_test_data_by_reference=by_reference,
+            judge_cache_enabled=False,
+        )
+        code = args.code or ECHO_PROGRAMS[args.language]
+
+        async def problem_info(problem_id: str):
+            return by_id.get(problem_id)
+
+        latencies: list[float] = []
+        verdicts: Counter = Counter()
+        errors: list[str] = []
+        sandbox = judge_service.SandboxClient(base_urls=[sandbox_url])
+        with mock.patch.object(judge_service, "settings", bench_settings), \
+                mock.patch.object(judge_service, "_get_problem_info", problem_info), \
+                mock.patch.object(judge_service, "_get_test_case_path", lambda tc: data_root / tc):
+            try:
+                await sandbox.start()
+                duration = await _drive(args, problems, code, sandbox, latencies, verdicts, errors)
+            finally:
+                await sandbox.close()
+
+    finally:
+        if server is not None:
+            server.should_exit = True
+            await server_task
+        shutil.rmtree(data_root, ignore_errors=True)
+
+    ordered = sorted(latencies)
+
+    def ms(sec: float) -> float:
+        return round(sec * 1000, 2)
+
+    return {
+        "benchmark": "judge",
+        "schema_version": SCHEMA_VERSION,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_rev": _git_rev(),
+        "host": {"name": platform.node(), "python": platform.python_version(), "cpus": os.cpu_count() or 1},
+        "params": {
+            "mode": mode,
+            "sandbox_url": args.sandbox_url,
+            "by_reference": by_reference,
+            "language": args.language,
+            "same_code": args.same_code,
+            "problems": args.problems,
+            "cases": args.cases,
+            "case_bytes": args.case_bytes,
+            "submissions": args.submissions,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            **({
+                "compile_ms": args.compile_ms,
+                "case_latency_ms": args.case_latency_ms,
+                "jitter": args.jitter,
+                "fake_parallelism": args.fake_parallelism,
+                "verdicts": args.verdicts,
+            } if mode == "fake" else {}),
+        },
+        "results": {
+            "submissions": len(latencies),
+            "errors": len(errors),
+            "error_samples": errors[:5],
+            "duration_sec": round(duration, 3),
+            "throughput_per_sec": round(len(latencies) / duration, 2) if duration else 0.0,
+            "cases_per_sec": round(len(latencies) * args.cases / duration, 2) if duration else 0.0,
+            "latency_ms": {
+                "mean": ms(statistics.fmean(ordered)) if ordered else 0.0,
+                "p50": ms(percentile(ordered, 50)),
+                "p95": ms(percentile(ordered, 95)),
+                "p99": ms(percentile(ordered, 99)),
+                "max": ms(ordered[-1]) if ordered else 0.0,
+            },
+            "verdicts": dict(verdicts),
+        },
+    }
+
+
+async def _drive(
+    args: argparse.Namespace,
+    problems: list[dict],
+    code: str,
+    sandbox: "judge_service.SandboxClient",
+    latencies: list[float],
+    verdicts: Counter,
+    errors: list[str],
+) -> float:
+    """Warm up, then run ``args.submissions`` through concurrent submitters.
+
+    Returns the measured wall time in seconds.
+    """
+    async def submit(n: int) -> None:
+        problem = problems[n % len(problems)]
+        # A unique comment per submission defeats every compile cache
+        source = code if args.same_code else f"{code}\n{'#' if args.language == 'python3' else '//'} {n}\n"
+        started = time.perf_counter()
+        try:
+            result = await judge_service.judge_submission(
+                source, args.language, problem["_id"], sandbox=sandbox,
+            )
+            verdicts[getattr(result.verdict, "value", result.verdict)] += 1
+        except Exception as exc:  # noqa: BLE001 — counted, not fatal
+            errors.append(f"{type(exc).__name__}: {exc}")
+            verdicts["error"] += 1
+        latencies.append(time.perf_counter() - started)
+
+    for n in range(args.warmup):
+        await submit(-1 - n)
+    latencies.clear()
+    verdicts.clear()
+    errors.clear()
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for n in range(args.submissions):
+        queue.put_nowait(n)
+
+    async def submitter() -> None:
+        while True:
+            try:
+                n = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await submit(n)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(submitter() for _ in range(args.concurrency)))
+    duration = time.perf_counter() - started
+    return duration
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Judge load benchmark")
+    parser.add_argument("--sandbox-url", default="", help="real sandbox; omit to use the fake one")
+    parser.add_argument("--by-reference", action="store_true",
+                        help="real sandbox reads test data from its own mount of --data-root")
+    parser.add_argument("--data-root", default=None, help="where synthetic test data is written")
+    parser.add_argument("--language", default="python3", choices=sorted(ECHO_PROGRAMS))
+    parser.add_argument("--code", default="", help="submitted source (default: an echo program)")
+    parser.add_argument("--same-code", action="store_true",
+                        help="submit identical source every time (measures compile caching)")
+    parser.add_argument("--problems", type=int, default=4)
+    parser.add_argument("--cases", type=int, default=10, help="test cases per problem")
+    parser.add_argument("--case-bytes", type=int, default=1024, help="bytes per test input")
+    parser.add_argument("--submissions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent submitters")
+    parser.add_argument("--warmup", type=int, default=2, help="unmeasured submissions first")
+    parser.add_argument("--compile-ms", type=float, default=50.0, help="fake: compile latency")
+    parser.add_argument("--case-latency-ms", type=float, default=5.0, help="fake: per-case run latency")
+    parser.add_argument("--jitter", type=float, default=0.2, help="fake: +/- latency fraction")
+    parser.add_argument("--fake-parallelism", type=int, default=8, help="fake: concurrent boxes")
+    parser.add_argument("--verdicts", type=parse_verdicts, default={"AC": 1.0},
+                        help="fake: verdict mix, e.g. AC=0.8,WA=0.15,TLE=0.05")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="",
+                        help="result JSON path (default bench-results/judge-<timestamp>.json)")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    report = asyncio.run(run_benchmark(args))
+
+    output = Path(args.output or f"bench-results/judge-{datetime.now():%Y%m%d-%H%M%S}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    res = report["results"]
+    lat = res["latency_ms"]
+    print(
+        f"{res['submissions']} submissions in {res['duration_sec']}s "
+        f"({report['params']['mode']} sandbox, concurrency {args.concurrency}): "
+        f"{res['throughput_per_sec']}/s, {res['cases_per_sec']} cases/s; "
+        f"latency ms p50={lat['p50']} p95={lat['p95']} p99={lat['p99']} max={lat['max']}; "
+        f"verdicts {res['verdicts']}; errors {res['errors']}"
+    )
+    print(f"results written to {output}")
+    return 1 if res["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
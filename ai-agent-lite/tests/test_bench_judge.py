@@ -0,0 +1,38 @@
+"""Smoke run of the judge load benchmark against its fake sandbox."""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+for path in (ROOT, ROOT / "scripts"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import bench_judge  # noqa: E402
+
+
+class BenchJudgeSmokeTest(unittest.IsolatedAsyncioTestCase):
+    async def test_reports_every_submission(self):
+        with tempfile.TemporaryDirectory() as data_root:
+            args = bench_judge.build_parser().parse_args([
+                "--data-root", data_root, "--submissions", "6", "--concurrency", "3",
+                "--cases", "2", "--compile-ms", "1", "--case-latency-ms", "1",
+                "--verdicts", "AC=1,WA=1",
+            ])
+            report = await bench_judge.run_benchmark(args)
+
+        results = report["results"]
+        self.assertEqual(results["errors"], 0)
+        self.assertEqual(sum(results["verdicts"].values()), 6)
+        self.assertLessEqual(set(results["verdicts"]), {"AC", "WA"})
+        self.assertLessEqual(results["latency_ms"]["p50"], results["latency_ms"]["max"])
+
+    def test_percentile_is_nearest_rank(self):
+        self.assertEqual(bench_judge.percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(bench_judge.percentile([1, 2, 3, 4], 99), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
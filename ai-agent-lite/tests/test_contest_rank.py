@@ -0,0 +1,84 @@
+"""ACM contest scoreboard: pending and CE rows are neither solves nor penalties."""
+
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.routers import contests  # noqa: E402
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+CID = "00000000-0000-0000-0000-000000000001"
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeSession:
+    """Answers contest, participants, submissions queries in that order."""
+
+    def __init__(self, submissions):
+        self.results = [
+            [(CID, START, START + timedelta(hours=5))],
+            [("alice", START, ""), ("bob", START, "")],
+            submissions,
+        ]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt, params=None):
+        return FakeResult(self.results.pop(0))
+
+
+def at(minutes):
+    return START + timedelta(minutes=minutes)
+
+
+class ContestRankTest(unittest.IsolatedAsyncioTestCase):
+    async def rank(self, submissions):
+        with mock.patch.object(contests, "ensure_contest_schema", mock.AsyncMock()), \
+                mock.patch.object(contests, "async_session", return_value=FakeSession(submissions)):
+            result = await contests.contest_rank(contest_id=CID)
+        return {row["user_id"]: row for row in result["data"]["results"]}
+
+    async def test_queued_row_ahead_of_ac_adds_no_penalty(self):
+        rows = await self.rank([
+            ("alice", "p1", "PENDING", at(10)),
+            ("alice", "p1", "JUDGING", at(11)),
+            ("alice", "p1", "CE", at(12)),
+            ("alice", "p1", "AC", at(30)),
+            ("bob", "p1", "WA", at(5)),
+            ("bob", "p1", "AC", at(20)),
+        ])
+
+        self.assertEqual(rows["alice"]["solved_count"], 1)
+        self.assertEqual(rows["alice"]["penalty_time_ms"], 30 * 60 * 1000)
+        self.assertEqual(rows["bob"]["penalty_time_ms"], (20 + 20) * 60 * 1000)
+        self.assertEqual(rows["alice"]["rank"], 1)
+
+    async def test_rejudge_in_progress_is_not_counted(self):
+        rows = await self.rank([("alice", "p1", "PENDING", at(10))])
+
+        self.assertEqual(rows["alice"]["solved_count"], 0)
+        self.assertEqual(rows["alice"]["penalty_time_ms"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+"""Judge worker flow: claim, judge, store and publish, with DB/Redis patched."""
+
+import asyncio
+import dataclasses
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services import judge_queue  # noqa: E402
+from app.services.judge_service import JudgeResult  # noqa: E402
+
+JOB = {"problem_id": "p1", "user_id": "u", "language": "cpp", "code": "x", "rule_type": "OI"}
+
+
+class FakeSession:
+    def __init__(self):
+        self.executed = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt, params=None):
+        self.executed.append(params)
+
+    async def commit(self):
+        pass
+
+
+class FakeRow:
+    """One submissions row, answering the claim, heartbeat and store UPDATEs."""
+
+    def __init__(self):
+        self.verdict = "PENDING"
+        self.updated_at = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt, params=None):
+        sql = str(stmt)
+        rows = []
+        if "SET verdict=:judging" in sql:
+            if self.verdict == params["pending"] or (
+                self.verdict == params["judging"] and self.updated_at < params["stale"]
+            ):
+                self.verdict, self.updated_at = params["judging"], params["n"]
+                rows = [("p1", "u", "cpp", "x", None)]
+        elif "SET updated_at=:n" in sql:
+            if self.verdict == params["judging"]:
+                self.updated_at = params["n"]
+        else:
+            self.verdict, self.updated_at = params["verdict"], params["n"]
+        return mock.Mock(fetchone=mock.Mock(return_value=rows[0] if rows else None))
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+class SlowJudgeTest(unittest.IsolatedAsyncioTestCase):
+    async def test_running_judge_is_not_claimed_again(self):
+        row = FakeRow()
+        fast_requeue = dataclasses.replace(judge_queue.settings, judge_requeue_after_sec=0.3)
+
+        async def slow_judge(**kwargs):
+            await asyncio.sleep(0.9)  # three times the stale threshold
+            return JudgeResult(verdict="AC")
+
+        with mock.patch.object(judge_queue, "settings", fast_requeue), \
+                mock.patch.object(judge_queue, "async_session", return_value=row), \
+                mock.patch.object(judge_queue, "publish_result", mock.AsyncMock()), \
+                mock.patch.object(judge_queue, "judge_submission", slow_judge):
+            first = asyncio.create_task(judge_queue.run_judge("sid"))
+            await asyncio.sleep(0.6)
+            second = await judge_queue._claim("sid")
+            verdict = await first
+
+        self.assertIsNone(second)
+        self.assertEqual((verdict, row.verdict), ("AC", "AC"))
+
+
+class RunJudgeTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.session = FakeSession()
+        self.published = mock.AsyncMock()
+        self.set_verdict = mock.AsyncMock()
+        patches = [
+            mock.patch.object(judge_queue, "async_session", return_value=self.session),
+            mock.patch.object(judge_queue, "publish_result", self.published),
+            mock.patch.object(judge_queue, "_set_verdict", self.set_verdict),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    async def test_result_is_stored_and_published(self):
+        judged = mock.AsyncMock(return_value=JudgeResult(verdict="WA", score=40))
+        with mock.patch.object(judge_queue, "_claim", mock.AsyncMock(return_value=JOB)), \
+                mock.patch.object(judge_queue, "judge_submission", judged):
+            verdict = await judge_queue.run_judge("sid")
+
+        self.assertEqual(verdict, "WA")
+        self.assertEqual(judged.call_args.kwargs["rule_type"], "OI")
+        stored = self.session.executed[-1]
+        self.assertEqual((stored["sid"], stored["verdict"], stored["score"]), ("sid", "WA", 40))
+        self.published.assert_awaited_once_with("sid", "WA")
+
+    async def test_rejudge_does_not_reuse_cached_result(self):
+        judged = mock.AsyncMock(return_value=JudgeResult(verdict="AC", test_case_id="tc2"))
+        with mock.patch.object(judge_queue, "_claim", mock.AsyncMock(return_value=JOB)), \
+                mock.patch.object(judge_queue, "judge_submission", judged):
+            await judge_queue.run_judge("sid", rejudge=True)
+
+        self.assertFalse(judged.call_args.kwargs["reuse_cached"])
+        self.assertEqual(judged.call_args.kwargs["priority"], "rejudge")
+        self.assertEqual(self.session.executed[-1]["tcid"], "tc2")
+
+    async def test_contest_submission_compiles_first(self):
+        judged = mock.AsyncMock(return_value=JudgeResult(verdict="AC"))
+        with mock.patch.object(judge_queue, "_claim", mock.AsyncMock(return_value=dict(JOB, contest_id="c1"))), \
+                mock.patch.object(judge_queue, "judge_submission", judged):
+            await judge_queue.run_judge("sid")
+        self.assertEqual(judged.call_args.kwargs["priority"], "contest")
+
+    async def test_already_claimed_submission_is_skipped(self):
+        judged = mock.AsyncMock()
+        with mock.patch.object(judge_queue, "_claim", mock.AsyncMock(return_value=None)), \
+                mock.patch.object(judge_queue, "judge_submission", judged):
+            self.assertIsNone(await judge_queue.run_judge("sid"))
+        judged.assert_not_awaited()
+        self.published.assert_not_awaited()
+
+    async def test_failure_releases_submission_for_retry(self):
+        judged = mock.AsyncMock(side_effect=RuntimeError("db down"))
+        with mock.patch.object(judge_queue, "_claim", mock.AsyncMock(return_value=JOB)), \
+                mock.patch.object(judge_queue, "judge_submission", judged):
+            with self.assertRaises(RuntimeError):
+                await judge_queue.run_judge("sid")
+        self.set_verdict.assert_awaited_once_with("sid", "PENDING")
+        self.published.assert_not_awaited()
+
+
+if __name__ == "__main__":
+    unittest.main()
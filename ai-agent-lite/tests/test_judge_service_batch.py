@@ -0,0 +1,261 @@
+"""Judge orchestration checks against an in-process fake sandbox."""
+
+import dataclasses
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services import judge_service  # noqa: E402
+from app.services.verdict_cache import VerdictCache  # noqa: E402
+
+
+class FakeSandbox:
+    """Echoes each input back as stdout, counting sandbox calls.
+
+    Inputs sent by reference are read from ``root/<test_case_id>/<name>``,
+    mirroring the sandbox's /data/test_cases mount. A checker accepts
+    outputs equal to the answer as integers.
+    """
+
+    def __init__(self, root: Path | None = None, compile_success: bool = True):
+        self.root = root
+        self.compile_success = compile_success
+        self.batch_calls = 0
+        self.last_call: dict = {}
+
+    async def run_batch(
+        self, code, language, inputs=None, time_limit=2.0, memory_limit_kb=262144,
+        test_case_id=None, input_names=None, expected_names=None,
+        stop_on_failure=False, priority="practice", expecteds=None, checker=None,
+    ):
+        self.batch_calls += 1
+        self.last_call = {
+            "inputs": inputs, "test_case_id": test_case_id,
+            "input_names": input_names, "expected_names": expected_names,
+            "expecteds": expecteds, "checker": checker,
+            "stop_on_failure": stop_on_failure, "priority": priority,
+        }
+        if not self.compile_success:
+            return {"compile_success": False, "compile_stderr": "boom", "verdict": "CE"}
+        if input_names is not None:
+            inputs = [(self.root / test_case_id / name).read_text() for name in input_names]
+            expecteds = [(self.root / test_case_id / name).read_text() for name in expected_names]
+        results = [
+            {"verdict": "AC", "time_sec": 0.01, "max_rss_kb": 1024, "stdout": data}
+            if data.strip() != "flood" else {"verdict": "OLE", "message": "Output limit exceeded"}
+            for data in inputs
+        ]
+        for result, expected in zip(results, expecteds or []):
+            if result["verdict"] != "AC":
+                continue
+            result["compared"] = True
+            if checker is not None:
+                if int(result["stdout"]) != int(expected):
+                    result["verdict"] = "WA"
+            elif not judge_service._compare_output(result["stdout"], expected):
+                result.update(verdict="WA", mismatch_line=1, mismatch_column=1)
+        if stop_on_failure:
+            failed = False
+            for pos, result in enumerate(results):
+                if failed:
+                    results[pos] = {"verdict": "SE", "skipped": True}
+                failed = failed or result["verdict"] != "AC"
+        return {"compile_success": True, "verdict": "AC", "results": results}
+
+
+PROBLEM = {
+    "_id": "p1", "test_case_id": "tc", "time_limit": 1000, "memory_limit": 256,
+    "spj": False, "spj_code": None, "spj_language": None, "spj_version": None,
+    "rule_type": "OI", "test_case_score": None,
+}
+
+
+class JudgeBatchTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.case_dir = Path(self._tmp.name)
+        patches = [
+            mock.patch.object(judge_service, "_get_problem_info", mock.AsyncMock(return_value=PROBLEM)),
+            mock.patch.object(judge_service, "_get_test_case_path", return_value=self.case_dir),
+            mock.patch.object(
+                judge_service, "settings",
+                dataclasses.replace(judge_service.settings, judge_cache_enabled=False),
+            ),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.addCleanup(self._tmp.cleanup)
+
+    def _write_case(self, name: str, data: str, expected: str) -> None:
+        (self.case_dir / f"{name}.in").write_text(data)
+        (self.case_dir / f"{name}.out").write_text(expected)
+
+    async def test_all_cases_judged_in_one_sandbox_call(self):
+        self._write_case("1", "1 2\n", "1 2")
+        self._write_case("2", "3 4\n", "3 4  \n")
+        self._write_case("3", "5 6\n", "wrong")
+        sandbox = FakeSandbox(self.case_dir.parent)
+
+        result = await judge_service.judge_submission("x", "cpp", "p1", sandbox=sandbox)
+
+        self.assertEqual(sandbox.batch_calls, 1)
+        self.assertEqual(result.verdict, "WA")
+        self.assertEqual([r["verdict"] for r in result.test_case_results], ["AC", "AC", "WA"])
+
+    async def test_test_data_sent_by_reference(self):
+        self._write_case("1", "7\n", "7")
+        sandbox = FakeSandbox(self.case_dir.parent)
+
+        result = await judge_service.judge_submission("x", "cpp", "p1", sandbox=sandbox)
+
+        self.assertEqual(result.verdict, "AC")
+        self.assertIsNone(sandbox.last_call["inputs"])
+        self.assertEqual(sandbox.last_call["test_case_id"], self.case_dir.name)
+        self.assertEqual(sandbox.last_call["input_names"], ["1.in"])
+        self.assertEqual(sandbox.last_call["expected_names"], ["1.out"])
+
+    async def test_sandbox_side_mismatch_is_reported(self):
+        self._write_case("1", "7\n", "8")
+        result = await judge_service.judge_submission(
+            "x", "cpp", "p1", sandbox=FakeSandbox(self.case_dir.parent),
+        )
+        case = result.test_case_results[0]
+        self.assertEqual(result.verdict, "WA")
+        self.assertEqual((case["mismatch_line"], case["mismatch_column"]), (1, 1))
+        self.assertEqual(case["expected"], "8")
+
+    async def test_accepted_case_does_not_read_the_answer(self):
+        self._write_case("1", "7\n", "7")
+        self._write_case("2", "8\n", "9")
+        read_head = mock.Mock(wraps=judge_service._read_head)
+
+        with mock.patch.object(judge_service, "_read_head", read_head):
+            result = await judge_service.judge_submission(
+                "x", "cpp", "p1", sandbox=FakeSandbox(self.case_dir.parent),
+            )
+
+        self.assertEqual([r["expected"] for r in result.test_case_results], ["", "9"])
+        self.assertEqual([c.args[0].name for c in read_head.call_args_list], ["2.out"])
+
+    async def test_acm_stops_at_first_failure(self):
+        for i in range(1, 13):
+            self._write_case(str(i), f"{i}\n", "bad" if i == 10 else str(i))
+        sandbox = FakeSandbox(self.case_dir.parent)
+
+        result = await judge_service.judge_submission(
+            "x", "cpp", "p1", sandbox=sandbox, rule_type="ACM",
+        )
+
+        self.assertTrue(sandbox.last_call["stop_on_failure"])
+        # 10.in sorts after 2.in, and nothing after the failure is reported
+        self.assertEqual(sandbox.last_call["input_names"][:3], ["1.in", "2.in", "3.in"])
+        self.assertEqual(result.verdict, "WA")
+        self.assertEqual([r["case_index"] for r in result.test_case_results], list(range(1, 11)))
+        self.assertEqual(result.score, 0)
+
+    async def test_oi_scores_accepted_case_weights(self):
+        self._write_case("1", "1\n", "1")
+        self._write_case("2", "2\n", "bad")
+        self._write_case("3", "3\n", "3")
+        problem = dict(PROBLEM, test_case_score=[{"score": 20}, {"score": 30}, {"score": 50}])
+        sandbox = FakeSandbox(self.case_dir.parent)
+
+        with mock.patch.object(judge_service, "_get_problem_info", mock.AsyncMock(return_value=problem)):
+            result = await judge_service.judge_submission("x", "cpp", "p1", sandbox=sandbox)
+
+        self.assertFalse(sandbox.last_call["stop_on_failure"])
+        self.assertEqual(result.verdict, "WA")
+        self.assertEqual([r["score"] for r in result.test_case_results], [20, 0, 50])
+        self.assertEqual(result.score, 70)
+
+    async def test_output_limit_stops_judging_under_oi(self):
+        self._write_case("1", "1\n", "1")
+        self._write_case("2", "flood\n", "2")
+        self._write_case("3", "3\n", "3")  # ran concurrently, still not counted
+        problem = dict(PROBLEM, test_case_score=[{"score": 20}, {"score": 30}, {"score": 50}])
+
+        with mock.patch.object(judge_service, "_get_problem_info", mock.AsyncMock(return_value=problem)):
+            result = await judge_service.judge_submission(
+                "x", "cpp", "p1", sandbox=FakeSandbox(self.case_dir.parent),
+            )
+
+        self.assertEqual(result.verdict, "OLE")
+        self.assertEqual([r["verdict"] for r in result.test_case_results], ["AC", "OLE"])
+        self.assertEqual(result.score, 20)
+
+    async def test_compile_error_short_circuits(self):
+        self._write_case("1", "1\n", "1")
+        result = await judge_service.judge_submission(
+            "x", "cpp", "p1", sandbox=FakeSandbox(compile_success=False),
+        )
+        self.assertEqual(result.verdict, "CE")
+        self.assertEqual(result.compile_error, "boom")
+
+    async def test_spj_judges_outputs_in_the_run_batch_call(self):
+        self._write_case("1", "05\n", "5")
+        self._write_case("2", "6\n", "7")
+        problem = dict(PROBLEM, spj=True, spj_code="checker", spj_language="cpp", spj_version="v2")
+        sandbox = FakeSandbox(self.case_dir.parent)
+
+        with mock.patch.object(judge_service, "_get_problem_info", mock.AsyncMock(return_value=problem)):
+            result = await judge_service.judge_submission("x", "cpp", "p1", sandbox=sandbox)
+            first = sandbox.last_call["checker"]
+            await judge_service.judge_submission("y", "cpp", "p1", sandbox=sandbox)
+
+        self.assertEqual(sandbox.batch_calls, 2)
+        self.assertEqual(sandbox.last_call["expected_names"], ["1.out", "2.out"])
+        self.assertEqual([r["verdict"] for r in result.test_case_results], ["AC", "WA"])
+        self.assertEqual(first, sandbox.last_call["checker"])
+        self.assertTrue(first["checker_id"].startswith("p1-v2-"))
+        self.assertEqual((first["language"], first["code"]), ("cpp", "checker"))
+
+    async def test_inline_test_data_sends_full_answers(self):
+        self._write_case("1", "7\n", "7")
+        self._write_case("2", "8\n", "9")
+        sandbox = FakeSandbox(self.case_dir.parent)
+        inline = dataclasses.replace(judge_service.settings, judge_test_data_by_reference=False)
+
+        with mock.patch.object(judge_service, "settings", inline):
+            result = await judge_service.judge_submission("x", "cpp", "p1", sandbox=sandbox)
+
+        self.assertEqual(sandbox.last_call["inputs"], ["7\n", "8\n"])
+        self.assertEqual(sandbox.last_call["expecteds"], ["7", "9"])
+        self.assertEqual([r["verdict"] for r in result.test_case_results], ["AC", "WA"])
+
+    async def test_identical_resubmission_is_served_from_cache(self):
+        self._write_case("1", "1\n", "1")
+        self._write_case("2", "2\n", "bad")
+        cache = VerdictCache(redis_url="")
+        sandbox = FakeSandbox(self.case_dir.parent)
+
+        first = await judge_service.judge_submission("x", "cpp", "p1", sandbox=sandbox, cache=cache)
+        again = await judge_service.judge_submission("x", "cpp", "p1", sandbox=sandbox, cache=cache)
+
+        self.assertEqual(sandbox.batch_calls, 1)
+        self.assertEqual(again, first)
+        self.assertEqual(cache.hit_rate(), 0.5)
+
+    async def test_cache_misses_when_limits_or_test_data_change(self):
+        self._write_case("1", "1\n", "1")
+        cache = VerdictCache(redis_url="")
+        sandbox = FakeSandbox(self.case_dir.parent)
+        await judge_service.judge_submission("x", "cpp", "p1", sandbox=sandbox, cache=cache)
+
+        slower = dict(PROBLEM, time_limit=3000)
+        with mock.patch.object(judge_service, "_get_problem_info", mock.AsyncMock(return_value=slower)):
+            await judge_service.judge_submission("x", "cpp", "p1", sandbox=sandbox, cache=cache)
+        self._write_case("2", "2\n", "2")
+        await judge_service.judge_submission("x", "cpp", "p1", sandbox=sandbox, cache=cache)
+
+        self.assertEqual(sandbox.batch_calls, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+"""Rejudge selection, change-impact analysis and requeueing of lost rejudges."""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services import judge_queue, rejudge  # noqa: E402
+from app.services.problem_service import write_test_case_files  # noqa: E402
+
+
+def _results(*verdicts):
+    return [{"case_index": i, "verdict": v} for i, v in enumerate(verdicts, start=1)]
+
+
+class ChangeImpactTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = Path(self._tmp.name)
+
+    def _data(self, *cases) -> str:
+        staging = self.root / "staging"
+        test_case_id, _ = write_test_case_files(
+            staging, [{"input": i, "output": o} for i, o in cases],
+        )
+        staging.rename(self.root / test_case_id)
+        return test_case_id
+
+    def test_first_changed_case_follows_judging_order(self):
+        cases = [(f"{i}\n", f"{i}\n") for i in range(1, 12)]
+        old = self._data(*cases)
+        cases[9] = ("10\n", "ten\n")
+        new = self._data(*cases)
+
+        changed = rejudge.first_changed_case(
+            rejudge.case_signatures(self.root / old), rejudge.case_signatures(self.root / new),
+        )
+
+        self.assertEqual(changed, 10)  # 10.in, not its lexical position
+        self.assertIsNone(rejudge.first_changed_case(
+            rejudge.case_signatures(self.root / old), rejudge.case_signatures(self.root / old),
+        ))
+
+    def test_added_case_changes_after_the_last_one(self):
+        old = rejudge.case_signatures(self.root / self._data(("1", "1")))
+        new = rejudge.case_signatures(self.root / self._data(("1", "1"), ("2", "2")))
+        self.assertEqual(rejudge.first_changed_case(old, new), 2)
+
+    def test_acm_failure_before_the_change_is_not_affected(self):
+        self.assertFalse(rejudge.is_affected("WA", _results("AC", "WA"), "ACM", 3))
+        self.assertTrue(rejudge.is_affected("WA", _results("AC", "WA"), "ACM", 2))
+        self.assertTrue(rejudge.is_affected("WA", _results("AC", "WA", "AC"), "OI", 3))
+        self.assertTrue(rejudge.is_affected("AC", _results("AC", "AC"), "ACM", 3))
+        self.assertFalse(rejudge.is_affected("CE", [], "ACM", 1))
+
+    async def test_only_affected_submissions_are_selected(self):
+        old = self._data(("1", "1"), ("2", "2"), ("3", "3"))
+        new = self._data(("1", "1"), ("2", "2"), ("3", "three"))
+        problem = {"test_case_id": new, "rule_type": "ACM"}
+        subs = [
+            {"id": "early-wa", "verdict": "WA", "test_case_results": _results("WA")},
+            {"id": "ac", "verdict": "AC", "test_case_results": _results("AC", "AC", "AC")},
+            {"id": "current", "verdict": "AC", "test_case_results": [], "test_case_id": new},
+            {"id": "legacy", "verdict": "WA", "test_case_results": [], "test_case_id": None},
+        ]
+        for sub in subs:
+            sub.setdefault("test_case_id", old)
+            sub.update(problem_id="p1", contest_rule_type=None)
+
+        with mock.patch.object(rejudge, "_get_problem_info", mock.AsyncMock(return_value=problem)), \
+                mock.patch.object(rejudge, "_get_test_case_path", side_effect=lambda tc: self.root / tc):
+            affected = await rejudge._affected_submissions(subs)
+
+        self.assertEqual([s["id"] for s in affected], ["ac", "legacy"])
+
+
+class FakeSession:
+    def __init__(self, row):
+        self.row = row
+        self.params = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt, params=None):
+        self.params.append(params)
+        return mock.Mock(fetchone=mock.Mock(return_value=self.row))
+
+
+class SelectionTest(unittest.IsolatedAsyncioTestCase):
+    async def test_problem_filter_matches_display_and_numeric_ids(self):
+        session = FakeSession(("A+B", "17"))
+        with mock.patch.object(rejudge, "async_session", return_value=session):
+            self.assertEqual(await rejudge._problem_id_forms("A+B"), ["17", "A+B"])
+            self.assertEqual(await rejudge._problem_id_forms("17"), ["17", "A+B"])
+
+    async def test_unknown_problem_is_matched_as_given(self):
+        with mock.patch.object(rejudge, "async_session", return_value=FakeSession(None)):
+            self.assertEqual(await rejudge._problem_id_forms("gone"), ["gone"])
+
+
+class FakeRedis:
+    """The hash and set commands rejudge progress uses, in memory."""
+
+    def __init__(self, data):
+        self.data = data
+
+    async def hget(self, key, field):
+        return self.data.get(key, {}).get(field)
+
+    async def hset(self, key, mapping):
+        self.data.setdefault(key, {}).update({k: str(v) for k, v in mapping.items()})
+
+    async def hincrby(self, key, field, amount):
+        value = int(self.data.setdefault(key, {}).get(field, 0)) + amount
+        self.data[key][field] = str(value)
+        return value
+
+    async def sadd(self, key, member):
+        members = self.data.setdefault(key, set())
+        added = member not in members
+        members.add(member)
+        return int(added)
+
+    async def expire(self, key, seconds):
+        pass
+
+    async def aclose(self):
+        pass
+
+
+class ProgressTest(unittest.IsolatedAsyncioTestCase):
+    async def test_job_completes_only_when_every_submission_is_judged(self):
+        key = rejudge._job_key("job1")
+        data = {
+            key: {"status": rejudge.STATUS_RUNNING, "total": "2", "done": "0", "changed": "0"},
+            f"{key}:old": {"s1": "AC", "s2": "AC"},
+        }
+        with mock.patch.object(rejudge, "_redis", return_value=FakeRedis(data)):
+            await rejudge.record_result("job1", "s1", "WA")
+            await rejudge.record_result("job1", "s1", None)  # duplicate lost the claim
+            await rejudge.record_result("job1", "s1", "WA")  # requeued duplicate ran too
+            self.assertEqual(data[key]["status"], rejudge.STATUS_RUNNING)
+            await rejudge.record_result("job1", "s2", "AC")
+
+        self.assertEqual(data[key]["status"], rejudge.STATUS_COMPLETED)
+        self.assertEqual((data[key]["done"], data[key]["changed"]), ("2", "1"))
+
+
+class RequeueTest(unittest.TestCase):
+    def test_stale_rejudge_is_requeued_with_its_job(self):
+        from app.tasks import judge as judge_tasks
+
+        stale = mock.AsyncMock(return_value=[("s1", None), ("s2", "job1")])
+        with mock.patch.object(judge_queue, "stale_submissions", stale), \
+                mock.patch.object(judge_queue, "enqueue_judge") as enqueue:
+            judge_tasks.requeue_stale_submissions_task()
+
+        self.assertEqual(enqueue.call_args_list[0], mock.call("s1"))
+        self.assertEqual(enqueue.call_args_list[1].kwargs["rejudge_job"], "job1")
+        self.assertEqual(
+            enqueue.call_args_list[1].kwargs["priority"], judge_tasks.settings.judge_rejudge_priority,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
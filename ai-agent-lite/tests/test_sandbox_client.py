@@ -0,0 +1,143 @@
+"""Multi-node SandboxClient dispatch and circuit breaking against mocked nodes."""
+
+import asyncio
+import dataclasses
+import json
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services import judge_service  # noqa: E402
+
+
+class SandboxClientRoutingTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        judge_service._nodes.clear()
+        self.addCleanup(judge_service._nodes.clear)
+        patched = dataclasses.replace(judge_service.settings, judge_sandbox_breaker_failures=2)
+        settings_patch = mock.patch.object(judge_service, "settings", patched)
+        settings_patch.start()
+        self.addCleanup(settings_patch.stop)
+        self.hits: list[str] = []
+        self.down: set[str] = set()
+        self.busy = {"a": 0, "b": 0}
+        self.checkers: set[str] = set()
+        self.checker_payloads: list[dict] = []
+        self.overloaded = {"a": 0, "b": 0}  # 429s each node still has to answer
+
+    def _client(self, urls=("http://a", "http://b")) -> judge_service.SandboxClient:
+        def handler(request: httpx.Request) -> httpx.Response:
+            host = request.url.host
+            self.hits.append(f"{host}{request.url.path}")
+            if host in self.down:
+                raise httpx.ConnectError("refused", request=request)
+            if request.url.path != "/health" and self.overloaded[host]:
+                self.overloaded[host] -= 1
+                return httpx.Response(429, headers={"Retry-After": "2"}, json={"detail": "Sandbox overloaded"})
+            if request.url.path == "/health":
+                return httpx.Response(200, json={"boxes": {"in_use": self.busy[host], "max_parallel": 4}})
+            if request.url.path == "/run_batch":
+                self.checker_payloads.append(json.loads(request.content)["checker"])
+                if "code" not in self.checker_payloads[-1] and host not in self.checkers:
+                    return httpx.Response(404, json={"detail": "Checker not registered"})
+                self.checkers.add(host)
+                return httpx.Response(200, json={"compile_success": True, "results": []})
+            return httpx.Response(200, json={"verdict": "AC", "node": host})
+
+        client = judge_service.SandboxClient(base_urls=list(urls))
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        client._client_loop = asyncio.get_running_loop()
+        self.addAsyncCleanup(client.close)
+        return client
+
+    async def test_dispatches_to_least_loaded_node(self):
+        client = self._client()
+        self.busy["a"] = 3
+        self.assertTrue(await client.health())
+
+        result = await client.run("x", "cpp")
+
+        self.assertEqual(result["node"], "b")
+
+    async def test_failed_node_is_retried_elsewhere_until_its_circuit_opens(self):
+        client = self._client()
+        self.down.add("a")
+
+        for _ in range(2):
+            self.assertEqual((await client.run("x", "cpp"))["node"], "b")
+        self.hits.clear()
+        self.assertEqual((await client.run("x", "cpp"))["node"], "b")
+
+        self.assertEqual(self.hits, ["b/run"])  # a's circuit is open
+
+    async def test_fails_fast_when_every_circuit_is_open(self):
+        client = self._client()
+        self.down.update({"a", "b"})
+        for _ in range(2):
+            with self.assertRaises(judge_service.SandboxUnavailable):
+                await client.run("x", "cpp")
+        self.hits.clear()
+
+        with self.assertRaises(judge_service.SandboxUnavailable):
+            await client.run("x", "cpp")
+        self.assertEqual(self.hits, [])
+        self.assertFalse(client.available)
+
+    async def test_successful_probe_closes_circuit(self):
+        client = self._client()
+        self.down.add("a")
+        for _ in range(2):
+            await client.run("x", "cpp")
+        self.down.clear()
+
+        self.assertTrue(await client.health())
+        self.assertTrue(all(node.healthy for node in client.nodes))
+
+    async def test_overloaded_node_is_skipped_without_opening_its_circuit(self):
+        client = self._client()
+        self.overloaded["a"] = 1
+
+        self.assertEqual((await client.run("x", "cpp"))["node"], "b")
+        self.hits.clear()
+        self.assertEqual((await client.run("x", "cpp"))["node"], "b")
+
+        self.assertEqual(self.hits, ["b/run"])  # a is still within its Retry-After
+        self.assertTrue(client.nodes[0].healthy)
+
+    async def test_backs_off_when_every_node_is_overloaded(self):
+        client = self._client()
+        self.overloaded.update(a=1, b=1)
+        sleeps: list[float] = []
+
+        async def fake_sleep(delay):
+            sleeps.append(delay)
+            for node in client.nodes:
+                node.busy_until = 0.0
+
+        with mock.patch.object(judge_service.asyncio, "sleep", fake_sleep):
+            result = await client.run("x", "cpp")
+
+        self.assertEqual(result["verdict"], "AC")
+        self.assertEqual(len(sleeps), 1)
+        self.assertTrue(2 * 0.9 <= sleeps[0] <= 2 * 1.5)  # Retry-After plus jitter
+
+    async def test_run_batch_checker_source_sent_only_when_node_lacks_it(self):
+        client = self._client(urls=["http://a"])
+        checker = {"checker_id": "p1-v1-abc", "language": "cpp", "code": "src"}
+
+        for _ in range(2):
+            await client.run_batch("x", "cpp", inputs=["1"], expecteds=["1"], checker=checker)
+
+        self.assertEqual(["code" in p for p in self.checker_payloads], [False, True, False])
+        self.assertTrue(client.available)
+
+
+if __name__ == "__main__":
+    unittest.main()
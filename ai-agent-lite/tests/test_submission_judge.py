@@ -0,0 +1,73 @@
+"""GET/POST /api/submit report the rule the submission is judged under."""
+
+import sys
+import unittest
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.routers import submission_judge  # noqa: E402
+
+SID = uuid.UUID("00000000-0000-0000-0000-0000000000aa")
+CID = uuid.UUID("00000000-0000-0000-0000-0000000000cc")
+
+
+class FakeSession:
+    """Returns ``sub`` for session.get and ``contest_rule`` for the contest query."""
+
+    def __init__(self, sub=None, contest_rule=None):
+        self.sub = sub
+        self.contest_rule = contest_rule
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def get(self, model, key):
+        return self.sub
+
+    async def execute(self, stmt, params=None):
+        row = (self.contest_rule,) if self.contest_rule else None
+        return mock.Mock(fetchone=mock.Mock(return_value=row))
+
+
+def submission(contest_id=None):
+    return SimpleNamespace(
+        id=SID, problem_id="p1", contest_id=contest_id, verdict="WA", compile_error="",
+        test_case_results=[], time_sec=0.1, memory_kb=1024, score=30,
+    )
+
+
+class RuleTypeTest(unittest.IsolatedAsyncioTestCase):
+    async def result(self, sub, problem_rule, contest_rule=None):
+        session = FakeSession(sub, contest_rule)
+        problem = mock.AsyncMock(return_value={"rule_type": problem_rule})
+        with mock.patch.object(submission_judge, "async_session", return_value=session), \
+                mock.patch.object(submission_judge, "_get_problem_info", problem):
+            return await submission_judge.get_submission_result(SID)
+
+    async def test_oi_problem_is_reported_as_oi(self):
+        result = await self.result(submission(), "OI")
+        self.assertEqual((result.rule_type, result.score), ("OI", 30))
+
+    async def test_contest_rule_overrides_the_problem_rule(self):
+        result = await self.result(submission(contest_id=CID), "OI", contest_rule="ACM")
+        self.assertEqual(result.rule_type, "ACM")
+
+    async def test_submit_reports_the_problem_rule(self):
+        req = submission_judge.SubmitRequest(code="x", language="cpp", problem_id="p1")
+        with mock.patch.object(submission_judge, "submit_for_judging", mock.AsyncMock(return_value=str(SID))), \
+                mock.patch.object(submission_judge, "_get_problem_info", mock.AsyncMock(return_value={"rule_type": "OI"})):
+            result = await submission_judge.submit_code(req)
+        self.assertEqual((result.verdict, result.rule_type), ("PENDING", "OI"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -574,7 +574,8 @@ export function useOjAuthAndProblems() {
     '5': { label: 'SYSTEM_ERROR', display: 'System Error', icon: '⚠️', color: '#ef4444' },
     '6': { label: 'PENDING', display: 'Pending', icon: '⏳', color: '#9ca3af' },
     '7': { label: 'JUDGING', display: 'Judging', icon: '🔄', color: '#60a5fa' },
-    '8': { label: 'PARTIALLY_ACCEPTED', display: 'Partially Accepted', icon: '⚠️', color: '#f59e0b' }
+    '8': { label: 'PARTIALLY_ACCEPTED', display: 'Partially Accepted', icon: '⚠️', color: '#f59e0b' },
+    '9': { label: 'OUTPUT_LIMIT_EXCEEDED', display: 'Output Limit Exceeded', icon: '📄', color: '#f59e0b' }
   }
 
   const normalizeSubmissionResult = (row) => {
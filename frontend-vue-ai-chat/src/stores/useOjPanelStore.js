@@ -241,7 +241,7 @@ function createOjPanelState() {
     if (result.label === 'ACCEPTED') return 'result-accepted'
     if (result.label === 'COMPILE_ERROR') return 'result-compile-error'
     if (['WRONG_ANSWER', 'RUNTIME_ERROR', 'CPU_TIME_LIMIT_EXCEEDED', 'REAL_TIME_LIMIT_EXCEEDED',
-      'MEMORY_LIMIT_EXCEEDED', 'SYSTEM_ERROR', 'PARTIALLY_ACCEPTED'].includes(result.label)) return 'result-wrong'
+      'MEMORY_LIMIT_EXCEEDED', 'OUTPUT_LIMIT_EXCEEDED', 'SYSTEM_ERROR', 'PARTIALLY_ACCEPTED'].includes(result.label)) return 'result-wrong'
     if (result.label === 'ERROR') return 'result-error'
     return 'result-unknown'
   }
@@ -0,0 +1,86 @@
+"""
+Admission control for the sandbox API.
+
+Every compile/run request holds a subprocess or a box for seconds, so
+accepting them all under a spike just piles them up until each one
+times out. At most ``max_pending`` such requests are admitted (running
+or waiting for a box or compiler slot); the rest are answered 429 at
+once with a Retry-After, so clients can back off or try another node.
+
+The Retry-After hint is how long this node needs to work off what it
+already holds, at the rate it has finished requests lately.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import time
+from collections import deque
+from typing import Optional
+
+from sandbox import SANDBOX_PARALLELISM
+
+# Admitted requests at once; 0 = four per box
+SANDBOX_MAX_PENDING = int(os.getenv("SANDBOX_MAX_PENDING", "0")) or 4 * SANDBOX_PARALLELISM
+RETRY_AFTER_MIN_SEC = 1
+RETRY_AFTER_MAX_SEC = 60
+
+
+class AdmissionControl:
+    """Counts admitted requests and estimates throughput for Retry-After."""
+
+    def __init__(self, max_pending: int = SANDBOX_MAX_PENDING, window_sec: float = 30.0):
+        self.max_pending = max(1, max_pending)
+        self.window_sec = window_sec
+        self.pending = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._finished: deque[float] = deque()  # completion times within the window
+
+    def try_admit(self) -> bool:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return False
+        self.pending += 1
+        self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        self.pending -= 1
+        self._finished.append(time.monotonic())
+
+    def throughput(self) -> float:
+        """Requests finished per second over the recent window."""
+        now = time.monotonic()
+        while self._finished and now - self._finished[0] > self.window_sec:
+            self._finished.popleft()
+        if not self._finished:
+            return 0.0
+        return len(self._finished) / max(now - self._finished[0], 1.0)
+
+    def retry_after(self) -> int:
+        """Seconds until the work admitted now should be done."""
+        rate = self.throughput()
+        if rate <= 0:
+            return RETRY_AFTER_MAX_SEC // 4
+        return min(max(math.ceil(self.pending / rate), RETRY_AFTER_MIN_SEC), RETRY_AFTER_MAX_SEC)
+
+    def stats(self) -> dict:
+        return {
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "throughput_per_sec": round(self.throughput(), 3),
+        }
+
+
+_admission: Optional[AdmissionControl] = None
+
+
+def get_admission_control() -> AdmissionControl:
+    global _admission
+    if _admission is None:
+        _admission = AdmissionControl()
+    return _admission
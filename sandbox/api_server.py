@@ -5,35 +5,136 @@ Wraps sandbox.py functions as REST endpoints so ai-agent-lite
 can call them from its own container.
 
 Endpoints:
-  POST /compile  — compile source code
-  POST /execute  — run compiled code in sandbox
+  POST /compile    — compile source code, returns an artifact token
+  POST /execute    — run a tokenized artifact in sandbox
+  DELETE /artifacts/{token} — release an artifact token early
+  POST /run        — compile + execute one input
+  POST /run_batch  — compile once, execute every test case
+  POST /check_batch — run a cached special judge over many outputs
+  GET  /health     — pool, queue, cache and store stats (JSON)
+  GET  /metrics    — the same stats plus phase latency histograms (Prometheus)
+
+The POST endpoints answer 429 with Retry-After when the node already
+holds SANDBOX_MAX_PENDING requests (see admission.py).
 """
 
 from __future__ import annotations
 
+import asyncio
+import os
+import re
+import shutil
 import uuid
+from collections import deque
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field
 
 from sandbox import (
+    BOX_SESSIONS,
+    SESSION_STATS,
+    BoxSession,
     Language,
+    SandboxError,
+    box_session,
     compile_code,
+    compile_stats,
+    get_compile_scheduler,
     execute,
+    get_artifact_cache,
+    get_box_pool,
+    get_java_cds_store,
+    get_pch_store,
     _write_temp,
     _extract_java_class,
     LANG_META,
+    RUN_TEMP_PREFIX,
+    scratch_root,
 )
+from admission import get_admission_control
+from artifact_store import get_artifact_store
+from checker_store import get_checker_store
+from checker import CHECK_STATS, manifest_index
 from enums import Verdict
-
-app = FastAPI(title="cdut-sandbox-api", version="0.1.0")
+from metrics import CONTENT_TYPE_LATEST, metrics_text, register_stats
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the box pool, start artifact GC, check the PCH and CDS archives."""
+    pool = get_box_pool()
+    store = get_artifact_store()
+    pch = get_pch_store()
+    cds = get_java_cds_store()
+    await pool.start()
+    await store.start()
+    await pch.start()
+    await cds.start()
+    yield
+    await cds.close()
+    await pch.close()
+    await store.close()
+    await pool.close()
+
+
+app = FastAPI(title="cdut-sandbox-api", version="0.1.0", lifespan=lifespan)
+
+# Endpoints that compile or run code, and so go through admission control
+ADMITTED_PATHS = {"/compile", "/execute", "/run", "/run_batch", "/check_batch"}
+
+
+@app.middleware("http")
+async def admission(request: Request, call_next):
+    """Turn away work beyond SANDBOX_MAX_PENDING with 429 + Retry-After."""
+    if request.method != "POST" or request.url.path not in ADMITTED_PATHS:
+        return await call_next(request)
+    control = get_admission_control()
+    if not control.try_admit():
+        return JSONResponse(
+            {"detail": "Sandbox overloaded"},
+            status_code=429,
+            headers={"Retry-After": str(control.retry_after())},
+        )
+    try:
+        return await call_next(request)
+    finally:
+        control.release()
+
+# Shared read-only test data, same layout as ai-agent-lite's /data/test_cases
+TEST_CASE_ROOT = Path(os.getenv("SANDBOX_TEST_CASE_ROOT", "/data/test_cases"))
+_TEST_CASE_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+_TEST_CASE_FILE_RE = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]{0,127}$")
+
+
+def _resolve_test_case_file(test_case_id: str | None, name: str) -> str:
+    """Map (test_case_id, file name) to a path under TEST_CASE_ROOT."""
+    if not test_case_id or not _TEST_CASE_ID_RE.match(test_case_id):
+        raise HTTPException(400, f"Invalid test_case_id: {test_case_id!r}")
+    if not _TEST_CASE_FILE_RE.match(name):
+        raise HTTPException(400, f"Invalid test case file name: {name!r}")
+    path = TEST_CASE_ROOT / test_case_id / name
+    if not path.is_file():
+        raise HTTPException(404, f"Test case file not found: {test_case_id}/{name}")
+    return str(path)
+
+
+async def _fast_accept_md5(test_case_id: str | None, expected_name: str | None) -> str | None:
+    """Manifest md5 for an expected file, if usable for the fast accept path."""
+    if not expected_name:
+        return None
+    return await asyncio.to_thread(
+        manifest_index.fast_accept_md5, TEST_CASE_ROOT / test_case_id, expected_name,
+    )
 
 
 # ── request / response models ─────────────────────────────────────────
 class CompileRequest(BaseModel):
     code: str = Field(..., min_length=1, max_length=65536)
     language: str = Field(..., pattern=r"^(c|cpp|python3|java)$")
+    priority: str = Field("practice", pattern=r"^(contest|practice|rejudge)$")  # compile queue class
 
 
 class CompileResponse(BaseModel):
@@ -43,15 +144,23 @@ class CompileResponse(BaseModel):
     stderr: str = ""
     exit_code: int = -1
     artifact_token: str | None = None  # opaque token to reference artifact
+    artifact_ttl_sec: float = 0.0  # idle time before the token expires
 
 
 class ExecuteRequest(BaseModel):
     artifact_token: str = Field(...)
     language: str = Field(..., pattern=r"^(c|cpp|python3|java)$")
     input_data: str = ""
+    # Alternative to input_data: read stdin from TEST_CASE_ROOT/<id>/<name>
+    test_case_id: str | None = None
+    input_name: str | None = None
+    # Compare stdout in the sandbox against TEST_CASE_ROOT/<id>/<name>
+    expected_name: str | None = None
     time_limit: float = 2.0
     memory_limit_kb: int = 262144
     processes_limit: int = 100
+    # Max size of any file the program writes; None = SANDBOX_OUTPUT_LIMIT_KB
+    output_limit_kb: int | None = Field(None, ge=1)
 
 
 class ExecuteResponse(BaseModel):
@@ -63,11 +172,10 @@ class ExecuteResponse(BaseModel):
     stdout: str = ""
     stderr: str = ""
     message: str = ""
-
-
-# ── in-memory artifact store ──────────────────────────────────────────
-# Maps token -> (artifact_path, language)
-_artifacts: dict[str, tuple[str, str]] = {}
+    compared: bool = False  # True: verdict already reflects the output check
+    mismatch_offset: int | None = None
+    mismatch_line: int | None = None
+    mismatch_column: int | None = None
 
 
 # ── routes ────────────────────────────────────────────────────────────
@@ -80,12 +188,16 @@ async def api_compile(req: CompileRequest):
     except ValueError:
         raise HTTPException(400, f"Unsupported language: {req.language}")
 
-    result = await compile_code(req.code, lang)
+    result = await compile_code(req.code, lang, priority=req.priority)
 
+    store = get_artifact_store()
     token = None
-    if result.success and result.artifact_path:
-        token = uuid.uuid4().hex[:12]
-        _artifacts[token] = (result.artifact_path, req.language)
+    if result.success and lang == Language.PYTHON3:
+        # No compile step: the script itself is the artifact, owned by the store
+        token = store.register(_write_temp(req.code, lang), req.language, owned=True)
+    elif result.success and result.artifact_path:
+        # Compiled artifacts live in the artifact cache; the token only refers to them
+        token = store.register(result.artifact_path, req.language)
 
     return CompileResponse(
         success=result.success,
@@ -94,38 +206,41 @@ async def api_compile(req: CompileRequest):
         stderr=result.stderr,
         exit_code=result.exit_code,
         artifact_token=token,
+        artifact_ttl_sec=store.ttl_sec if token else 0.0,
     )
 
 
 @app.post("/execute", response_model=ExecuteResponse)
 async def api_execute(req: ExecuteRequest):
     """Execute a compiled artifact inside the sandbox."""
-    artifact_entry = _artifacts.get(req.artifact_token)
-    if not artifact_entry:
-        raise HTTPException(404, f"Artifact token not found: {req.artifact_token}")
-
-    artifact_path, language_str = artifact_entry
+    entry = get_artifact_store().resolve(req.artifact_token)
+    if entry is None:
+        raise HTTPException(404, f"Artifact token not found or expired: {req.artifact_token}")
 
     try:
-        lang = Language(language_str)
+        lang = Language(entry.language)
     except ValueError:
-        raise HTTPException(400, f"Unsupported language: {language_str}")
+        raise HTTPException(400, f"Unsupported language: {entry.language}")
 
-    # For Python3, the artifact_path may be None (compile_code returns success with None)
-    # In that case, we need the original code — but we stored the token at compile time
-    # For Python3 we need to write temp file from stored code.
-    # Workaround: Python3 compile always returns artifact_path=None, so the token
-    # was never stored. The caller should use /run endpoint instead.
-    if language_str == "python3" and artifact_path is None:
-        raise HTTPException(400, "Python3 requires /run endpoint, not /compile + /execute")
+    input_path = None
+    if req.input_name:
+        input_path = _resolve_test_case_file(req.test_case_id, req.input_name)
+    expected_path = None
+    if req.expected_name:
+        expected_path = _resolve_test_case_file(req.test_case_id, req.expected_name)
+    expected_md5 = await _fast_accept_md5(req.test_case_id, req.expected_name)
 
     result = await execute(
-        artifact_path=artifact_path,
+        artifact_path=entry.path,
         language=lang,
         input_data=req.input_data,
+        input_path=input_path,
+        expected_path=expected_path,
+        expected_md5=expected_md5,
         time_limit=req.time_limit,
         memory_limit_kb=req.memory_limit_kb,
         processes_limit=req.processes_limit,
+        output_limit_kb=req.output_limit_kb,
     )
 
     return ExecuteResponse(
@@ -137,15 +252,29 @@ async def api_execute(req: ExecuteRequest):
         stdout=result.stdout,
         stderr=result.stderr,
         message=result.message,
+        compared=result.compared,
+        mismatch_offset=result.mismatch_offset,
+        mismatch_line=result.mismatch_line,
+        mismatch_column=result.mismatch_column,
     )
 
 
+@app.delete("/artifacts/{token}")
+async def api_release_artifact(token: str):
+    """Release an artifact token before its TTL runs out."""
+    if not get_artifact_store().release(token):
+        raise HTTPException(404, f"Artifact token not found: {token}")
+    return {"released": token}
+
+
 class RunRequest(BaseModel):
     code: str = Field(..., min_length=1, max_length=65536)
     language: str = Field(..., pattern=r"^(c|cpp|python3|java)$")
+    priority: str = Field("practice", pattern=r"^(contest|practice|rejudge)$")  # compile queue class
     input_data: str = ""
     time_limit: float = 2.0
     memory_limit_kb: int = 262144
+    output_limit_kb: int | None = Field(None, ge=1)
 
 
 class RunResponse(BaseModel):
@@ -170,7 +299,7 @@ async def api_run(req: RunRequest):
     except ValueError:
         raise HTTPException(400, f"Unsupported language: {req.language}")
 
-    compile_result = await compile_code(req.code, lang)
+    compile_result = await compile_code(req.code, lang, priority=req.priority)
 
     if not compile_result.success:
         return RunResponse(
@@ -184,6 +313,7 @@ async def api_run(req: RunRequest):
     # Determine artifact path
     if lang == Language.PYTHON3:
         artifact_path = _write_temp(req.code, lang)
+        get_artifact_store().hold(artifact_path)
     else:
         artifact_path = compile_result.artifact_path
 
@@ -194,13 +324,18 @@ async def api_run(req: RunRequest):
             message="No artifact produced",
         )
 
-    exec_result = await execute(
-        artifact_path=artifact_path,
-        language=lang,
-        input_data=req.input_data,
-        time_limit=req.time_limit,
-        memory_limit_kb=req.memory_limit_kb,
-    )
+    try:
+        exec_result = await execute(
+            artifact_path=artifact_path,
+            language=lang,
+            input_data=req.input_data,
+            time_limit=req.time_limit,
+            memory_limit_kb=req.memory_limit_kb,
+            output_limit_kb=req.output_limit_kb,
+        )
+    finally:
+        if lang == Language.PYTHON3:
+            _remove_temp(artifact_path)
 
     return RunResponse(
         compile_success=True,
@@ -217,6 +352,529 @@ async def api_run(req: RunRequest):
     )
 
 
+class BatchCase(BaseModel):
+    input_data: str = ""
+    input_name: str | None = None  # file in the request's test_case_id dir
+    expected_name: str | None = None  # compare stdout in the sandbox against this file
+    expected_data: str | None = None  # ... or against this inline answer
+
+
+class BatchChecker(BaseModel):
+    """Special judge for a /run_batch, as in /check_batch."""
+    checker_id: str = Field(..., pattern=r"^[A-Za-z0-9_-]{1,128}$")
+    language: str = Field(..., pattern=r"^(c|cpp|python3|java)$")
+    code: str | None = Field(None, min_length=1, max_length=65536)
+    time_limit: float = 5.0
+    memory_limit_kb: int = 262144
+
+
+class RunBatchRequest(BaseModel):
+    code: str = Field(..., min_length=1, max_length=65536)
+    language: str = Field(..., pattern=r"^(c|cpp|python3|java)$")
+    priority: str = Field("practice", pattern=r"^(contest|practice|rejudge)$")  # compile queue class
+    cases: list[BatchCase] = Field(..., min_length=1, max_length=512)
+    test_case_id: str | None = None
+    time_limit: float = 2.0
+    memory_limit_kb: int = 262144
+    output_limit_kb: int | None = Field(None, ge=1)
+    # ACM-style fail-fast: cases after the first failing one are not run
+    stop_on_failure: bool = False
+    # Judge AC outputs with this checker; expected_* is then its answer file
+    checker: BatchChecker | None = None
+
+
+class BatchCaseResult(BaseModel):
+    verdict: str
+    skipped: bool = False  # not run: an earlier case failed (or any case hit OLE)
+    time_sec: float = 0.0
+    time_wall_sec: float = 0.0
+    max_rss_kb: int = 0
+    exit_code: int = 0
+    stdout: str = ""
+    stderr: str = ""
+    message: str = ""
+    compared: bool = False
+    mismatch_offset: int | None = None
+    mismatch_line: int | None = None
+    mismatch_column: int | None = None
+
+
+class RunBatchResponse(BaseModel):
+    compile_success: bool
+    compile_stdout: str = ""
+    compile_stderr: str = ""
+    verdict: str = "SE"  # CE / SE when no case could run, else AC
+    message: str = ""
+    results: list[BatchCaseResult] = []
+
+
+@app.post("/run_batch", response_model=RunBatchResponse)
+async def api_run_batch(req: RunBatchRequest):
+    """Compile once, then execute the artifact against every test case.
+
+    Cases run concurrently on separate leased boxes (bounded by the box
+    pool's parallelism); ``results[i]`` belongs to ``cases[i]``. A case may
+    name a file under ``test_case_id`` instead of inlining ``input_data``,
+    and give an ``expected_name`` (or inline ``expected_data``) to have
+    its full output checked in the sandbox.
+
+    With a ``checker`` (compiled once per ``checker_id``, like
+    /check_batch) every AC output is kept and, once all cases have run,
+    the checker gets it untruncated together with the input and the
+    expected answer; a rejected output becomes WA. Checker failures are
+    SE with the reason in ``message``.
+
+    With ``stop_on_failure`` a case that gets a box after some earlier
+    case has failed is skipped; cases before the failure still run, so
+    the first failing case in order is always reported.
+
+    An OLE in any case skips every case that has not started yet, in
+    either mode: a program that floods output on one input usually does
+    on the others too.
+
+    With SANDBOX_BOX_SESSIONS (default) each worker leases one box and
+    runs case after case in it (BoxSession), so the artifact is copied
+    once per box rather than once per case.
+    """
+    try:
+        lang = Language(req.language)
+    except ValueError:
+        raise HTTPException(400, f"Unsupported language: {req.language}")
+
+    # Resolve test data references up front so a bad name fails before compiling
+    case_paths = [
+        (
+            _resolve_test_case_file(req.test_case_id, case.input_name) if case.input_name else None,
+            _resolve_test_case_file(req.test_case_id, case.expected_name) if case.expected_name else None,
+        )
+        for case in req.cases
+    ]
+    checker = None
+    if req.checker is None:
+        expected_md5s = await asyncio.gather(*(
+            _fast_accept_md5(req.test_case_id, case.expected_name) for case in req.cases
+        ))
+    else:
+        expected_md5s = [None] * len(req.cases)
+        try:
+            checker_lang = Language(req.checker.language)
+        except ValueError:
+            raise HTTPException(400, f"Unsupported language: {req.checker.language}")
+        checker, checker_compile = await _load_checker(
+            req.checker.checker_id, checker_lang, req.checker.code,
+        )
+        if checker is None:
+            return RunBatchResponse(
+                compile_success=True,
+                verdict=Verdict.SE.value,
+                message=f"Checker compilation failed: {checker_compile.stderr[:512]}",
+            )
+
+    compile_result = await compile_code(req.code, lang, priority=req.priority)
+
+    if not compile_result.success:
+        return RunBatchResponse(
+            compile_success=False,
+            compile_stdout=compile_result.stdout,
+            compile_stderr=compile_result.stderr,
+            verdict=Verdict.CE.value,
+            message="Compilation failed",
+        )
+
+    if lang == Language.PYTHON3:
+        artifact_path = _write_temp(req.code, lang)
+        get_artifact_store().hold(artifact_path)
+    else:
+        artifact_path = compile_result.artifact_path
+
+    if artifact_path is None:
+        return RunBatchResponse(
+            compile_success=True,
+            verdict=Verdict.SE.value,
+            message="No artifact produced",
+        )
+
+    # Index of the first failed case so far (fail-fast mode only)
+    first_failure = len(req.cases)
+    output_exceeded = False
+
+    def skip(index: int) -> bool:
+        return output_exceeded or (req.stop_on_failure and index > first_failure)
+
+    async def run_case(
+        index: int,
+        case: BatchCase,
+        input_path: str | None,
+        expected_path: str | None,
+        expected_md5: str | None,
+        session: BoxSession | None = None,
+    ) -> BatchCaseResult:
+        nonlocal first_failure, output_exceeded
+        run_kwargs = dict(
+            input_data=case.input_data,
+            input_path=input_path,
+            expected_path=None if checker else expected_path,
+            expected_md5=expected_md5,
+            time_limit=req.time_limit,
+            memory_limit_kb=req.memory_limit_kb,
+            output_limit_kb=req.output_limit_kb,
+            output_path=str(scratch / str(index) / "output.txt") if checker else None,
+        )
+        try:
+            if session is None:
+                exec_result = await execute(
+                    artifact_path=artifact_path,
+                    language=lang,
+                    skip=lambda: skip(index),
+                    **run_kwargs,
+                )
+            else:
+                exec_result = None if skip(index) else await session.run(**run_kwargs)
+        except SandboxError as exc:
+            first_failure = min(first_failure, index)
+            return BatchCaseResult(verdict=Verdict.SE.value, message=exc.message)
+        if exec_result is None:
+            return BatchCaseResult(verdict=Verdict.SE.value, skipped=True)
+        if exec_result.verdict != Verdict.AC:
+            first_failure = min(first_failure, index)
+        if exec_result.verdict == Verdict.OLE:
+            output_exceeded = True
+        return BatchCaseResult(
+            verdict=exec_result.verdict.value,
+            time_sec=exec_result.time_sec,
+            time_wall_sec=exec_result.time_wall_sec,
+            max_rss_kb=exec_result.max_rss_kb,
+            exit_code=exec_result.exit_code,
+            stdout=exec_result.stdout,
+            stderr=exec_result.stderr,
+            message=exec_result.message,
+            compared=exec_result.compared,
+            mismatch_offset=exec_result.mismatch_offset,
+            mismatch_line=exec_result.mismatch_line,
+            mismatch_column=exec_result.mismatch_column,
+        )
+
+    async def check(index: int, result: BatchCaseResult) -> None:
+        case_dir = scratch / str(index)
+        input_path, answer_path = case_paths[index]
+        try:
+            files = await asyncio.to_thread(
+                _stage_check_files, case_dir, input_path, str(case_dir / "output.txt"), answer_path,
+            )
+        except OSError as exc:
+            result.verdict = Verdict.SE.value
+            result.message = f"Staging checker files failed: {exc}"
+            return
+        checked = await _run_checker(
+            checker, str(case_dir / "stdin.txt"), files,
+            req.checker.time_limit, req.checker.memory_limit_kb,
+        )
+        result.compared = True
+        if checked.accepted:
+            return
+        if checked.verdict in (Verdict.AC.value, Verdict.RE.value):
+            # The checker ran to completion and rejected the output
+            result.verdict = Verdict.WA.value
+        else:
+            result.verdict = Verdict.SE.value
+            result.message = f"Checker {checked.verdict}: {checked.message}"[:512]
+
+    scratch = None
+    if checker is not None or any(case.expected_data is not None for case in req.cases):
+        scratch = await asyncio.to_thread(_new_scratch_dir, "batch")
+        try:
+            case_paths = await asyncio.to_thread(
+                _stage_batch_files, scratch, req.cases, case_paths, checker is not None,
+            )
+        except OSError as exc:
+            _remove_scratch(scratch)
+            if lang == Language.PYTHON3:
+                _remove_temp(artifact_path)
+            return RunBatchResponse(
+                compile_success=True,
+                verdict=Verdict.SE.value,
+                message=f"Staging test data failed: {exc}",
+            )
+
+    jobs = list(enumerate(zip(req.cases, case_paths, expected_md5s)))
+    results: list[BatchCaseResult | None] = [None] * len(jobs)
+    pending = deque(jobs)
+
+    async def session_worker() -> None:
+        if not pending:
+            return
+        async with box_session(artifact_path, lang) as session:
+            while pending:
+                index, (case, paths, md5) = pending.popleft()
+                results[index] = await run_case(index, case, *paths, md5, session=session)
+
+    # Pinned before any await, so no other compile can evict it mid-batch
+    with get_artifact_cache().pinned(artifact_path):
+        try:
+            if BOX_SESSIONS:
+                workers = min(len(jobs), get_box_pool().max_parallel)
+                await asyncio.gather(*(session_worker() for _ in range(workers)))
+            else:
+                results = await asyncio.gather(*(
+                    run_case(index, case, *paths, md5) for index, (case, paths, md5) in jobs
+                ))
+            # Checked only now: a checker needs a box of its own, and the
+            # session workers may be holding all of them
+            if checker is not None:
+                await asyncio.gather(*(
+                    check(index, result) for index, result in enumerate(results)
+                    if result.verdict == Verdict.AC.value and not result.skipped
+                ))
+        finally:
+            if lang == Language.PYTHON3:
+                _remove_temp(artifact_path)
+            if scratch is not None:
+                _remove_scratch(scratch)
+
+    return RunBatchResponse(
+        compile_success=True,
+        compile_stdout=compile_result.stdout,
+        compile_stderr=compile_result.stderr,
+        verdict=Verdict.AC.value,
+        results=list(results),
+    )
+
+
+class CheckCase(BaseModel):
+    output: str = ""  # the contestant's stdout
+    input_data: str = ""
+    input_name: str | None = None  # file in the request's test_case_id dir
+    answer_data: str = ""
+    answer_name: str | None = None  # expected answer file in the test_case_id dir
+
+
+class CheckBatchRequest(BaseModel):
+    # Stable per (problem, spj_version); the source is only needed when
+    # this node does not have the checker yet (otherwise 404)
+    checker_id: str = Field(..., pattern=r"^[A-Za-z0-9_-]{1,128}$")
+    language: str = Field(..., pattern=r"^(c|cpp|python3|java)$")
+    code: str | None = Field(None, min_length=1, max_length=65536)
+    cases: list[CheckCase] = Field(..., min_length=1, max_length=512)
+    test_case_id: str | None = None
+    time_limit: float = 5.0
+    memory_limit_kb: int = 262144
+
+
+class CheckCaseResult(BaseModel):
+    accepted: bool
+    verdict: str  # of the checker run itself: AC, RE (non-zero exit = reject), TLE, ...
+    time_sec: float = 0.0
+    exit_code: int = 0
+    stdout: str = ""
+    stderr: str = ""
+    message: str = ""
+
+
+class CheckBatchResponse(BaseModel):
+    compile_success: bool
+    compile_stderr: str = ""
+    message: str = ""
+    results: list[CheckCaseResult] = []
+
+
+def _new_scratch_dir(kind: str) -> Path:
+    """A fresh directory under SCRATCH_ROOT, which no box can see.
+
+    It is held against the artifact store's orphan sweep until
+    ``_remove_scratch``.
+    """
+    scratch_root()
+    scratch = Path(f"{RUN_TEMP_PREFIX}{kind}_{uuid.uuid4().hex[:8]}")
+    scratch.mkdir()
+    get_artifact_store().hold(str(scratch))
+    return scratch
+
+
+def _remove_scratch(scratch: Path | str) -> None:
+    shutil.rmtree(scratch, ignore_errors=True)
+    get_artifact_store().unhold(str(scratch))
+
+
+def _stage_batch_files(
+    scratch: Path,
+    cases: list[BatchCase],
+    case_paths: list[tuple[str | None, str | None]],
+    checked: bool,
+) -> list[tuple[str | None, str | None]]:
+    """Write a batch's inline data that has to be a file; returns (input, expected) paths.
+
+    Each case gets ``scratch/<index>/``. An inline expected answer is
+    written there so the full stdout file is compared against it; with a
+    checker the input is too, and a case without an answer gets an
+    empty one.
+    """
+    staged = []
+    for index, (case, (input_path, expected_path)) in enumerate(zip(cases, case_paths)):
+        case_dir = scratch / str(index)
+        case_dir.mkdir()
+        if expected_path is None and (case.expected_data is not None or checked):
+            expected_path = str(case_dir / "answer.txt")
+            Path(expected_path).write_text(case.expected_data or "", encoding="utf-8")
+        if input_path is None and checked:
+            input_path = str(case_dir / "input.txt")
+            Path(input_path).write_text(case.input_data, encoding="utf-8")
+        staged.append((input_path, expected_path))
+    return staged
+
+
+def _stage_check_files(scratch: Path, input_path: str, output_path: str, answer_path: str) -> dict:
+    """Write the checker's stdin.txt into ``scratch``; returns {box name: path}.
+
+    stdin keeps the original SPJ contract (input, a newline, then the
+    contestant output); the same data is also in the box as
+    input.txt / output.txt / answer.txt, passed as arguments
+    (testlib order). The files are copied into the checker's box like
+    any other.
+    """
+    with open(scratch / "stdin.txt", "wb") as stdin_file:
+        with open(input_path, "rb") as f:
+            shutil.copyfileobj(f, stdin_file)
+        stdin_file.write(b"\n")
+        with open(output_path, "rb") as f:
+            shutil.copyfileobj(f, stdin_file)
+    return {"input.txt": input_path, "output.txt": output_path, "answer.txt": answer_path}
+
+
+def _write_check_files(case: CheckCase, input_path: str | None, answer_path: str | None) -> tuple[str, dict]:
+    """Stage one /check_batch case; returns (scratch dir, {box name: path})."""
+    scratch = _new_scratch_dir("check")
+    if input_path is None:
+        input_path = str(scratch / "input.txt")
+        Path(input_path).write_text(case.input_data, encoding="utf-8")
+    if answer_path is None:
+        answer_path = str(scratch / "answer.txt")
+        Path(answer_path).write_text(case.answer_data, encoding="utf-8")
+    output_path = scratch / "output.txt"
+    output_path.write_text(case.output, encoding="utf-8")
+    return str(scratch), _stage_check_files(scratch, input_path, str(output_path), answer_path)
+
+
+async def _load_checker(checker_id: str, lang: Language, code: str | None):
+    """The stored checker, compiled from ``code`` if this node lacks it.
+
+    Returns (checker, None), or (None, compile result) when it does not
+    compile; 404 when it is missing and no ``code`` was sent.
+    """
+    store = get_checker_store()
+    checker = store.get(checker_id)
+    if checker is not None:
+        return checker, None
+    if code is None:
+        raise HTTPException(404, f"Checker not registered: {checker_id}")
+    checker, compile_result = await store.register(checker_id, code, lang)
+    return checker, None if checker is not None else compile_result
+
+
+async def _run_checker(
+    checker, stdin_path: str, files: dict, time_limit: float, memory_limit_kb: int,
+) -> CheckCaseResult:
+    """Run a checker over staged files; exit code 0 accepts."""
+    try:
+        exec_result = await execute(
+            artifact_path=checker.artifact_path,
+            language=checker.language,
+            input_path=stdin_path,
+            time_limit=time_limit,
+            memory_limit_kb=memory_limit_kb,
+            files=files,
+            args=list(files),
+        )
+    except SandboxError as exc:
+        return CheckCaseResult(accepted=False, verdict=Verdict.SE.value, message=exc.message)
+    return CheckCaseResult(
+        accepted=exec_result.verdict == Verdict.AC and exec_result.exit_code == 0,
+        verdict=exec_result.verdict.value,
+        time_sec=exec_result.time_sec,
+        exit_code=exec_result.exit_code,
+        stdout=exec_result.stdout[:1024],
+        stderr=exec_result.stderr[:1024],
+        message=exec_result.message,
+    )
+
+
+@app.post("/check_batch", response_model=CheckBatchResponse)
+async def api_check_batch(req: CheckBatchRequest):
+    """Judge many contestant outputs with one special judge.
+
+    The checker is compiled once per ``checker_id`` and kept in the
+    checker store. Each case runs it in its own leased box; exit code 0
+    accepts. ``results[i]`` belongs to ``cases[i]``.
+    """
+    try:
+        lang = Language(req.language)
+    except ValueError:
+        raise HTTPException(400, f"Unsupported language: {req.language}")
+
+    case_paths = [
+        (
+            _resolve_test_case_file(req.test_case_id, case.input_name) if case.input_name else None,
+            _resolve_test_case_file(req.test_case_id, case.answer_name) if case.answer_name else None,
+        )
+        for case in req.cases
+    ]
+
+    checker, compile_result = await _load_checker(req.checker_id, lang, req.code)
+    if checker is None:
+        return CheckBatchResponse(
+            compile_success=False,
+            compile_stderr=compile_result.stderr,
+            message="Checker compilation failed",
+        )
+
+    async def check_case(case: CheckCase, input_path: str | None, answer_path: str | None) -> CheckCaseResult:
+        scratch, files = await asyncio.to_thread(_write_check_files, case, input_path, answer_path)
+        try:
+            return await _run_checker(
+                checker, os.path.join(scratch, "stdin.txt"), files,
+                req.time_limit, req.memory_limit_kb,
+            )
+        finally:
+            _remove_scratch(scratch)
+
+    results = await asyncio.gather(*(
+        check_case(case, *paths) for case, paths in zip(req.cases, case_paths)
+    ))
+    return CheckBatchResponse(compile_success=True, results=list(results))
+
+
+def _remove_temp(path: str) -> None:
+    """Delete a per-request Python script written by ``_write_temp``."""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+    get_artifact_store().unhold(path)
+
+
+def _stats() -> dict:
+    return {
+        "boxes": get_box_pool().stats(),
+        "artifact_cache": get_artifact_cache().stats(),
+        "compile": compile_stats(),
+        "compile_queue": get_compile_scheduler().stats(),
+        "admission": get_admission_control().stats(),
+        "pch": get_pch_store().stats(),
+        "java_cds": get_java_cds_store().stats(),
+        "artifact_store": get_artifact_store().stats(),
+        "checker": dict(CHECK_STATS),
+        "checker_store": get_checker_store().stats(),
+        "sessions": dict(SESSION_STATS),
+    }
+
+
+register_stats(_stats)
+
+
 @app.get("/health")
 async def health():
-    return {"status": "ok", "sandbox": "isolate-v2.5"}
+    return {"status": "ok", "sandbox": "isolate-v2.5", **_stats()}
+
+
+@app.get("/metrics")
+async def metrics():
+    return Response(metrics_text(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,209 @@
+"""
+Artifact token store for the two-phase /compile + /execute API.
+
+/compile hands out an opaque token; /execute resolves it back to an
+artifact path. Tokens expire after a sliding TTL, the files the store
+owns (Python scripts written by ``_write_temp``) count against a byte
+quota, and a background task deletes expired entries plus any stale
+compile job dirs or temp scripts left behind by crashed requests.
+Scratch a request is still working in (a /run_batch waiting for boxes
+can hold its files for longer than the TTL) is ``hold``-ed and never
+swept.
+
+Compiled binaries and class dirs belong to the ArtifactCache in
+sandbox.py; tokens pointing at them are dropped without touching disk.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from sandbox import COMPILE_WORK_DIR, RUN_TEMP_PREFIX
+
+
+# ── config ────────────────────────────────────────────────────────────
+ARTIFACT_TTL_SEC = float(os.getenv("SANDBOX_ARTIFACT_TTL_SEC", "600"))
+ARTIFACT_QUOTA_BYTES = int(os.getenv("SANDBOX_ARTIFACT_QUOTA_MB", "256")) * 1024 * 1024
+ARTIFACT_MAX_TOKENS = int(os.getenv("SANDBOX_ARTIFACT_MAX_TOKENS", "10000"))
+ARTIFACT_GC_INTERVAL_SEC = float(os.getenv("SANDBOX_ARTIFACT_GC_INTERVAL_SEC", "60"))
+
+
+@dataclass
+class ArtifactEntry:
+    path: str
+    language: str
+    size: int
+    owned: bool  # True if the store deletes ``path`` when the token goes
+    expires_at: float
+
+
+class ArtifactStore:
+    """Token -> artifact registry with TTL, byte quota and background GC."""
+
+    def __init__(
+        self,
+        ttl_sec: float = ARTIFACT_TTL_SEC,
+        quota_bytes: int = ARTIFACT_QUOTA_BYTES,
+        max_tokens: int = ARTIFACT_MAX_TOKENS,
+        gc_interval_sec: float = ARTIFACT_GC_INTERVAL_SEC,
+    ):
+        self.ttl_sec = ttl_sec
+        self.quota_bytes = quota_bytes
+        self.max_tokens = max_tokens
+        self.gc_interval_sec = gc_interval_sec
+        self._entries: OrderedDict[str, ArtifactEntry] = OrderedDict()
+        self._held: set[str] = set()  # scratch paths of requests in flight
+        self._gc_task: Optional[asyncio.Task] = None
+        self.bytes = 0
+        self.expired = 0
+        self.evictions = 0
+        self.swept = 0
+
+    def register(self, path: str, language: str, owned: bool = False) -> str:
+        """Issue a token for ``path``; evicts the oldest tokens when over quota."""
+        token = uuid.uuid4().hex[:12]
+        size = _path_size(Path(path)) if owned else 0
+        self._entries[token] = ArtifactEntry(
+            path=path,
+            language=language,
+            size=size,
+            owned=owned,
+            expires_at=time.monotonic() + self.ttl_sec,
+        )
+        self.bytes += size
+        while len(self._entries) > 1 and (
+            self.bytes > self.quota_bytes or len(self._entries) > self.max_tokens
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+        return token
+
+    def resolve(self, token: str) -> Optional[ArtifactEntry]:
+        """Return the entry for ``token`` and extend its TTL, or None."""
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if entry.expires_at <= now or not os.path.exists(entry.path):
+            self._remove(token)
+            self.expired += 1
+            return None
+        entry.expires_at = now + self.ttl_sec
+        self._entries.move_to_end(token)
+        return entry
+
+    def release(self, token: str) -> bool:
+        """Drop a token early. Returns False if it was unknown."""
+        if token not in self._entries:
+            return False
+        self._remove(token)
+        return True
+
+    def hold(self, path: str) -> None:
+        """Keep a request's scratch ``path`` out of the orphan sweep."""
+        self._held.add(path)
+
+    def unhold(self, path: str) -> None:
+        self._held.discard(path)
+
+    def collect(self) -> None:
+        """Expire stale tokens and sweep orphaned scratch files."""
+        now = time.monotonic()
+        for token in [t for t, e in self._entries.items() if e.expires_at <= now]:
+            self._remove(token)
+            self.expired += 1
+
+        owned = {e.path for e in self._entries.values() if e.owned} | self._held
+        cutoff = time.time() - self.ttl_sec
+        run_temp = Path(RUN_TEMP_PREFIX)
+        candidates = list(run_temp.parent.glob(f"{run_temp.name}*"))
+        if COMPILE_WORK_DIR.is_dir():
+            candidates.extend(COMPILE_WORK_DIR.iterdir())
+        for path in candidates:
+            try:
+                if str(path) in owned or path.stat().st_mtime > cutoff:
+                    continue
+            except OSError:
+                continue
+            _delete(path)
+            self.swept += 1
+
+    async def start(self) -> None:
+        if self._gc_task is None:
+            self._gc_task = asyncio.get_running_loop().create_task(self._gc_loop())
+
+    async def close(self) -> None:
+        if self._gc_task is not None:
+            self._gc_task.cancel()
+            try:
+                await self._gc_task
+            except asyncio.CancelledError:
+                pass
+            self._gc_task = None
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "held": len(self._held),
+            "bytes": self.bytes,
+            "quota_bytes": self.quota_bytes,
+            "ttl_sec": self.ttl_sec,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "swept": self.swept,
+        }
+
+    async def _gc_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.gc_interval_sec)
+            try:
+                self.collect()
+            except Exception:
+                pass
+
+    def _remove(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        self.bytes -= entry.size
+        if entry.owned:
+            _delete(Path(entry.path))
+
+
+def _path_size(path: Path) -> int:
+    try:
+        if path.is_dir():
+            return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def _delete(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+_store: Optional[ArtifactStore] = None
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Return the process-wide artifact store (created on first use)."""
+    global _store
+    if _store is None:
+        _store = ArtifactStore()
+    return _store
@@ -0,0 +1,219 @@
+"""
+Streaming output checker for the cdut-sandbox container.
+
+Compares a program's stdout file with the expected answer file without
+loading either into memory, using the same rule as
+ai-agent-lite's ``judge_service._normalize``:
+
+    "\\n".join(line.rstrip() for line in text.rstrip("\\n").split("\\n"))
+
+i.e. trailing whitespace is ignored on every line and trailing newlines
+are ignored at the end of the output. Whitespace here is ASCII whitespace;
+non-ASCII Unicode spaces are compared literally.
+
+Fast accept: the test case ``info`` manifest stores ``stripped_output_md5``
+(md5 of the answer with surrounding whitespace stripped). If the answer
+file's normalized form equals its stripped form ("canonical", checked once
+per file and cached), an output whose normalized md5 matches the manifest
+is accepted without opening the answer file at all.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+CHUNK_SIZE = 64 * 1024
+_WS = b" \t\r\x0b\x0c\x1c\x1d\x1e\x1f"
+
+
+@dataclass
+class CompareResult:
+    match: bool
+    # Position of the first differing byte in the normalized streams
+    mismatch_offset: Optional[int] = None
+    mismatch_line: Optional[int] = None    # 1-based
+    mismatch_column: Optional[int] = None  # 1-based, in bytes
+    fast: bool = False  # accepted by manifest md5, answer file not read
+
+
+# Process-wide counters, reported by the API's /health
+CHECK_STATS = {"md5_accepts": 0, "stream_compares": 0}
+
+
+def normalized_chunks(f: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield the normalized form of ``f`` in chunks.
+
+    Whitespace at the end of a line is held back until a non-whitespace
+    byte on the same line shows it is not trailing. Newlines are held back
+    until a byte other than ``\\n`` shows they are not trailing.
+    """
+    pending_ws = b""
+    pending_nl = 0
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        pieces = chunk.split(b"\n")
+        out = []
+        for i, piece in enumerate(pieces):
+            if piece:
+                if pending_nl:
+                    out.append(b"\n" * pending_nl)
+                    pending_nl = 0
+                stripped = piece.rstrip(_WS)
+                if stripped:
+                    out.append(pending_ws)
+                    out.append(stripped)
+                    pending_ws = piece[len(stripped):]
+                else:
+                    pending_ws += piece
+            if i < len(pieces) - 1:
+                # A newline followed this piece: the line's trailing ws is dropped
+                pending_ws = b""
+                pending_nl += 1
+        if out:
+            yield b"".join(out)
+
+
+def hash_normalized(path: str) -> str:
+    """md5 of the normalized form of ``path``, computed while streaming."""
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in normalized_chunks(f):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def check_output(
+    actual_path: str,
+    expected_path: str,
+    expected_md5: Optional[str] = None,
+) -> CompareResult:
+    """Accept by md5 when possible, else stream-compare for the mismatch position.
+
+    ``expected_md5`` must only be given for canonical answer files
+    (see ``ManifestIndex.fast_accept_md5``).
+    """
+    if expected_md5 is not None and hash_normalized(actual_path) == expected_md5:
+        CHECK_STATS["md5_accepts"] += 1
+        return CompareResult(match=True, fast=True)
+    CHECK_STATS["stream_compares"] += 1
+    return compare_files(actual_path, expected_path)
+
+
+class ManifestIndex:
+    """Cached ``info`` manifests and answer-file canonicality checks.
+
+    Keys include mtime/size, so replaced test data is picked up; the
+    caches are simply cleared when they grow past ``max_entries``.
+    """
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._manifests: dict[str, tuple[int, dict[str, str]]] = {}
+        self._canonical: dict[tuple[str, int, int], bool] = {}
+
+    def fast_accept_md5(self, test_case_dir: Path, expected_name: str) -> Optional[str]:
+        """Manifest md5 for ``expected_name`` if it can be used to accept."""
+        md5 = self._manifest(test_case_dir).get(expected_name)
+        if md5 is None:
+            return None
+        expected = test_case_dir / expected_name
+        try:
+            st = expected.stat()
+        except OSError:
+            return None
+        key = (str(expected), st.st_mtime_ns, st.st_size)
+        canonical = self._canonical.get(key)
+        if canonical is None:
+            if len(self._canonical) >= self.max_entries:
+                self._canonical.clear()
+            canonical = hash_normalized(str(expected)) == md5
+            self._canonical[key] = canonical
+        return md5 if canonical else None
+
+    def _manifest(self, test_case_dir: Path) -> dict[str, str]:
+        info = test_case_dir / "info"
+        try:
+            mtime = info.stat().st_mtime_ns
+        except OSError:
+            return {}
+        cached = self._manifests.get(str(info))
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            data = json.loads(info.read_text(encoding="utf-8"))
+            by_name = {
+                case["output_name"]: case["stripped_output_md5"]
+                for case in data.get("test_cases", {}).values()
+                if case.get("output_name") and case.get("stripped_output_md5")
+            }
+        except (OSError, ValueError, AttributeError, TypeError):
+            by_name = {}
+        if len(self._manifests) >= self.max_entries:
+            self._manifests.clear()
+        self._manifests[str(info)] = (mtime, by_name)
+        return by_name
+
+
+manifest_index = ManifestIndex()
+
+
+def compare_files(actual_path: str, expected_path: str) -> CompareResult:
+    """Stream-compare two files under the trailing-whitespace rule."""
+    with open(actual_path, "rb") as actual, open(expected_path, "rb") as expected:
+        return compare_streams(normalized_chunks(actual), normalized_chunks(expected))
+
+
+def compare_streams(actual: Iterator[bytes], expected: Iterator[bytes]) -> CompareResult:
+    a_buf = b""
+    e_buf = b""
+    offset = 0
+    line = 1
+    line_start = 0  # offset at which the current line begins
+    a_done = e_done = False
+
+    while True:
+        if not a_buf and not a_done:
+            a_buf = next(actual, b"")
+            a_done = not a_buf
+        if not e_buf and not e_done:
+            e_buf = next(expected, b"")
+            e_done = not e_buf
+        if not a_buf or not e_buf:
+            if not a_buf and not e_buf:
+                return CompareResult(match=True)
+            return CompareResult(
+                match=False,
+                mismatch_offset=offset,
+                mismatch_line=line,
+                mismatch_column=offset - line_start + 1,
+            )
+
+        n = min(len(a_buf), len(e_buf))
+        a_head, e_head = a_buf[:n], e_buf[:n]
+        if a_head != e_head:
+            i = next(k for k in range(n) if a_head[k] != e_head[k])
+            same = a_head[:i]
+            nl = same.count(b"\n")
+            if nl:
+                line += nl
+                line_start = offset + same.rindex(b"\n") + 1
+            offset += i
+            return CompareResult(
+                match=False,
+                mismatch_offset=offset,
+                mismatch_line=line,
+                mismatch_column=offset - line_start + 1,
+            )
+
+        nl = a_head.count(b"\n")
+        if nl:
+            line += nl
+            line_start = offset + a_head.rindex(b"\n") + 1
+        offset += n
+        a_buf, e_buf = a_buf[n:], e_buf[n:]
@@ -0,0 +1,134 @@
+"""
+Compiled special-judge (checker) store for /check_batch.
+
+A checker is registered once per ``checker_id`` (the client derives it
+from the problem and its ``spj_version``) and kept on disk as
+``root/<checker_id>/`` with the compiled binary, class dir or script plus
+a ``meta.json``. Later batches name only the id; the source is sent
+again only when this node does not have the checker yet (after a
+restart with an empty volume, or a first request to a new node).
+
+The copy is independent of the ArtifactCache, so checker binaries are
+not evicted by ordinary submissions.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import shutil
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from sandbox import Language, LANG_META, CompileResult, compile_code
+
+
+CHECKER_DIR = Path(os.getenv("SANDBOX_CHECKER_DIR", "/var/lib/sandbox_checkers"))
+
+
+@dataclass
+class Checker:
+    checker_id: str
+    language: Language
+    artifact_path: str  # binary, class dir or .py script inside the store
+
+
+class CheckerStore:
+    """checker_id -> compiled checker, persisted under ``root``."""
+
+    def __init__(self, root: Path = CHECKER_DIR):
+        self.root = root
+        self._checkers: dict[str, Checker] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self.compiles = 0
+        self.hits = 0
+
+    def get(self, checker_id: str) -> Optional[Checker]:
+        checker = self._checkers.get(checker_id) or self._load(checker_id)
+        if checker is None or not os.path.exists(checker.artifact_path):
+            self._checkers.pop(checker_id, None)
+            return None
+        self.hits += 1
+        return checker
+
+    def _load(self, checker_id: str) -> Optional[Checker]:
+        entry_dir = self.root / checker_id
+        try:
+            meta = json.loads((entry_dir / "meta.json").read_text(encoding="utf-8"))
+            checker = Checker(
+                checker_id=checker_id,
+                language=Language(meta["language"]),
+                artifact_path=str(entry_dir / meta["artifact"]),
+            )
+        except (OSError, ValueError, KeyError):
+            return None
+        self._checkers[checker_id] = checker
+        return checker
+
+    async def register(
+        self, checker_id: str, code: str, language: Language,
+    ) -> tuple[Optional[Checker], CompileResult]:
+        """Compile ``code`` and store it as ``checker_id``.
+
+        Returns (checker, compile result); checker is None if compiling
+        failed. Concurrent registrations of one id compile only once.
+        """
+        lock = self._locks.setdefault(checker_id, asyncio.Lock())
+        async with lock:
+            existing = self.get(checker_id)
+            if existing is not None:
+                return existing, CompileResult(success=True, language=language, exit_code=0)
+
+            compile_result = await compile_code(code, language)
+            if not compile_result.success:
+                return None, compile_result
+            self.compiles += 1
+            checker = await asyncio.to_thread(
+                self._install, checker_id, code, language, compile_result,
+            )
+            self._checkers[checker_id] = checker
+            return checker, compile_result
+
+    def _install(
+        self, checker_id: str, code: str, language: Language, compile_result: CompileResult,
+    ) -> Checker:
+        """Copy the artifact into a fresh dir, then swap it in atomically."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = self.root / f".{checker_id}.{uuid.uuid4().hex[:8]}"
+        staging.mkdir()
+        if language == Language.PYTHON3:
+            artifact = f"checker{LANG_META[language]['ext']}"
+            (staging / artifact).write_text(code, encoding="utf-8")
+        elif language == Language.JAVA:
+            artifact = "classes"
+            shutil.copytree(compile_result.artifact_path, staging / artifact)
+        else:
+            artifact = "checker"
+            shutil.copy2(compile_result.artifact_path, staging / artifact)
+        (staging / "meta.json").write_text(
+            json.dumps({"language": language.value, "artifact": artifact}), encoding="utf-8",
+        )
+
+        entry_dir = self.root / checker_id
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(staging, entry_dir)
+        return Checker(
+            checker_id=checker_id, language=language, artifact_path=str(entry_dir / artifact),
+        )
+
+    def stats(self) -> dict:
+        return {"checkers": len(self._checkers), "compiles": self.compiles, "hits": self.hits}
+
+
+_store: Optional[CheckerStore] = None
+
+
+def get_checker_store() -> CheckerStore:
+    """Return the process-wide checker store (created on first use)."""
+    global _store
+    if _store is None:
+        _store = CheckerStore()
+    return _store
@@ -12,6 +12,7 @@ class Verdict(str, Enum):
     WA = "WA"
     TLE = "TLE"
     MLE = "MLE"
+    OLE = "OLE"  # output limit exceeded
     RE = "RE"
     CE = "CE"
     SE = "SE"
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the isolate CLI, for running the sandbox without root.
+
+Understands the subset of isolate that sandbox.py uses:
+
+  --init    -b N   create BASE/N/box and print BASE/N
+  --cleanup -b N   remove BASE/N
+  --run     -b N [--time=S] [--wall-time=S] [--mem=KB] [--fsize=KB]
+            [--stdin F] [--stdout F] [--stderr F] [--meta=F] [...] -- CMD...
+
+BASE is $FAKE_ISOLATE_BASE (default /tmp/fake_isolate). ``--run``
+executes CMD in BASE/N/box with rlimits standing in for the isolate
+limits (CPU time, address space, file size) and writes an isolate-style
+meta file: time, time-wall, max-rss, exitcode or exitsig, status,
+message, killed. Other options (--dir, --processes, --cg, ...) are
+accepted and ignored.
+
+There is NO isolation: programs run as the calling user with the host
+filesystem visible. Use it for benchmarks and conformance runs of the
+sandbox code paths, never to run untrusted code.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import resource
+import shutil
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE = Path(os.getenv("FAKE_ISOLATE_BASE", "/tmp/fake_isolate"))
+
+# Options that take a separate value argument (``--stdin F`` as well as ``--stdin=F``)
+VALUE_OPTS = {
+    "-b", "--box-id", "-t", "--time", "-w", "--wall-time", "-m", "--mem", "-f", "--fsize",
+    "-i", "--stdin", "-o", "--stdout", "-r", "--stderr", "-M", "--meta", "-d", "--dir",
+    "-p", "--processes", "-E", "--env", "-x", "--extra-time", "-c", "--chdir", "--cg-mem",
+}
+ALIASES = {
+    "-b": "--box-id", "-t": "--time", "-w": "--wall-time", "-m": "--mem", "-f": "--fsize",
+    "-i": "--stdin", "-o": "--stdout", "-r": "--stderr", "-M": "--meta", "-x": "--extra-time",
+}
+
+
+def parse_args(argv: list[str]) -> tuple[str, dict[str, str], list[str]]:
+    """Split argv into (mode, options, command)."""
+    mode = ""
+    opts: dict[str, str] = {}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "--":
+            return mode, opts, argv[i + 1:]
+        if arg in ("--init", "--run", "--cleanup"):
+            mode = arg[2:]
+        elif "=" in arg and arg.startswith("--"):
+            key, _, value = arg.partition("=")
+            opts[key] = value
+        elif arg in VALUE_OPTS and i + 1 < len(argv):
+            opts[ALIASES.get(arg, arg)] = argv[i + 1]
+            i += 1
+        i += 1
+    return mode, opts, []
+
+
+def box_dir(opts: dict[str, str]) -> Path:
+    return BASE / opts.get("--box-id", "0")
+
+
+def run(opts: dict[str, str], cmd: list[str]) -> int:
+    box = box_dir(opts) / "box"
+    if not box.is_dir():
+        print(f"Box {opts.get('--box-id', '0')} not initialized", file=sys.stderr)
+        return 2
+    time_limit = float(opts.get("--time", 0) or 0)
+    wall_limit = float(opts.get("--wall-time", 0) or 0) or (time_limit * 2 + 1 if time_limit else 0)
+    mem_kb = int(opts.get("--mem", 0) or 0)
+    fsize_kb = int(opts.get("--fsize", 0) or 0)
+
+    def limits() -> None:
+        if time_limit:
+            cpu = math.ceil(time_limit + float(opts.get("--extra-time", 0) or 0))
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+        if mem_kb:
+            resource.setrlimit(resource.RLIMIT_AS, (mem_kb * 1024, mem_kb * 1024))
+        if fsize_kb:
+            resource.setrlimit(resource.RLIMIT_FSIZE, (fsize_kb * 1024, fsize_kb * 1024))
+
+    def open_in_box(name: str, mode: str):
+        return open(box / name, mode) if name else None
+
+    stdin = open_in_box(opts.get("--stdin", ""), "rb")  # else inherit ours
+    stdout = open_in_box(opts.get("--stdout", ""), "wb")
+    stderr = open_in_box(opts.get("--stderr", ""), "wb")
+    started = time.monotonic()
+    killed = False
+    try:
+        try:
+            proc = subprocess.Popen(
+                cmd, cwd=box, stdin=stdin, stdout=stdout, stderr=stderr, preexec_fn=limits,
+            )
+        except OSError as exc:
+            return write_meta(opts, {
+                "status": "RE", "exitcode": "127", "message": f"execve failed: {exc}",
+            })
+        while True:
+            pid, status, usage = os.wait4(proc.pid, os.WNOHANG)
+            if pid:
+                break
+            if wall_limit and time.monotonic() - started > wall_limit:
+                os.kill(proc.pid, signal.SIGKILL)
+                killed = True
+                _, status, usage = os.wait4(proc.pid, 0)
+                break
+            time.sleep(0.002)
+    finally:
+        for f in (stdin, stdout, stderr):
+            if f is not None:
+                f.close()
+
+    wall = time.monotonic() - started
+    cpu = usage.ru_utime + usage.ru_stime
+    meta = {
+        "time": f"{cpu:.3f}",
+        "time-wall": f"{wall:.3f}",
+        "max-rss": str(usage.ru_maxrss),  # KiB on Linux
+    }
+    sig = os.WTERMSIG(status) if os.WIFSIGNALED(status) else 0
+    if killed or (time_limit and cpu > time_limit) or sig == signal.SIGXCPU:
+        meta.update(status="TO", message="Time limit exceeded", killed="1")
+        if killed:
+            meta["message"] = "Time limit exceeded (wall clock)"
+    elif sig == signal.SIGXFSZ:
+        meta.update(exitsig=str(sig), status="SG", message="Output limit exceeded")
+    elif sig:
+        meta.update(exitsig=str(sig), status="SG", message=f"Caught fatal signal {sig}")
+    else:
+        code = os.WEXITSTATUS(status)
+        meta["exitcode"] = str(code)
+        if code:
+            meta.update(status="RE", message=f"Exited with error status {code}")
+    return write_meta(opts, meta)
+
+
+def write_meta(opts: dict[str, str], meta: dict[str, str]) -> int:
+    if opts.get("--meta"):
+        Path(opts["--meta"]).write_text("".join(f"{k}:{v}\n" for k, v in meta.items()))
+    # Like isolate: non-zero exit when the program failed
+    return 1 if meta.get("status") else 0
+
+
+def main(argv: list[str]) -> int:
+    mode, opts, cmd = parse_args(argv)
+    if mode == "init":
+        (box_dir(opts) / "box").mkdir(parents=True, exist_ok=True)
+        print(box_dir(opts))
+        return 0
+    if mode == "cleanup":
+        shutil.rmtree(box_dir(opts), ignore_errors=True)
+        return 0
+    if mode == "run":
+        return run(opts, cmd)
+    print("usage: fake_isolate.py (--init | --run | --cleanup) -b BOX [options] [-- CMD...]",
+          file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
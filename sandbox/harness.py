@@ -0,0 +1,361 @@
+"""
+Sandbox conformance and microbenchmark harness.
+
+Runs the verdict conformance cases straight through sandbox.py. There is
+no HTTP server and no curl. It runs with N concurrent workers and times
+every phase of each case, per language:
+
+  compile     compile_code (a cold compile unless --warm-compile)
+  init        isolate --init
+  run         _run_in_box: copy in, isolate --run, read output, parse
+              meta, compare
+  meta_parse  _parse_meta on its own
+  cleanup     isolate --cleanup
+
+Boxes are initialized and cleaned up around each case. This measures
+per-case box cost, not the BoxPool's warm-lease path.
+
+With --fake, isolate is replaced by fake_isolate.py, so the harness runs
+on plain Linux without root. Verdicts then come from rlimits rather than
+namespaces and cgroups, and the timings show sandbox.py's own overhead
+(process spawns, file copies, meta parsing) rather than isolate's.
+
+Usage:
+    python3 harness.py                         # real isolate (in the container)
+    python3 harness.py --fake                  # anywhere
+    python3 harness.py --fake --repeat 20 --concurrency 8 --json phases.json
+    python3 harness.py --languages c,python3 --cases AC,RE
+    python3 harness.py --languages java --repeat 10 --no-cds   # vs. without --no-cds
+
+Exits non-zero if any case gets an unexpected verdict.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, Optional
+
+import sandbox
+from sandbox import LANG_META, Language
+
+FAKE_ISOLATE = Path(__file__).resolve().with_name("fake_isolate.py")
+PHASES = ("compile", "init", "run", "meta_parse", "cleanup")
+
+
+@dataclass
+class Case:
+    name: str
+    language: Language
+    code: str
+    expected: str
+    input_data: str = ""
+    expected_output: Optional[str] = None  # compared in the box (AC/WA)
+    time_limit: float = 2.0
+    memory_limit_kb: int = 262144
+
+
+CASES = [
+    # AC
+    Case("AC — C A+B", Language.C,
+         '#include <stdio.h>\nint main() { int a,b; scanf("%d%d",&a,&b); printf("%d",a+b); return 0; }',
+         "AC", "3 5", "8"),
+    Case("AC — Python3 A+B", Language.PYTHON3,
+         "a,b=map(int,input().split())\nprint(a+b)",
+         "AC", "7 9", "16"),
+    Case("AC — C++ Hello", Language.CPP,
+         '#include <iostream>\nint main() { std::cout << "OK"; return 0; }',
+         "AC", "", "OK"),
+    Case("AC — C++ bits/stdc++.h sort", Language.CPP,
+         "#include <bits/stdc++.h>\nusing namespace std;\n"
+         "int main() { vector<int> v; int x; while (cin >> x) v.push_back(x); "
+         "sort(v.begin(), v.end()); for (int y : v) cout << y << ' '; return 0; }",
+         "AC", "3 1 2", "1 2 3"),
+    Case("AC — Java Hello", Language.JAVA,
+         'public class Main { public static void main(String[] args) { System.out.print("OK"); } }',
+         "AC", "", "OK", time_limit=5.0, memory_limit_kb=1048576),
+    # WA: stdout compared against the expected answer in the box
+    Case("WA — C wrong sum", Language.C,
+         '#include <stdio.h>\nint main() { int a,b; scanf("%d%d",&a,&b); printf("%d",a-b); return 0; }',
+         "WA", "3 5", "8"),
+    Case("WA — Python3 wrong sum", Language.PYTHON3,
+         "a,b=map(int,input().split())\nprint(a-b)",
+         "WA", "7 9", "16"),
+    # TLE
+    Case("TLE — C infinite loop", Language.C,
+         "int main() { while(1) {} }", "TLE", time_limit=0.5),
+    Case("TLE — Python3 infinite loop", Language.PYTHON3,
+         "while True: pass", "TLE", time_limit=0.5),
+    # RE
+    Case("RE — C division by zero", Language.C,
+         '#include <stdio.h>\nint main() { int a,b; scanf("%d%d",&a,&b); printf("%d",a/b); return 0; }',
+         "RE", "5 0", time_limit=1.0),
+    Case("RE — C segfault", Language.C,
+         "#include <stdio.h>\nint main() { int *p=0; *p=42; return 0; }",
+         "RE", time_limit=1.0),
+    Case("RE — Python3 exception", Language.PYTHON3,
+         'raise Exception("test error")', "RE", time_limit=1.0),
+    # CE
+    Case("CE — C missing semicolon", Language.C,
+         "#include <stdio.h>\nint main() { return 0 }", "CE"),
+    Case("CE — Java syntax error", Language.JAVA,
+         "public class Main { public static void main(String[] args) { System.out.print(",
+         "CE", time_limit=5.0, memory_limit_kb=1048576),
+    # MLE
+    Case("MLE — C allocation beyond 8MB limit", Language.C,
+         "#include <stdlib.h>\n#include <string.h>\nint main() { "
+         "size_t sz=16*1024*1024; char *p=malloc(sz); "
+         "if(!p) return 1; for(size_t i=0;i<sz;i+=4096)p[i]=1; return 0; }",
+         "MLE", memory_limit_kb=8192),
+    # OLE: stopped by the output file size limit, not the time limit
+    Case("OLE — C endless printf", Language.C,
+         '#include <stdio.h>\nint main() { for(;;) printf("spam spam spam\\n"); }',
+         "OLE", time_limit=2.0),
+    Case("OLE — Python3 endless print", Language.PYTHON3,
+         'while True: print("spam " * 100)', "OLE", time_limit=2.0),
+]
+
+
+def language_available(language: Language) -> bool:
+    """Whether the compiler and runtime for ``language`` exist on this host."""
+    info = LANG_META[language]
+    tools = [info["run_cmd"]("x")[0]]
+    if info["compile_cmd"] is not None:
+        tools.append(info["compile_cmd"]("x", "y")[0])
+    return all(tool.startswith("./") or shutil.which(tool) for tool in tools)
+
+
+def unique_source(code: str, language: Language) -> str:
+    """Append a comment so the artifact cache cannot serve the compile."""
+    marker = "#" if language == Language.PYTHON3 else "//"
+    return f"{code}\n{marker} harness {uuid.uuid4().hex}\n"
+
+
+# ── running ───────────────────────────────────────────────────────────
+
+class PhaseTimer:
+    """Collects per-(language, phase) durations in milliseconds."""
+
+    def __init__(self):
+        self.samples: dict[tuple[str, str], list[float]] = defaultdict(list)
+
+    @contextmanager
+    def timed(self, language: Language, phase: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[(language.value, phase)].append((time.perf_counter() - started) * 1000)
+
+
+async def run_case(
+    case: Case, box_id: int, timer: PhaseTimer, work_dir: Path, warm_compile: bool,
+) -> tuple[str, str]:
+    """Run one case in ``box_id``; returns (verdict, detail)."""
+    lang = case.language
+    source = case.code if warm_compile else unique_source(case.code, lang)
+    with timer.timed(lang, "compile"):
+        compiled = await sandbox.compile_code(source, lang, work_dir=str(work_dir / "compile"))
+    if not compiled.success:
+        return "CE", compiled.stderr[:120]
+
+    temp_files = []
+    artifact = compiled.artifact_path
+    if lang == Language.PYTHON3:
+        artifact = str(work_dir / f"run_{uuid.uuid4().hex[:8]}.py")
+        Path(artifact).write_text(source, encoding="utf-8")
+        temp_files.append(artifact)
+    expected_path = None
+    if case.expected_output is not None:
+        expected_path = str(work_dir / f"expected_{uuid.uuid4().hex[:8]}.txt")
+        Path(expected_path).write_text(case.expected_output, encoding="utf-8")
+        temp_files.append(expected_path)
+
+    try:
+        with timer.timed(lang, "init"):
+            await sandbox._init_box(box_id)
+        try:
+            with timer.timed(lang, "run"):
+                result = await sandbox._run_in_box(
+                    box_id,
+                    artifact_path=artifact,
+                    language=lang,
+                    input_data=case.input_data,
+                    input_path=None,
+                    expected_path=expected_path,
+                    expected_md5=None,
+                    time_limit=case.time_limit,
+                    memory_limit_kb=case.memory_limit_kb,
+                    processes_limit=100,
+                )
+            with timer.timed(lang, "meta_parse"):
+                sandbox._parse_meta(f"/tmp/meta_{box_id}")
+        finally:
+            with timer.timed(lang, "cleanup"):
+                await sandbox._cleanup_box(box_id)
+    finally:
+        for path in temp_files:
+            os.unlink(path)
+    detail = result.message or result.stderr[:120]
+    return result.verdict.value, detail
+
+
+async def run_all(
+    cases: list[Case], args: argparse.Namespace, work_dir: Path,
+) -> tuple[PhaseTimer, list[dict], float]:
+    """Run ``cases`` x ``args.repeat`` over ``args.concurrency`` boxes."""
+    # Toolchain accelerators, as the API server starts them
+    if not args.no_pch:
+        await sandbox.get_pch_store().start(wait=True)
+    if not args.no_cds:
+        await sandbox.get_java_cds_store().start(wait=True)
+    print(f"pch: {sandbox.get_pch_store().stats()}")
+    print(f"java cds: {sandbox.get_java_cds_store().stats()}")
+    timer = PhaseTimer()
+    failures: list[dict] = []
+    queue: asyncio.Queue = asyncio.Queue()
+    for rep in range(args.repeat):
+        for case in cases:
+            queue.put_nowait((rep, case))
+
+    async def worker(box_id: int) -> None:
+        while True:
+            try:
+                rep, case = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                verdict, detail = await run_case(case, box_id, timer, work_dir, args.warm_compile)
+            except sandbox.SandboxError as exc:
+                verdict, detail = "SE", exc.message
+            ok = verdict == case.expected
+            if not ok:
+                failures.append({"case": case.name, "expected": case.expected,
+                                 "actual": verdict, "detail": detail})
+            if rep == 0 or not ok:
+                status = "PASS" if ok else "FAIL"
+                print(f"[{status}] {case.name}: expected={case.expected} actual={verdict}")
+                if not ok and detail:
+                    print(f"       {detail}")
+
+    boxes = list(sandbox.BOX_RANGE)[:args.concurrency]
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(box_id) for box_id in boxes))
+    return timer, failures, time.perf_counter() - started
+
+
+# ── reporting ─────────────────────────────────────────────────────────
+
+def summarize(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    p95 = ordered[max(0, -(-95 * len(ordered) // 100) - 1)]
+    return {
+        "count": len(ordered),
+        "mean": round(statistics.fmean(ordered), 3),
+        "p50": round(statistics.median(ordered), 3),
+        "p95": round(p95, 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def phase_table(timer: PhaseTimer) -> dict[str, dict[str, dict]]:
+    table: dict[str, dict[str, dict]] = defaultdict(dict)
+    for (language, phase), samples in sorted(timer.samples.items()):
+        table[language][phase] = summarize(samples)
+    return dict(table)
+
+
+def print_table(table: dict[str, dict[str, dict]]) -> None:
+    print(f"\n{'language':<9} {'phase':<11} {'n':>5} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for language, phases in table.items():
+        for phase in PHASES:
+            if phase in phases:
+                s = phases[phase]
+                print(f"{language:<9} {phase:<11} {s['count']:>5} {s['mean']:>9.2f} "
+                      f"{s['p50']:>9.2f} {s['p95']:>9.2f} {s['max']:>9.2f}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Sandbox conformance and phase timing harness")
+    parser.add_argument("--fake", action="store_true", help="use fake_isolate.py instead of isolate")
+    parser.add_argument("--isolate", default=sandbox.ISOLATE_BIN, help="isolate binary (real mode)")
+    parser.add_argument("--repeat", type=int, default=1, help="times to run every case")
+    parser.add_argument("--concurrency", type=int, default=4, help="boxes used at once")
+    parser.add_argument("--languages", default="", help="comma list, default: all available")
+    parser.add_argument("--cases", default="", help="comma list of expected verdicts to run, e.g. AC,TLE")
+    parser.add_argument("--warm-compile", action="store_true",
+                        help="reuse one source per case so compiles hit the artifact cache")
+    parser.add_argument("--no-pch", action="store_true", help="compile C++ without precompiled headers")
+    parser.add_argument("--no-cds", action="store_true",
+                        help="run javac/java without CDS archives (compare the java phases)")
+    parser.add_argument("--json", default="", help="write phase timings and failures here")
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    wanted_langs = {Language(x) for x in args.languages.split(",") if x} or set(Language)
+    wanted_verdicts = {x.upper() for x in args.cases.split(",") if x}
+
+    skipped = sorted(l.value for l in wanted_langs if not language_available(l))
+    cases = [
+        c for c in CASES
+        if c.language in wanted_langs and c.language.value not in skipped
+        and (not wanted_verdicts or c.expected in wanted_verdicts)
+    ]
+    if skipped:
+        print(f"skipping languages without a toolchain: {', '.join(skipped)}")
+
+    with tempfile.TemporaryDirectory(prefix="sandbox_harness_") as tmp:
+        work_dir = Path(tmp)
+        # Private artifact cache: cold compiles must not touch the live one
+        sandbox._artifact_cache = sandbox.ArtifactCache(work_dir / "cache", 256 * 1024 * 1024)
+        if args.fake:
+            os.environ["FAKE_ISOLATE_BASE"] = str(work_dir / "boxes")
+            sandbox.ISOLATE_BIN = str(FAKE_ISOLATE)
+            sandbox.ISOLATE_BASE = work_dir / "boxes"
+        else:
+            sandbox.ISOLATE_BIN = args.isolate
+
+        mode = "fake" if args.fake else "isolate"
+        print(f"{len(cases)} cases x {args.repeat} on {args.concurrency} boxes ({mode})")
+        timer, failures, duration = asyncio.run(run_all(cases, args, work_dir))
+
+    table = phase_table(timer)
+    print_table(table)
+    total = len(cases) * args.repeat
+    print(f"\n{total - len(failures)}/{total} passed in {duration:.2f}s "
+          f"({total / duration if duration else 0:.1f} cases/s)")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "harness": "sandbox",
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "host": {"name": platform.node(), "python": platform.python_version(),
+                     "cpus": os.cpu_count() or 1},
+            "params": {"mode": mode, "repeat": args.repeat, "concurrency": args.concurrency,
+                       "warm_compile": args.warm_compile, "pch": not args.no_pch,
+                       "java_cds": not args.no_cds, "skipped_languages": skipped},
+            "duration_sec": round(duration, 3),
+            "phases_ms": table,
+            "failures": failures,
+        }, indent=2, ensure_ascii=False), encoding="utf-8")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Prometheus metrics for the sandbox.
+
+Latency is recorded where it happens: a histogram per phase of
+compile_code/execute, by language, and one for isolate box init and
+cleanup. Everything the sandbox already counts for /health (box pool,
+compile queue, admission, caches, sessions, ...) is exported as-is at
+scrape time by StatsCollector, so both views always agree.
+"""
+from __future__ import annotations
+
+from typing import Callable, Iterator
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Phases: compile_queue (wait for a compiler slot), compile, box_wait
+# (wait for a leased box), install (copy or reset the artifact in the box),
+# run (isolate --run), check (compare stdout with the expected answer)
+sandbox_phase_duration_seconds = Histogram(
+    "sandbox_phase_duration_seconds",
+    "Duration of one compile/execute phase in seconds",
+    ["phase", "language"],
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30],
+)
+sandbox_box_op_duration_seconds = Histogram(
+    "sandbox_box_op_duration_seconds",
+    "Duration of isolate --init / --cleanup in seconds",
+    ["op"],
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5],
+)
+sandbox_verdicts_total = Counter(
+    "sandbox_verdicts_total", "Runs by verdict", ["language", "verdict"]
+)
+
+
+def observe_phase(phase: str, language: str, seconds: float) -> None:
+    sandbox_phase_duration_seconds.labels(phase=phase, language=language).observe(seconds)
+
+
+def observe_box_op(op: str, seconds: float) -> None:
+    sandbox_box_op_duration_seconds.labels(op=op).observe(seconds)
+
+
+def count_verdict(language: str, verdict: str) -> None:
+    sandbox_verdicts_total.labels(language=language, verdict=verdict).inc()
+
+
+class StatsCollector:
+    """Exports the /health stats dict (``read_stats()``) at scrape time."""
+
+    def __init__(self, read_stats: Callable[[], dict]):
+        self.read_stats = read_stats
+
+    def collect(self) -> Iterator:
+        stats = self.read_stats()
+
+        boxes = stats["boxes"]
+        g = GaugeMetricFamily("sandbox_boxes", "Boxes by state", labels=["state"])
+        for state in ("in_use", "warm", "warming", "recycling"):
+            g.add_metric([state], boxes[state])
+        yield g
+        yield GaugeMetricFamily(
+            "sandbox_boxes_max_parallel", "Boxes that may be leased at once",
+            value=boxes["max_parallel"],
+        )
+        c = CounterMetricFamily(
+            "sandbox_box_leases", "Box leases by whether a warm box was ready", labels=["warm"],
+        )
+        c.add_metric(["hit"], boxes["hits"])
+        c.add_metric(["miss"], boxes["misses"])
+        yield c
+
+        # Pinned cores only (SANDBOX_PIN_CPUS); empty otherwise
+        leases = CounterMetricFamily("sandbox_core_leases", "Box leases per pinned core", labels=["core"])
+        busy = CounterMetricFamily(
+            "sandbox_core_busy_seconds", "Seconds a pinned core had a box leased", labels=["core"],
+        )
+        utilization = GaugeMetricFamily(
+            "sandbox_core_utilization", "Share of uptime a pinned core had a box leased", labels=["core"],
+        )
+        for core in boxes["cores"]:
+            label = [str(core["core"])]
+            leases.add_metric(label, core["leases"])
+            busy.add_metric(label, core["busy_sec"])
+            utilization.add_metric(label, core["utilization"])
+        yield leases
+        yield busy
+        yield utilization
+
+        admission = stats["admission"]
+        yield GaugeMetricFamily(
+            "sandbox_jobs_in_flight", "Admitted compile/run requests", value=admission["pending"],
+        )
+        yield GaugeMetricFamily(
+            "sandbox_jobs_max_pending", "Admission limit", value=admission["max_pending"],
+        )
+        c = CounterMetricFamily("sandbox_admission", "Admission decisions", labels=["outcome"])
+        c.add_metric(["admitted"], admission["admitted"])
+        c.add_metric(["rejected"], admission["rejected"])
+        yield c
+
+        queue = stats["compile_queue"]
+        yield GaugeMetricFamily(
+            "sandbox_compile_running", "Compilers running", value=queue["running"],
+        )
+        g = GaugeMetricFamily(
+            "sandbox_compile_queued", "Compiles waiting for a slot", labels=["priority"],
+        )
+        for priority, count in queue["queued"].items():
+            g.add_metric([priority], count)
+        yield g
+
+        c = CounterMetricFamily(
+            "sandbox_compile_events", "Compiler runs, PCH uses, cache hits and failures",
+            labels=["language", "event"],
+        )
+        for language, counts in stats["compile"].items():
+            for event in ("compiles", "pch", "cached", "failed"):
+                c.add_metric([language, event], counts[event])
+        yield c
+
+        cache = stats["artifact_cache"]
+        c = CounterMetricFamily(
+            "sandbox_artifact_cache_lookups", "Artifact cache lookups", labels=["outcome"],
+        )
+        c.add_metric(["hit"], cache["hits"])
+        c.add_metric(["miss"], cache["misses"])
+        yield c
+        yield CounterMetricFamily(
+            "sandbox_artifact_cache_evictions", "Artifacts evicted", value=cache["evictions"],
+        )
+        yield GaugeMetricFamily(
+            "sandbox_artifact_cache_bytes", "Bytes held by the artifact cache", value=cache["bytes"],
+        )
+
+        store = stats["artifact_store"]
+        yield GaugeMetricFamily(
+            "sandbox_artifact_tokens", "Live /compile artifact tokens", value=store["entries"],
+        )
+        yield GaugeMetricFamily(
+            "sandbox_artifact_store_bytes", "Bytes of token-owned artifacts", value=store["bytes"],
+        )
+        c = CounterMetricFamily(
+            "sandbox_artifact_tokens_dropped", "Artifact tokens dropped before release", labels=["reason"],
+        )
+        c.add_metric(["expired"], store["expired"])
+        c.add_metric(["evicted"], store["evictions"])
+        yield c
+        yield CounterMetricFamily(
+            "sandbox_scratch_swept", "Orphaned scratch files and dirs deleted", value=store["swept"],
+        )
+        yield GaugeMetricFamily(
+            "sandbox_scratch_held", "Scratch paths held by requests in flight", value=store["held"],
+        )
+
+        sessions = stats["sessions"]
+        c = CounterMetricFamily("sandbox_box_sessions", "Box session events", labels=["event"])
+        for event in ("sessions", "runs", "reinstalls"):
+            c.add_metric([event], sessions[event])
+        yield c
+
+        c = CounterMetricFamily("sandbox_output_checks", "Expected-output checks", labels=["method"])
+        c.add_metric(["md5"], stats["checker"]["md5_accepts"])
+        c.add_metric(["stream"], stats["checker"]["stream_compares"])
+        yield c
+
+        g = GaugeMetricFamily(
+            "sandbox_warm_archive_ready", "PCH / Java CDS archive usable (1) or not (0)",
+            labels=["archive"],
+        )
+        g.add_metric(["pch_cpp"], int("cpp" in stats["pch"]["ready"]))
+        g.add_metric(["java_cds"], int(bool(stats["java_cds"]["ready"])))
+        yield g
+
+
+def register_stats(read_stats: Callable[[], dict]) -> None:
+    REGISTRY.register(StatsCollector(read_stats))
+
+
+def metrics_text() -> str:
+    """Return Prometheus-format metrics text."""
+    return generate_latest().decode("utf-8")
@@ -10,20 +10,36 @@ Key design decisions:
 - Java is compiled externally, only bytecode executed inside
 - Uses subprocess for isolate CLI calls
 - Meta files are written to /tmp outside the box
+- Box IDs are leased from a process-wide BoxPool so concurrent runs
+  never share a box or a meta file; the pool keeps boxes pre-initialized
+  and recycles them in the background
+- With SANDBOX_PIN_CPUS set, every leased box also gets a dedicated CPU
+  core (the isolate process and the program in the box are pinned to
+  it), and runs queue for a free core instead of sharing one
 """
 
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import heapq
+import json
 import os
 import re
+import shutil
+import signal
+import time
 import uuid
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Callable, Iterable, Iterator, Optional, Sequence
 
+from checker import CompareResult, check_output
 from enums import Verdict
+from metrics import count_verdict, observe_box_op, observe_phase
 
 
 # ── paths ────────────────────────────────────────────────────────────
@@ -31,6 +47,47 @@ ISOLATE_BIN = "/usr/local/bin/isolate"
 ISOLATE_BASE = Path("/var/local/lib/isolate")
 BOX_RANGE = range(1, 128)  # available box IDs for concurrent submissions
 
+# Max boxes running at once — defaults to one per CPU core
+SANDBOX_PARALLELISM = int(os.getenv("SANDBOX_PARALLELISM", "0")) or (os.cpu_count() or 1)
+# Idle boxes kept pre-initialized — defaults to the parallelism
+SANDBOX_WARM_BOXES = int(os.getenv("SANDBOX_WARM_BOXES") or SANDBOX_PARALLELISM)
+# Cores boxes are pinned to, one box per core: "" (off), "auto" or a list like "2-7,9"
+SANDBOX_PIN_CPUS = os.getenv("SANDBOX_PIN_CPUS", "")
+
+# stdout returned to callers: full runs are capped, compared runs get a preview
+STDOUT_LIMIT_BYTES = 65536
+# /run_batch runs a submission's cases in reused boxes (see BoxSession)
+BOX_SESSIONS = os.getenv("SANDBOX_BOX_SESSIONS", "1") != "0"
+# Compiler processes allowed at once; 0 = half the CPU cores
+COMPILE_PARALLELISM = (
+    int(os.getenv("SANDBOX_COMPILE_PARALLELISM", "0")) or max(1, (os.cpu_count() or 1) // 2)
+)
+# Compile priority classes, served in this order
+COMPILE_PRIORITIES = ("contest", "practice", "rejudge")
+# Largest file (stdout, stderr or any other) a run may write, enforced by
+# isolate --fsize while it runs; hitting it is OLE
+OUTPUT_LIMIT_KB = int(os.getenv("SANDBOX_OUTPUT_LIMIT_KB", "65536"))
+STDOUT_PREVIEW_BYTES = 1024
+
+# Scratch space: per-compile job dirs, Python scripts for /run and checker
+# case files. Not under /tmp: every box binds the host /tmp (see
+# _run_in_box), and one submission must not see another's source, input
+# or expected answer. Files reach a box only by being copied into it.
+SCRATCH_ROOT = Path(os.getenv("SANDBOX_SCRATCH_DIR", "/var/lib/sandbox_scratch"))
+COMPILE_WORK_DIR = SCRATCH_ROOT / "compile"
+RUN_TEMP_PREFIX = str(SCRATCH_ROOT / "run_")
+
+# Precompiled headers, built for the exact compile flags in LANG_META
+PCH_DIR = Path(os.getenv("SANDBOX_PCH_DIR", "/opt/sandbox_pch"))
+# Headers worth precompiling, per language (C headers parse in milliseconds)
+PCH_HEADERS = {"cpp": ("bits/stdc++.h",)}
+# Class data sharing archives for the JVMs running javac and submissions
+JAVA_CDS_DIR = Path(os.getenv("SANDBOX_JAVA_CDS_DIR", "/opt/sandbox_cds"))
+
+# Content-addressed cache of compile outputs
+ARTIFACT_CACHE_DIR = Path(os.getenv("SANDBOX_ARTIFACT_CACHE_DIR", "/var/lib/sandbox_cache"))
+ARTIFACT_CACHE_MAX_BYTES = int(os.getenv("SANDBOX_ARTIFACT_CACHE_MB", "512")) * 1024 * 1024
+
 
 # ── enums / constants ─────────────────────────────────────────────────
 class Language(str, Enum):
@@ -57,16 +114,18 @@ LANG_META = {
         "ext": ".py",
     },
     Language.JAVA: {
+        # A small class space keeps the address space (isolate --mem)
+        # reservation low while leaving class data sharing usable
         "compile_cmd": lambda src, out_dir: [
             "/usr/lib/jvm/java-21-openjdk-amd64/bin/javac",
             "-J-Xms16m", "-J-Xmx64m",
-            "-J-XX:+UseSerialGC", "-J-XX:-UseCompressedClassPointers",
+            "-J-XX:+UseSerialGC", "-J-XX:CompressedClassSpaceSize=64m",
             "-d", out_dir, src,
         ],
         "run_cmd": lambda class_name: [
             "/usr/lib/jvm/java-21-openjdk-amd64/bin/java",
             "-Xms8m", "-Xmx64m",
-            "-XX:+UseSerialGC", "-XX:-UseCompressedClassPointers",
+            "-XX:+UseSerialGC", "-XX:CompressedClassSpaceSize=64m",
             "-Xss256k",
             class_name,
         ],
@@ -84,6 +143,7 @@ class CompileResult:
     stderr: str = ""
     exit_code: int = -1
     artifact_path: Optional[str] = None  # path to compiled binary / class dir
+    cached: bool = False  # served from the artifact cache, compiler not run
 
 
 @dataclass
@@ -96,6 +156,11 @@ class ExecuteResult:
     stdout: str = ""
     stderr: str = ""
     message: str = ""
+    # Set when stdout was compared in the box against an expected file
+    compared: bool = False
+    mismatch_offset: Optional[int] = None
+    mismatch_line: Optional[int] = None
+    mismatch_column: Optional[int] = None
 
 
 class SandboxError(Exception):
@@ -107,6 +172,256 @@ class SandboxError(Exception):
         self.box_id = box_id
 
 
+# ── cpu pinning ───────────────────────────────────────────────────────
+def parse_cpu_list(spec: str) -> list[int]:
+    """``"auto"``, ``"2-5,7"`` or ``""`` -> sorted core ids (empty = no pinning).
+
+    ``auto`` is every core this process may run on, minus the lowest one
+    when there are several (left to the API server and compilers).
+    """
+    spec = spec.strip()
+    if not spec:
+        return []
+    if spec == "auto":
+        cores = sorted(os.sched_getaffinity(0))
+        return cores[1:] if len(cores) > 1 else cores
+    cores = set()
+    for part in spec.split(","):
+        first, _, last = part.strip().partition("-")
+        cores.update(range(int(first), int(last or first) + 1))
+    return sorted(cores)
+
+
+def _pin_to(cpu: int) -> Callable[[], None]:
+    """preexec_fn pinning the child (and everything it forks) to ``cpu``."""
+    return lambda: os.sched_setaffinity(0, {cpu})
+
+
+# ── box lifecycle ─────────────────────────────────────────────────────
+async def _init_box(box_id: int) -> None:
+    """Run ``isolate --init`` for one box."""
+    started = time.monotonic()
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            ISOLATE_BIN, "--init", "-b", str(box_id),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        await asyncio.wait_for(proc.communicate(), timeout=5.0)
+        if proc.returncode != 0:
+            raise SandboxError(f"isolate --init failed for box {box_id}", box_id)
+    except asyncio.TimeoutError:
+        raise SandboxError(f"isolate --init timed out for box {box_id}", box_id)
+    finally:
+        observe_box_op("init", time.monotonic() - started)
+
+
+async def _cleanup_box(box_id: int) -> None:
+    """Run ``isolate --cleanup`` for one box; failures are ignored."""
+    started = time.monotonic()
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            ISOLATE_BIN, "--cleanup", "-b", str(box_id),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        await asyncio.wait_for(proc.communicate(), timeout=5.0)
+    except Exception:
+        pass
+    observe_box_op("cleanup", time.monotonic() - started)
+
+
+# ── box pool ──────────────────────────────────────────────────────────
+class BoxPool:
+    """Leases initialized isolate boxes to concurrent executions.
+
+    A box is held by at most one execution at a time, and at most
+    ``max_parallel`` boxes are leased at once; further callers wait.
+
+    Up to ``warm_target`` idle boxes are kept already ``--init``-ed so a
+    lease usually skips box setup (a *hit*). Returned boxes are cleaned
+    up and re-initialized in background tasks, off the caller's path.
+
+    With ``cores``, each lease also takes one of those cores for its
+    duration (see ``core_of``) and ``max_parallel`` is capped at the
+    number of cores, so a run never shares its core with another box.
+    """
+
+    def __init__(
+        self,
+        box_ids: Iterable[int],
+        max_parallel: int,
+        warm_target: int = 0,
+        cores: Sequence[int] = (),
+    ):
+        self._cold: deque[int] = deque(box_ids)   # idle, not initialized
+        self._warm: deque[int] = deque()          # idle, initialized
+        self.size = len(self._cold)
+        if cores:
+            max_parallel = min(max_parallel, len(cores))
+        self.max_parallel = max(1, min(max_parallel, self.size))
+        self._free_cores: deque[int] = deque(cores)
+        self._box_core: dict[int, int] = {}
+        # core -> [leases, busy seconds, busy since (monotonic) or None]
+        self._core_usage: dict[int, list] = {c: [0, 0.0, None] for c in cores}
+        self._started = time.monotonic()
+        self.warm_target = max(0, min(warm_target, self.size))
+        self._slots = asyncio.Semaphore(self.max_parallel)
+        self._cond = asyncio.Condition()
+        self._tasks: set[asyncio.Task] = set()
+        self.in_use = 0
+        self.warming = 0
+        self.recycling = 0
+        self.hits = 0
+        self.misses = 0
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[int]:
+        """Yield an initialized box id; it is recycled after the block."""
+        async with self._slots:
+            box_id = await self._acquire()
+            self.in_use += 1
+            self._take_core(box_id)
+            try:
+                yield box_id
+            finally:
+                self._release_core(box_id)
+                self.in_use -= 1
+                self.recycling += 1
+                self._spawn(self._recycle(box_id))
+
+    def core_of(self, box_id: int) -> Optional[int]:
+        """Core dedicated to a leased box, or None without pinning."""
+        return self._box_core.get(box_id)
+
+    def _take_core(self, box_id: int) -> None:
+        # The slot semaphore admits at most len(cores) leases: one is free
+        if not self._free_cores:
+            return
+        core = self._free_cores.popleft()
+        self._box_core[box_id] = core
+        usage = self._core_usage[core]
+        usage[0] += 1
+        usage[2] = time.monotonic()
+
+    def _release_core(self, box_id: int) -> None:
+        core = self._box_core.pop(box_id, None)
+        if core is None:
+            return
+        usage = self._core_usage[core]
+        usage[1] += time.monotonic() - usage[2]
+        usage[2] = None
+        self._free_cores.append(core)
+
+    async def start(self) -> None:
+        """Pre-initialize ``warm_target`` boxes and wait until they are ready."""
+        self._top_up()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def close(self) -> None:
+        """Wait for background work, then clean up every warm box."""
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        async with self._cond:
+            warm, self._warm = list(self._warm), deque()
+            self._cold.extend(warm)
+        await asyncio.gather(*(_cleanup_box(b) for b in warm))
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "max_parallel": self.max_parallel,
+            "in_use": self.in_use,
+            "warm": len(self._warm),
+            "warm_target": self.warm_target,
+            "warming": self.warming,
+            "recycling": self.recycling,
+            "hits": self.hits,
+            "misses": self.misses,
+            "cores": self.core_stats(),
+        }
+
+    def core_stats(self) -> list[dict]:
+        """Per pinned core: leases, busy time and utilization since start."""
+        now = time.monotonic()
+        uptime = max(now - self._started, 1e-9)
+        stats = []
+        for core, (leases, busy_sec, since) in sorted(self._core_usage.items()):
+            if since is not None:
+                busy_sec += now - since
+            stats.append({
+                "core": core,
+                "busy": since is not None,
+                "leases": leases,
+                "busy_sec": round(busy_sec, 3),
+                "utilization": round(busy_sec / uptime, 4),
+            })
+        return stats
+
+    async def _acquire(self) -> int:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._warm or self._cold)
+            if self._warm:
+                box_id, warm = self._warm.popleft(), True
+                self.hits += 1
+            else:
+                box_id, warm = self._cold.popleft(), False
+                self.misses += 1
+        self._top_up()
+        if not warm:
+            try:
+                await _init_box(box_id)
+            except SandboxError:
+                await self._put(self._cold, box_id)
+                raise
+        return box_id
+
+    async def _recycle(self, box_id: int) -> None:
+        await _cleanup_box(box_id)
+        self.recycling -= 1
+        await self._put(self._cold, box_id)
+        self._top_up()
+
+    async def _warm_box(self, box_id: int) -> None:
+        try:
+            await _init_box(box_id)
+        except SandboxError:
+            target = self._cold
+        else:
+            target = self._warm
+        self.warming -= 1
+        await self._put(target, box_id)
+
+    async def _put(self, target: deque[int], box_id: int) -> None:
+        async with self._cond:
+            target.append(box_id)
+            self._cond.notify()
+
+    def _top_up(self) -> None:
+        """Start initializing cold boxes until the warm target is covered."""
+        while self._cold and len(self._warm) + self.warming < self.warm_target:
+            self.warming += 1
+            self._spawn(self._warm_box(self._cold.popleft()))
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+_box_pool: Optional[BoxPool] = None
+
+
+def get_box_pool() -> BoxPool:
+    """Return the process-wide box pool (created on first use)."""
+    global _box_pool
+    if _box_pool is None:
+        _box_pool = BoxPool(
+            BOX_RANGE, SANDBOX_PARALLELISM, SANDBOX_WARM_BOXES,
+            cores=parse_cpu_list(SANDBOX_PIN_CPUS),
+        )
+    return _box_pool
+
+
 # ── parse meta ────────────────────────────────────────────────────────
 def _parse_meta(path: str) -> dict:
     """Parse isolate meta output into a dict."""
@@ -123,11 +438,690 @@ def _parse_meta(path: str) -> dict:
     return meta
 
 
+# ── compiled-artifact cache ───────────────────────────────────────────
+@dataclass
+class _CacheEntry:
+    size: int
+    success: bool
+    exit_code: int
+    stdout: str
+    stderr: str
+    artifact: Optional[str]  # path relative to the entry dir, None on CE
+
+
+class ArtifactCache:
+    """Content-addressed, size-bounded LRU cache of compiler results.
+
+    Each entry is the compile job directory moved to ``root/<key>/`` plus a
+    ``meta.json`` with the compiler output. Failed compiles are cached too,
+    so resubmitting the same broken source skips the compiler as well.
+    The in-memory index is rebuilt from disk on start-up (oldest mtime
+    first) and entries are touched on every hit.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._index: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._locks: dict[str, list] = {}  # key -> [lock, refcount]
+        self._pins: dict[str, int] = {}  # key -> runs using the entry (not evicted)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._load()
+
+    @asynccontextmanager
+    async def key_lock(self, key: str) -> AsyncIterator[None]:
+        """Serialize compiles of one key so duplicates wait and then hit."""
+        slot = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        slot[1] += 1
+        try:
+            async with slot[0]:
+                yield
+        finally:
+            slot[1] -= 1
+            if slot[1] == 0:
+                del self._locks[key]
+
+    @contextmanager
+    def pinned(self, artifact_path: Optional[str]) -> Iterator[None]:
+        """Keep the entry holding ``artifact_path`` (if any) from eviction meanwhile."""
+        key = self._key_of(artifact_path)
+        if key is None:
+            yield
+            return
+        self._pins[key] = self._pins.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            self._pins[key] -= 1
+            if self._pins[key] == 0:
+                del self._pins[key]
+                self._evict()  # catch up on evictions deferred while pinned
+
+    def get(self, key: str, language: Language) -> Optional[CompileResult]:
+        entry = self._index.get(key)
+        entry_dir = self.root / key
+        if entry is None or not entry_dir.is_dir():
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._index.move_to_end(key)
+        try:
+            os.utime(entry_dir)
+        except OSError:
+            pass
+        return self._result(entry_dir, entry, language, cached=True)
+
+    def put(self, key: str, job_dir: Path, result: CompileResult) -> CompileResult:
+        """Move ``job_dir`` into the cache and return the relocated result."""
+        entry_dir = self.root / key
+        artifact = None
+        if result.success and result.artifact_path:
+            artifact = os.path.relpath(result.artifact_path, job_dir)
+        entry = _CacheEntry(
+            size=0,
+            success=result.success,
+            exit_code=result.exit_code,
+            stdout=result.stdout,
+            stderr=result.stderr,
+            artifact=artifact,
+        )
+        (job_dir / "meta.json").write_text(json.dumps(entry.__dict__), encoding="utf-8")
+        self.root.mkdir(parents=True, exist_ok=True)
+        if entry_dir.exists():
+            shutil.rmtree(job_dir, ignore_errors=True)
+        else:
+            shutil.move(str(job_dir), str(entry_dir))
+        entry.size = _dir_size(entry_dir)
+        self._drop(key)
+        self._index[key] = entry
+        self.bytes += entry.size
+        self._evict()
+        return self._result(entry_dir, entry, result.language, cached=False)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._index),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _result(
+        self, entry_dir: Path, entry: _CacheEntry, language: Language, cached: bool,
+    ) -> CompileResult:
+        return CompileResult(
+            success=entry.success,
+            language=language,
+            stdout=entry.stdout,
+            stderr=entry.stderr,
+            exit_code=entry.exit_code,
+            artifact_path=str(entry_dir / entry.artifact) if entry.artifact else None,
+            cached=cached,
+        )
+
+    def _key_of(self, artifact_path: Optional[str]) -> Optional[str]:
+        try:
+            return Path(artifact_path).relative_to(self.root).parts[0]
+        except (TypeError, ValueError, IndexError):
+            return None
+
+    def _evict(self) -> None:
+        # Never evict the entry that was just added, nor one a run is using
+        newest = next(reversed(self._index), None)
+        for key in list(self._index):  # least recently used first
+            if self.bytes <= self.max_bytes:
+                break
+            if key == newest or key in self._pins:
+                continue
+            self._drop(key)
+            shutil.rmtree(self.root / key, ignore_errors=True)
+            self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def _load(self) -> None:
+        if not self.root.is_dir():
+            return
+        found = []
+        for entry_dir in self.root.iterdir():
+            try:
+                data = json.loads((entry_dir / "meta.json").read_text(encoding="utf-8"))
+                data["size"] = _dir_size(entry_dir)
+                found.append((entry_dir.stat().st_mtime, entry_dir.name, _CacheEntry(**data)))
+            except (OSError, ValueError, TypeError):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+        for _, key, entry in sorted(found, key=lambda item: item[0]):
+            self._index[key] = entry
+            self.bytes += entry.size
+        self._evict()
+
+
+_artifact_cache: Optional[ArtifactCache] = None
+
+
+def get_artifact_cache() -> ArtifactCache:
+    """Return the process-wide artifact cache (created on first use)."""
+    global _artifact_cache
+    if _artifact_cache is None:
+        _artifact_cache = ArtifactCache(ARTIFACT_CACHE_DIR, ARTIFACT_CACHE_MAX_BYTES)
+    return _artifact_cache
+
+
+def _artifact_key(code: str, language: Language) -> str:
+    """Hash of (language, compiler command line, source)."""
+    cmd = LANG_META[language]["compile_cmd"]("<src>", "<out>")
+    digest = hashlib.sha256()
+    digest.update(f"{language.value}\0{' '.join(cmd)}\0".encode("utf-8"))
+    digest.update(code.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+# ── precompiled headers ───────────────────────────────────────────────
+class PchStore:
+    """Precompiled headers under ``root/<language>/``.
+
+    Each language dir holds a copy of every header in PCH_HEADERS next to
+    its ``.gch``, built with exactly the flags of the LANG_META compile
+    command, plus a ``stamp.json`` of those flags and the compiler
+    version. A compile whose source includes one of the headers gets
+    ``-I root/<language>``; GCC then loads the ``.gch`` instead of parsing
+    the header (it silently falls back to the copied header when the
+    include is not the first one), so the output is the same either way.
+
+    Dirs whose stamp no longer matches are rebuilt by ``start`` in the
+    background; until then compiles simply run without a PCH.
+    """
+
+    def __init__(self, root: Path = PCH_DIR):
+        self.root = root
+        self._ready: set[Language] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self.builds = 0
+        self.uses = 0
+        self.last_error = ""
+
+    def include_args(self, code: str, language: Language) -> list[str]:
+        """Extra compiler arguments for ``code`` (empty when no PCH applies)."""
+        if language not in self._ready:
+            return []
+        for header in PCH_HEADERS.get(language.value, ()):
+            if re.search(rf"#\s*include\s*<{re.escape(header)}>", code):
+                self.uses += 1
+                return ["-I", str(self.root / language.value)]
+        return []
+
+    async def start(self, wait: bool = False) -> None:
+        """Mark up-to-date PCH dirs ready; rebuild stale ones in the background.
+
+        With ``wait`` (image build) return only when the rebuilds are done.
+        """
+        for name in PCH_HEADERS:
+            language = Language(name)
+            stamp = await self._stamp(language)
+            if stamp is not None and self._read_stamp(language) == stamp:
+                self._ready.add(language)
+                continue
+            task = asyncio.get_running_loop().create_task(self.build(language))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if wait:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def build(self, language: Language) -> bool:
+        """(Re)build the PCH dir for ``language``; True on success."""
+        stamp = await self._stamp(language)
+        if stamp is None:
+            return False
+        cmd = LANG_META[language]["compile_cmd"]("<src>", "<out>")
+        flags = [arg for arg in cmd[1:] if arg not in ("<src>", "-o", "<out>")]
+        staging = self.root / f".{language.value}.{uuid.uuid4().hex[:8]}"
+        try:
+            for header in PCH_HEADERS[language.value]:
+                source = await self._locate(cmd[0], flags, header)
+                if source is None:
+                    raise SandboxError(f"{header} not found by {cmd[0]}")
+                copy = staging / header
+                copy.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(source, copy)
+                proc = await asyncio.create_subprocess_exec(
+                    cmd[0], *flags, "-x", f"{'c++' if language == Language.CPP else 'c'}-header",
+                    source, "-o", f"{copy}.gch",
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                _, stderr = await asyncio.wait_for(proc.communicate(), timeout=120.0)
+                if proc.returncode != 0:
+                    raise SandboxError(stderr.decode("utf-8", errors="replace")[:500])
+            (staging / "stamp.json").write_text(json.dumps(stamp), encoding="utf-8")
+            entry_dir = self.root / language.value
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(staging, entry_dir)
+        except (OSError, SandboxError, asyncio.TimeoutError) as exc:
+            shutil.rmtree(staging, ignore_errors=True)
+            self.last_error = f"{language.value}: {exc}"
+            return False
+        self.builds += 1
+        self._ready.add(language)
+        return True
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "ready": sorted(language.value for language in self._ready),
+            "building": len(self._tasks),
+            "builds": self.builds,
+            "uses": self.uses,
+            "last_error": self.last_error,
+        }
+
+    def _read_stamp(self, language: Language) -> Optional[dict]:
+        try:
+            return json.loads((self.root / language.value / "stamp.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    async def _stamp(self, language: Language) -> Optional[dict]:
+        """Flags, headers and compiler version a valid PCH dir must match."""
+        cmd = LANG_META[language]["compile_cmd"]("<src>", "<out>")
+        version = await _tool_output(cmd[0], "--version")
+        if not version:
+            return None
+        return {
+            "cmd": cmd,
+            "headers": list(PCH_HEADERS[language.value]),
+            "compiler": version.splitlines()[0],
+        }
+
+    @staticmethod
+    async def _locate(compiler: str, flags: list[str], header: str) -> Optional[str]:
+        """Path the compiler resolves ``#include <header>`` to."""
+        lang = "c++" if compiler.endswith("++") else "c"
+        proc = await asyncio.create_subprocess_exec(
+            compiler, *flags, "-x", lang, "-H", "-fsyntax-only", "-",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await proc.communicate(f"#include <{header}>\n".encode())
+        for line in stderr.decode("utf-8", errors="replace").splitlines():
+            # -H prints included files as ". path" (depth 1 first)
+            if line.startswith(". "):
+                return line[2:].strip()
+        return None
+
+
+async def _tool_output(*cmd: str) -> Optional[str]:
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=10.0)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    return stdout.decode("utf-8", errors="replace").strip() if proc.returncode == 0 else None
+
+
+_pch_store: Optional[PchStore] = None
+
+
+def get_pch_store() -> PchStore:
+    """Return the process-wide precompiled header store (created on first use)."""
+    global _pch_store
+    if _pch_store is None:
+        _pch_store = PchStore()
+    return _pch_store
+
+
+# ── java class data sharing ───────────────────────────────────────────
+# Loads the JDK classes typical contest code uses; its class list seeds
+# the archives (its own classes are left out)
+JAVA_CDS_WARMUP = """\
+import java.io.*;
+import java.math.BigInteger;
+import java.util.*;
+import java.util.stream.*;
+
+public class CdsWarmup {
+    public static void main(String[] args) throws IOException {
+        BufferedReader br = new BufferedReader(new InputStreamReader(System.in));
+        int n = Integer.parseInt(br.readLine().trim());
+        StringTokenizer st = new StringTokenizer(br.readLine());
+        long[] a = new long[n];
+        for (int i = 0; i < n; i++) a[i] = Long.parseLong(st.nextToken());
+        Arrays.sort(a);
+        List<Long> list = new ArrayList<>();
+        for (long x : a) list.add(x);
+        Collections.sort(list, Comparator.reverseOrder());
+        Map<Long, Integer> count = new HashMap<>();
+        TreeMap<Long, Integer> tree = new TreeMap<>();
+        for (long x : a) {
+            count.merge(x, 1, Integer::sum);
+            tree.put(x, tree.getOrDefault(x, 0) + 1);
+        }
+        Deque<Integer> dq = new ArrayDeque<>();
+        dq.push(1);
+        dq.pollLast();
+        PriorityQueue<long[]> pq = new PriorityQueue<>((p, q) -> Long.compare(p[0], q[0]));
+        pq.add(new long[]{1, 2});
+        pq.poll();
+        Set<String> set = new TreeSet<>(List.of("b", "a"));
+        BigInteger big = BigInteger.valueOf(a[0]).pow(30).mod(BigInteger.TEN);
+        long sum = list.stream().mapToLong(Long::longValue).sum();
+        String joined = IntStream.range(0, 3).mapToObj(Integer::toString).collect(Collectors.joining(" "));
+        Scanner sc = new Scanner("1 2.5 word");
+        int i1 = sc.nextInt();
+        double d = sc.nextDouble();
+        String w = sc.next();
+        StringBuilder sb = new StringBuilder();
+        sb.append(String.format("%.2f %d %d %s %s %d ", d, big, sum, joined, w, i1));
+        sb.append(count.size()).append(' ').append(tree.firstKey()).append(' ').append(set);
+        PrintWriter out = new PrintWriter(new BufferedWriter(new OutputStreamWriter(System.out)));
+        out.println(sb);
+        out.printf("%d%n", Math.max(Objects.hash(1, 2), 0));
+        out.flush();
+    }
+}
+"""
+JAVA_CDS_WARMUP_INPUT = "3\n3 1 2\n"
+
+
+class JavaCdsStore:
+    """Class data sharing (CDS) archives under ``root``.
+
+    ``java.jsa`` is for running submissions and ``javac.jsa`` for compiling
+    them. Each is dumped with exactly the JVM flags of the LANG_META
+    command. They hold the JDK classes that a warmup program (and javac
+    compiling it) loads, so a JVM maps them instead of loading and
+    verifying each class at startup. ``stamp.json`` records the flags and
+    the JDK version. ``start`` rebuilds stale archives in the background,
+    and until they are ready Java runs without them.
+    """
+
+    def __init__(self, root: Path = JAVA_CDS_DIR):
+        self.root = root
+        self.ready = False
+        self._tasks: set[asyncio.Task] = set()
+        self.builds = 0
+        self.last_error = ""
+
+    @staticmethod
+    def _jvm_flags() -> tuple[list[str], list[str]]:
+        """(java run flags, javac JVM flags) from LANG_META."""
+        info = LANG_META[Language.JAVA]
+        run_flags = info["run_cmd"]("<main>")[1:-1]
+        javac_flags = [arg[2:] for arg in info["compile_cmd"]("<src>", "<out>") if arg.startswith("-J")]
+        return run_flags, javac_flags
+
+    def _archive_args(self, name: str) -> list[str]:
+        # cds logging off: a warning on stdout would end up in the answer
+        return [f"-XX:SharedArchiveFile={self.root / name}", "-Xshare:auto", "-Xlog:cds*=off"]
+
+    def java_args(self) -> list[str]:
+        """Extra ``java`` arguments for a run (empty until the archive is ready)."""
+        return self._archive_args("java.jsa") if self.ready else []
+
+    def javac_args(self) -> list[str]:
+        if not self.ready:
+            return []
+        return [f"-J{arg}" for arg in self._archive_args("javac.jsa")]
+
+    def box_dirs(self) -> list[str]:
+        """isolate options that make the archive visible inside a box."""
+        return [f"--dir={self.root}"] if self.ready else []
+
+    async def start(self, wait: bool = False) -> None:
+        """Use an up-to-date archive; rebuild a stale one in the background.
+
+        With ``wait`` (image build) return only when the rebuild is done.
+        """
+        stamp = await self._stamp()
+        if stamp is None:
+            return
+        try:
+            current = json.loads((self.root / "stamp.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            current = None
+        if current == stamp:
+            self.ready = True
+            return
+        task = asyncio.get_running_loop().create_task(self.build())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        if wait:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def build(self) -> bool:
+        """Dump fresh archives into ``root``; True on success."""
+        stamp = await self._stamp()
+        if stamp is None:
+            return False
+        java = LANG_META[Language.JAVA]["run_cmd"]("<main>")[0]
+        javac = LANG_META[Language.JAVA]["compile_cmd"]("<src>", "<out>")[0]
+        run_flags, javac_flags = self._jvm_flags()
+        staging = self.root.parent / f".{self.root.name}.{uuid.uuid4().hex[:8]}"
+        work = staging / "work"
+        try:
+            (work / "classes").mkdir(parents=True)
+            (work / "CdsWarmup.java").write_text(JAVA_CDS_WARMUP, encoding="utf-8")
+            (work / "input.txt").write_text(JAVA_CDS_WARMUP_INPUT, encoding="utf-8")
+            await _check_call(
+                javac, *(f"-J{flag}" for flag in javac_flags),
+                f"-J-XX:DumpLoadedClassList={work / 'javac.classlist'}",
+                "-d", str(work / "classes"), str(work / "CdsWarmup.java"),
+            )
+            await _check_call(
+                java, *run_flags, f"-XX:DumpLoadedClassList={work / 'java.classlist'}",
+                "-cp", str(work / "classes"), "CdsWarmup",
+                stdin_path=work / "input.txt",
+            )
+            for name, flags in (("java", run_flags), ("javac", javac_flags)):
+                classlist = work / f"{name}.classlist"
+                # Only JDK classes: the warmup's own are not on a box's classpath
+                lines = classlist.read_text(encoding="utf-8").splitlines()
+                classlist.write_text(
+                    "".join(f"{line}\n" for line in lines if "CdsWarmup" not in line),
+                    encoding="utf-8",
+                )
+                await _check_call(
+                    java, *flags, "-Xshare:dump",
+                    f"-XX:SharedClassListFile={classlist}",
+                    f"-XX:SharedArchiveFile={staging / f'{name}.jsa'}",
+                )
+            shutil.rmtree(work)
+            (staging / "stamp.json").write_text(json.dumps(stamp), encoding="utf-8")
+            shutil.rmtree(self.root, ignore_errors=True)
+            os.replace(staging, self.root)
+        except (OSError, SandboxError, asyncio.TimeoutError) as exc:
+            shutil.rmtree(staging, ignore_errors=True)
+            self.last_error = str(exc)
+            return False
+        self.builds += 1
+        self.ready = True
+        return True
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "building": len(self._tasks),
+            "builds": self.builds,
+            "last_error": self.last_error,
+        }
+
+    async def _stamp(self) -> Optional[dict]:
+        java = LANG_META[Language.JAVA]["run_cmd"]("<main>")[0]
+        version = await _tool_output(java, "--version")
+        if not version:
+            return None
+        run_flags, javac_flags = self._jvm_flags()
+        return {"java": run_flags, "javac": javac_flags, "jdk": version.splitlines()[0]}
+
+
+async def _check_call(*cmd: str, stdin_path: Optional[Path] = None, timeout: float = 120.0) -> None:
+    """Run ``cmd``; raise SandboxError with its stderr if it fails."""
+    stdin = open(stdin_path, "rb") if stdin_path is not None else asyncio.subprocess.DEVNULL
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=stdin,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    finally:
+        if stdin_path is not None:
+            stdin.close()
+    try:
+        _, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        raise
+    if proc.returncode != 0:
+        tail = stderr.decode("utf-8", errors="replace")[-500:]
+        raise SandboxError(f"{os.path.basename(cmd[0])} exited with {proc.returncode}: {tail}")
+
+
+_java_cds_store: Optional[JavaCdsStore] = None
+
+
+def get_java_cds_store() -> JavaCdsStore:
+    """Return the process-wide Java CDS archive store (created on first use)."""
+    global _java_cds_store
+    if _java_cds_store is None:
+        _java_cds_store = JavaCdsStore()
+    return _java_cds_store
+
+
 # ── compile ───────────────────────────────────────────────────────────
+# Per language: compiler runs (with a PCH), artifact cache hits, failures
+# and compiler wall time
+COMPILE_STATS: dict[str, dict] = {
+    language.value: {
+        "compiles": 0, "pch": 0, "cached": 0, "failed": 0, "total_sec": 0.0, "max_sec": 0.0,
+    }
+    for language in Language
+}
+
+
+def compile_stats() -> dict:
+    """COMPILE_STATS plus the mean compiler time per language."""
+    return {
+        language: dict(counts, mean_sec=counts["total_sec"] / max(counts["compiles"], 1))
+        for language, counts in COMPILE_STATS.items()
+    }
+
+
+class CompileScheduler:
+    """Caps concurrent compiler processes; waiters are served by priority.
+
+    A contest spike used to start dozens of javac JVMs at once, which
+    thrashed memory until compiles hit their timeout. Now at most
+    ``max_parallel`` compilers run; the rest wait in a queue ordered by
+    priority class (COMPILE_PRIORITIES), then by arrival.
+    """
+
+    def __init__(self, max_parallel: int = COMPILE_PARALLELISM):
+        self.max_parallel = max(1, max_parallel)
+        self._running = 0
+        self._queue: list[tuple[int, int, asyncio.Future]] = []  # heap of (rank, seq, waiter)
+        self._seq = 0
+        self._waits = {
+            priority: {"compiles": 0, "total_wait_sec": 0.0, "max_wait_sec": 0.0}
+            for priority in COMPILE_PRIORITIES
+        }
+
+    @asynccontextmanager
+    async def slot(self, priority: str = "practice") -> AsyncIterator[None]:
+        """Hold one compiler slot for the duration of the block."""
+        if priority not in COMPILE_PRIORITIES:
+            priority = "practice"
+        started = time.monotonic()
+        if self._running < self.max_parallel and not self._queue:
+            self._running += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._seq += 1
+            entry = (COMPILE_PRIORITIES.index(priority), self._seq, waiter)
+            heapq.heappush(self._queue, entry)
+            try:
+                await waiter  # the releaser hands its slot over
+            except asyncio.CancelledError:
+                if entry in self._queue:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                elif not waiter.cancelled():
+                    self._release()  # got the slot just as we were cancelled
+                raise
+        waited = time.monotonic() - started
+        stats = self._waits[priority]
+        stats["compiles"] += 1
+        stats["total_wait_sec"] += waited
+        stats["max_wait_sec"] = max(stats["max_wait_sec"], waited)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        while self._queue:
+            _, _, waiter = heapq.heappop(self._queue)
+            if waiter.done():
+                continue  # cancelled; its task has not run its except block yet
+            waiter.set_result(None)  # slot passes on; _running unchanged
+            return
+        self._running -= 1
+
+    def stats(self) -> dict:
+        queued = dict.fromkeys(COMPILE_PRIORITIES, 0)
+        for rank, _, _ in self._queue:
+            queued[COMPILE_PRIORITIES[rank]] += 1
+        return {
+            "max_parallel": self.max_parallel,
+            "running": self._running,
+            "queued": queued,
+            "waits": {
+                priority: dict(counts, mean_wait_sec=counts["total_wait_sec"] / max(counts["compiles"], 1))
+                for priority, counts in self._waits.items()
+            },
+        }
+
+
+_compile_scheduler: Optional[CompileScheduler] = None
+
+
+def get_compile_scheduler() -> CompileScheduler:
+    global _compile_scheduler
+    if _compile_scheduler is None:
+        _compile_scheduler = CompileScheduler()
+    return _compile_scheduler
+
+
 async def compile_code(
     code: str,
     language: Language,
     work_dir: Optional[str] = None,
+    priority: str = "practice",
 ) -> CompileResult:
     """
     Compile source code outside the sandbox.
@@ -136,6 +1130,8 @@ async def compile_code(
         code: Source code string
         language: Target language
         work_dir: Working directory (auto-created if None)
+        priority: One of COMPILE_PRIORITIES; decides the place in the
+            compile queue when all compiler slots are busy
 
     Returns:
         CompileResult with success status and artifact path
@@ -151,8 +1147,38 @@ async def compile_code(
             artifact_path=None,
         )
 
+    cache = get_artifact_cache()
+    key = _artifact_key(code, language)
+    async with cache.key_lock(key):
+        cached = cache.get(key, language)
+        if cached is not None:
+            COMPILE_STATS[language.value]["cached"] += 1
+            return cached
+
+        queued = time.monotonic()
+        async with get_compile_scheduler().slot(priority):
+            observe_phase("compile_queue", language.value, time.monotonic() - queued)
+            result, job_dir = await _run_compiler(code, language, work_dir)
+        if result.exit_code == -1:
+            # Timed out — not a property of the source, don't cache it
+            shutil.rmtree(job_dir, ignore_errors=True)
+            return result
+        return cache.put(key, job_dir, result)
+
+
+async def _run_compiler(
+    code: str,
+    language: Language,
+    work_dir: Optional[str],
+) -> tuple[CompileResult, Path]:
+    """Invoke the compiler in a fresh job dir; returns (result, job_dir)."""
+    info = LANG_META[language]
+    stats = COMPILE_STATS[language.value]
+
     # Use a unique temp dir so concurrent compilations don't collide
-    base = Path(work_dir) if work_dir else Path("/tmp/sandbox_compile")
+    base = Path(work_dir) if work_dir else COMPILE_WORK_DIR
+    if work_dir is None:
+        scratch_root()
     base.mkdir(parents=True, exist_ok=True)
     job_dir = base / uuid.uuid4().hex[:8]
     job_dir.mkdir(parents=True)
@@ -163,6 +1189,7 @@ async def compile_code(
         src_path = job_dir / f"{class_name}.java"
         src_path.write_text(code, encoding="utf-8")
         cmd = info["compile_cmd"](str(src_path), str(job_dir))
+        cmd[1:1] = get_java_cds_store().javac_args()
         artifact = str(job_dir)
     else:
         src_path = job_dir / f"solution{info['ext']}"
@@ -170,7 +1197,12 @@ async def compile_code(
         out_path = job_dir / "solution"
         cmd = info["compile_cmd"](str(src_path), str(out_path))
         artifact = str(out_path)
+        pch_args = get_pch_store().include_args(code, language)
+        if pch_args:
+            cmd[1:1] = pch_args
+            stats["pch"] += 1
 
+    started = time.monotonic()
     try:
         proc = await asyncio.create_subprocess_exec(
             *cmd,
@@ -183,25 +1215,34 @@ async def compile_code(
         exit_code = proc.returncode or 0
     except asyncio.TimeoutError:
         proc.kill()
+        stats["failed"] += 1
+        observe_phase("compile", language.value, time.monotonic() - started)
         return CompileResult(
             success=False,
             language=language,
             stdout="",
             stderr="Compilation timed out (30s)",
             exit_code=-1,
-        )
+        ), job_dir
+
+    elapsed = time.monotonic() - started
+    observe_phase("compile", language.value, elapsed)
+    stats["compiles"] += 1
+    stats["total_sec"] += elapsed
+    stats["max_sec"] = max(stats["max_sec"], elapsed)
 
     stdout_s = stdout.decode("utf-8", errors="replace")[:4096]
     stderr_s = stderr.decode("utf-8", errors="replace")[:4096]
 
     if exit_code != 0:
+        stats["failed"] += 1
         return CompileResult(
             success=False,
             language=language,
             stdout=stdout_s,
             stderr=stderr_s,
             exit_code=exit_code,
-        )
+        ), job_dir
 
     return CompileResult(
         success=True,
@@ -210,7 +1251,7 @@ async def compile_code(
         stderr=stderr_s,
         exit_code=0,
         artifact_path=artifact,
-    )
+    ), job_dir
 
 
 # ── execute ───────────────────────────────────────────────────────────
@@ -222,7 +1263,15 @@ async def execute(
     memory_limit_kb: int = 262144,
     processes_limit: int = 100,
     box_id: Optional[int] = None,
-) -> ExecuteResult:
+    input_path: Optional[str] = None,
+    expected_path: Optional[str] = None,
+    expected_md5: Optional[str] = None,
+    skip: Optional[Callable[[], bool]] = None,
+    files: Optional[dict[str, str]] = None,
+    args: Sequence[str] = (),
+    output_limit_kb: Optional[int] = None,
+    output_path: Optional[str] = None,
+) -> Optional[ExecuteResult]:
     """
     Execute compiled artifact inside an isolate sandbox.
 
@@ -232,62 +1281,115 @@ async def execute(
         time_limit: CPU time limit in seconds
         memory_limit_kb: Memory limit in KB
         processes_limit: Max processes/threads
-        box_id: Specific box ID (auto-allocated if None)
+        box_id: Specific box ID (leased from the box pool if None)
+        input_path: Host file used as stdin instead of ``input_data``.
+            It is opened here and inherited by isolate, so it is neither
+            copied into the box nor visible inside it.
+        expected_path: Host file with the expected answer. When given, an
+            AC run's full stdout is stream-compared against it (verdict
+            becomes WA on mismatch) and only a short stdout preview is
+            returned.
+        expected_md5: Manifest md5 of a canonical ``expected_path``; a
+            matching normalized stdout hash accepts without reading it.
+        skip: Checked right before the run starts (after waiting for a
+            box); if it returns True nothing is run.
+        files: Extra host files copied into the box, ``{box name: host path}``
+            (e.g. a checker's input/output/answer).
+        args: Extra command line arguments for the program.
+        output_limit_kb: Max size of any file the program writes
+            (default OUTPUT_LIMIT_KB). The program is stopped as soon as
+            it goes over and the verdict is OLE.
+        output_path: Host file to keep an AC run's full stdout in (e.g.
+            for a special judge); only a short preview is returned.
 
     Returns:
-        ExecuteResult with verdict and resource usage
+        ExecuteResult with verdict and resource usage, or None if skipped
     """
+    run_kwargs = dict(
+        artifact_path=artifact_path,
+        language=language,
+        input_data=input_data,
+        input_path=input_path,
+        expected_path=expected_path,
+        expected_md5=expected_md5,
+        time_limit=time_limit,
+        memory_limit_kb=memory_limit_kb,
+        processes_limit=processes_limit,
+        files=files,
+        args=args,
+        output_limit_kb=output_limit_kb or OUTPUT_LIMIT_KB,
+        output_path=output_path,
+    )
+    with get_artifact_cache().pinned(artifact_path):
+        if box_id is not None:
+            if skip is not None and skip():
+                return None
+            box_id = int(box_id)
+            await _init_box(box_id)
+            try:
+                return await _run_in_box(box_id, **run_kwargs)
+            finally:
+                await _cleanup_box(box_id)
+
+        pool = get_box_pool()
+        waited = time.monotonic()
+        async with pool.lease() as leased_box:
+            observe_phase("box_wait", language.value, time.monotonic() - waited)
+            if skip is not None and skip():
+                return None
+            return await _run_in_box(leased_box, cpu=pool.core_of(leased_box), **run_kwargs)
+
+
+async def _run_in_box(
+    box_id: int,
+    artifact_path: str,
+    language: Language,
+    input_data: str,
+    input_path: Optional[str],
+    expected_path: Optional[str],
+    expected_md5: Optional[str],
+    time_limit: float,
+    memory_limit_kb: int,
+    processes_limit: int,
+    files: Optional[dict[str, str]] = None,
+    args: Sequence[str] = (),
+    cpu: Optional[int] = None,
+    output_limit_kb: int = OUTPUT_LIMIT_KB,
+    installed: Optional[list[str]] = None,
+    output_path: Optional[str] = None,
+) -> ExecuteResult:
+    """Run one artifact in an already initialized box. Caller owns ``box_id``.
 
-    # Allocate a box ID
-    if box_id is None:
-        box_id = _allocate_box()
-    else:
-        box_id = int(box_id)
-
-    info = LANG_META[language]
+    ``cpu`` pins isolate, and with it the program, to that core.
+    ``installed`` is the command returned by an earlier
+    ``_install_artifact`` into this box; the artifact is not copied again.
+    """
     box_dir = ISOLATE_BASE / str(box_id)
     meta_path = f"/tmp/meta_{box_id}"
-
-    # ── init sandbox ──
-    try:
-        proc = await asyncio.create_subprocess_exec(
-            ISOLATE_BIN, "--init", "-b", str(box_id),
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        await asyncio.wait_for(proc.communicate(), timeout=5.0)
-        if proc.returncode != 0:
-            raise SandboxError(f"isolate --init failed for box {box_id}", box_id)
-    except asyncio.TimeoutError:
-        raise SandboxError(f"isolate --init timed out for box {box_id}", box_id)
+    proc = None
+    stdout = ""
+    stderr = ""
+    max_rss_kb = 0
+    compared: Optional[CompareResult] = None
+    extra_dirs = get_java_cds_store().box_dirs() if language == Language.JAVA else []
 
     try:
-        # Copy artifact into box
-        if language == Language.PYTHON3:
-            # artifact_path is the .py file, just copy it
-            script_name = os.path.basename(artifact_path)
-            dest = box_dir / "box" / script_name
-            _safe_copy(artifact_path, str(dest))
-            run_args = info["run_cmd"](script_name)
-        elif language == Language.JAVA:
-            # artifact_path is the directory with .class files
-            # Extract class name from compile artifact (main class file)
-            class_files = list(Path(artifact_path).glob("*.class"))
-            if not class_files:
-                raise SandboxError("No .class files in java artifact", box_id)
-            class_name = class_files[0].stem  # "Hello" from Hello.class
-            for f in class_files:
-                _safe_copy(str(f), str(box_dir / "box" / f.name))
-            run_args = info["run_cmd"](class_name)
+        if installed is None:
+            started = time.monotonic()
+            installed, _ = _install_artifact(box_id, artifact_path, language)
+            observe_phase("install", language.value, time.monotonic() - started)
+        run_args = installed + list(args)
+        for name, host_path in (files or {}).items():
+            shutil.copyfile(host_path, box_dir / "box" / name)
+
+        # stdin: either a host test file inherited as fd 0, or stdin.txt in the box
+        if input_path is not None:
+            stdin_args = []
+            stdin_file = open(input_path, "rb")
         else:
-            # C / C++ binary
-            dest = box_dir / "box" / "solution"
-            _safe_copy(artifact_path, str(dest))
-            run_args = info["run_cmd"]("solution")
-
-        # Write stdin
-        stdin_path = box_dir / "box" / "stdin.txt"
-        stdin_path.write_text(input_data, encoding="utf-8")
+            (box_dir / "box" / "stdin.txt").write_text(input_data, encoding="utf-8")
+            stdin_args = ["--stdin", "stdin.txt"]
+            stdin_file = None
 
         # ── execute ──
         cmd = [
@@ -296,7 +1398,8 @@ async def execute(
             f"--time={time_limit}",
             f"--mem={memory_limit_kb}",
             f"--processes={processes_limit}",
-            "--stdin", "stdin.txt",
+            f"--fsize={output_limit_kb}",
+            *stdin_args,
             "--stdout", "stdout.txt",
             "--stderr", "stderr.txt",
             f"--meta={meta_path}",
@@ -306,31 +1409,34 @@ async def execute(
             "--dir=/lib",
             "--dir=/lib64",
             "--dir=/proc",
+            *extra_dirs,
             "--",
         ] + run_args
 
-        proc = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        await asyncio.wait_for(proc.communicate(), timeout=time_limit * 2 + 5.0)
-
-        # Read outputs
-        stdout = ""
-        stderr = ""
+        started = time.monotonic()
         try:
-            stdout = (box_dir / "box" / "stdout.txt").read_text(
-                encoding="utf-8", errors="replace"
-            )[:65536]
-        except Exception:
-            pass
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=stdin_file,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                preexec_fn=_pin_to(cpu) if cpu is not None else None,
+            )
+        finally:
+            if stdin_file is not None:
+                stdin_file.close()  # the child holds its own copy of the fd
         try:
-            stderr = (box_dir / "box" / "stderr.txt").read_text(
-                encoding="utf-8", errors="replace"
-            )[:4096]
-        except Exception:
-            pass
+            await asyncio.wait_for(proc.communicate(), timeout=time_limit * 2 + 5.0)
+        finally:
+            observe_phase("run", language.value, time.monotonic() - started)
+
+        # Read outputs (only a preview when the full stdout is checked or kept)
+        stdout_path = box_dir / "box" / "stdout.txt"
+        stdout = _read_head(
+            stdout_path,
+            STDOUT_PREVIEW_BYTES if expected_path or output_path else STDOUT_LIMIT_BYTES,
+        )
+        stderr = _read_head(box_dir / "box" / "stderr.txt", 4096)
 
         # Parse meta
         meta = _parse_meta(meta_path)
@@ -341,14 +1447,41 @@ async def execute(
         message = meta.get("message", "")
         status = meta.get("status", "")
         killed = int(meta.get("killed", 0))
+        # SIGXFSZ kills a writer at the limit; one that ignores it gets EFBIG
+        output_exceeded = int(meta.get("exitsig", 0)) == signal.SIGXFSZ or any(
+            _file_size(box_dir / "box" / name) >= output_limit_kb * 1024
+            for name in ("stdout.txt", "stderr.txt")
+        )
+        if output_exceeded:
+            message = "Output limit exceeded"
 
         # ── determine verdict ──
         verdict = _determine_verdict(
             status, message, exit_code, killed,
             time_sec, time_limit,
             max_rss_kb, memory_limit_kb,
+            output_exceeded,
         )
 
+        # ── compare stdout against the expected file, streaming ──
+        if expected_path is not None and verdict == Verdict.AC:
+            started = time.monotonic()
+            try:
+                compared = await asyncio.to_thread(
+                    check_output, str(stdout_path), expected_path, expected_md5,
+                )
+            except OSError as exc:
+                raise SandboxError(f"Output comparison failed: {exc}", box_id)
+            observe_phase("check", language.value, time.monotonic() - started)
+            if not compared.match:
+                verdict = Verdict.WA
+
+        if output_path is not None and verdict == Verdict.AC:
+            try:
+                shutil.copyfile(stdout_path, output_path)
+            except OSError as exc:
+                raise SandboxError(f"Keeping the output failed: {exc}", box_id)
+
     except asyncio.TimeoutError:
         verdict = Verdict.TLE
         time_sec = time_limit
@@ -356,19 +1489,10 @@ async def execute(
         exit_code = -1
         message = "Sandbox execution timed out"
         meta = {}
+        if proc is not None and proc.returncode is None:
+            proc.kill()
 
-    finally:
-        # Always cleanup
-        try:
-            cleanup_proc = await asyncio.create_subprocess_exec(
-                ISOLATE_BIN, "--cleanup", "-b", str(box_id),
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            await asyncio.wait_for(cleanup_proc.communicate(), timeout=5.0)
-        except Exception:
-            pass
-
+    count_verdict(language.value, getattr(verdict, "value", verdict))
     return ExecuteResult(
         verdict=verdict,
         time_sec=time_sec,
@@ -378,9 +1502,160 @@ async def execute(
         stdout=stdout,
         stderr=stderr,
         message=message,
+        compared=compared is not None,
+        mismatch_offset=compared.mismatch_offset if compared else None,
+        mismatch_line=compared.mismatch_line if compared else None,
+        mismatch_column=compared.mismatch_column if compared else None,
     )
 
 
+def _install_artifact(
+    box_id: int, artifact_path: str, language: Language,
+) -> tuple[list[str], list[str]]:
+    """Copy an artifact into a box; returns (command, names of the copies).
+
+    A missing artifact (e.g. evicted from the cache) is a SandboxError,
+    so callers report SE instead of failing the whole request.
+    """
+    try:
+        return _copy_artifact(box_id, artifact_path, language)
+    except OSError as exc:
+        raise SandboxError(f"Artifact install failed: {exc}", box_id)
+
+
+def _copy_artifact(
+    box_id: int, artifact_path: str, language: Language,
+) -> tuple[list[str], list[str]]:
+    info = LANG_META[language]
+    box = ISOLATE_BASE / str(box_id) / "box"
+    if language == Language.PYTHON3:
+        # artifact_path is the .py file, just copy it
+        script_name = os.path.basename(artifact_path)
+        _safe_copy(artifact_path, str(box / script_name))
+        return info["run_cmd"](script_name), [script_name]
+    if language == Language.JAVA:
+        # artifact_path is the directory with .class files
+        # Extract class name from compile artifact (main class file)
+        class_files = list(Path(artifact_path).glob("*.class"))
+        if not class_files:
+            raise SandboxError("No .class files in java artifact", box_id)
+        class_name = class_files[0].stem  # "Hello" from Hello.class
+        for f in class_files:
+            _safe_copy(str(f), str(box / f.name))
+        run_args = info["run_cmd"](class_name)
+        run_args[1:1] = get_java_cds_store().java_args()
+        return run_args, [f.name for f in class_files]
+    # C / C++ binary
+    _safe_copy(artifact_path, str(box / "solution"))
+    return info["run_cmd"]("solution"), ["solution"]
+
+
+# ── box sessions ──────────────────────────────────────────────────────
+# sessions opened, runs made in them, artifact re-copies after tampering
+SESSION_STATS = {"sessions": 0, "runs": 0, "reinstalls": 0}
+
+
+def _stat_key(path: str) -> tuple:
+    st = os.lstat(path)
+    return (st.st_ino, st.st_uid, st.st_mode, st.st_size, st.st_mtime_ns)
+
+
+class BoxSession:
+    """One leased box that runs the same artifact several times.
+
+    The artifact is copied in on the first run only, so the kernel keeps
+    the binary in the page cache and later runs skip the copy. Before
+    every later run the box is reset: everything the previous run created
+    is removed (stdin/stdout/stderr included), and the artifact copies are
+    checked against their install-time stat (inode, owner, mode, size,
+    mtime). If the program touched one, the whole artifact is copied in
+    again. Nothing a run leaves behind is visible to the next one.
+    """
+
+    def __init__(self, box_id: int, cpu: Optional[int], artifact_path: str, language: Language):
+        self.box_id = box_id
+        self.cpu = cpu
+        self.artifact_path = artifact_path
+        self.language = language
+        self._command: Optional[list[str]] = None
+        self._installed: dict[str, tuple] = {}
+
+    async def run(
+        self,
+        input_data: str = "",
+        time_limit: float = 2.0,
+        memory_limit_kb: int = 262144,
+        processes_limit: int = 100,
+        input_path: Optional[str] = None,
+        expected_path: Optional[str] = None,
+        expected_md5: Optional[str] = None,
+        files: Optional[dict[str, str]] = None,
+        args: Sequence[str] = (),
+        output_limit_kb: Optional[int] = None,
+        output_path: Optional[str] = None,
+    ) -> ExecuteResult:
+        """Like ``execute``, in this session's box."""
+        started = time.monotonic()
+        await asyncio.to_thread(self._prepare)
+        observe_phase("install", self.language.value, time.monotonic() - started)
+        SESSION_STATS["runs"] += 1
+        try:
+            return await _run_in_box(
+                self.box_id,
+                artifact_path=self.artifact_path,
+                language=self.language,
+                input_data=input_data,
+                input_path=input_path,
+                expected_path=expected_path,
+                expected_md5=expected_md5,
+                time_limit=time_limit,
+                memory_limit_kb=memory_limit_kb,
+                processes_limit=processes_limit,
+                files=files,
+                args=args,
+                cpu=self.cpu,
+                output_limit_kb=output_limit_kb or OUTPUT_LIMIT_KB,
+                installed=self._command,
+                output_path=output_path,
+            )
+        except SandboxError:
+            self._command = None  # box state unknown: reinstall next time
+            raise
+
+    def _prepare(self) -> None:
+        box = ISOLATE_BASE / str(self.box_id) / "box"
+        intact = self._command is not None
+        kept = 0
+        with os.scandir(box) as entries:
+            for entry in entries:
+                key = self._installed.get(entry.name)
+                if intact and key is not None and _stat_key(entry.path) == key:
+                    kept += 1
+                    continue
+                intact = intact and key is None
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    os.unlink(entry.path)
+        if intact and kept == len(self._installed):
+            return
+        if self._command is not None:
+            SESSION_STATS["reinstalls"] += 1
+        self._command, names = _install_artifact(self.box_id, self.artifact_path, self.language)
+        self._installed = {name: _stat_key(str(box / name)) for name in names}
+
+
+@asynccontextmanager
+async def box_session(artifact_path: str, language: Language) -> AsyncIterator[BoxSession]:
+    """Lease a box for several runs of one artifact; it is recycled after the block."""
+    pool = get_box_pool()
+    waited = time.monotonic()
+    async with pool.lease() as box_id:
+        observe_phase("box_wait", language.value, time.monotonic() - waited)
+        SESSION_STATS["sessions"] += 1
+        yield BoxSession(box_id, pool.core_of(box_id), artifact_path, language)
+
+
 # ── verdict determination ─────────────────────────────────────────────
 def _determine_verdict(
     status: str,
@@ -391,12 +1666,17 @@ def _determine_verdict(
     time_limit: float,
     max_rss_kb: int,
     memory_limit_kb: int,
+    output_exceeded: bool = False,
 ) -> Verdict:
     """
     Map isolate status/meta to a CDUT OJ verdict.
 
-    Order matters: TLE/MLE > RE > SE > AC (AC only if no error)
+    Order matters: OLE > TLE/MLE > RE > SE > AC (AC only if no error)
     """
+    # Output limit exceeded — the file size limit stopped the program
+    if output_exceeded:
+        return Verdict.OLE
+
     # Time limit exceeded
     if status == "TO" or message == "Time limit exceeded" or killed:
         if killed:
@@ -431,16 +1711,24 @@ def _extract_java_class(code: str) -> Optional[str]:
     return m.group(1) if m else None
 
 
-def _allocate_box() -> int:
-    """Pick a free box ID. Simple round-robin; a proper pool is better for production."""
-    # Use PID-based allocation for now — simple and collision-free within one process
-    pid = os.getpid()
-    return BOX_RANGE[pid % len(BOX_RANGE)]
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def _read_head(path: Path, limit: int) -> str:
+    """Decode at most ``limit`` bytes from the start of ``path``."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(limit).decode("utf-8", errors="replace")
+    except OSError:
+        return ""
 
 
 def _safe_copy(src: str, dst: str) -> None:
     """Copy file with proper permissions for isolate."""
-    import shutil
     shutil.copy2(src, dst)
     os.chmod(dst, 0o755)  # isolate requires executable permission in box
 
@@ -487,8 +1775,15 @@ async def run_code(
     return compile_result, execute_result
 
 
+def scratch_root() -> Path:
+    """SCRATCH_ROOT, created owner-only on first use."""
+    SCRATCH_ROOT.mkdir(mode=0o700, parents=True, exist_ok=True)
+    return SCRATCH_ROOT
+
+
 def _write_temp(code: str, language: Language) -> str:
     """Write code to a temp file, return path."""
-    path = f"/tmp/sandbox_run_{uuid.uuid4().hex[:8]}{LANG_META[language]['ext']}"
+    scratch_root()
+    path = f"{RUN_TEMP_PREFIX}{uuid.uuid4().hex[:8]}{LANG_META[language]['ext']}"
     Path(path).write_text(code, encoding="utf-8")
     return path
@@ -0,0 +1,54 @@
+"""ArtifactCache eviction versus artifacts that runs are still using."""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import sandbox  # noqa: E402
+from sandbox import ArtifactCache, CompileResult, Language, SandboxError  # noqa: E402
+
+
+class ArtifactCacheTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.cache = ArtifactCache(self.tmp / "cache", max_bytes=2500)
+
+    def put(self, key: str) -> CompileResult:
+        job_dir = self.tmp / f"job_{key}"
+        job_dir.mkdir()
+        (job_dir / "solution").write_bytes(b"x" * 1000)
+        result = CompileResult(
+            success=True, language=Language.C, stdout="", stderr="", exit_code=0,
+            artifact_path=str(job_dir / "solution"),
+        )
+        return self.cache.put(key, job_dir, result)
+
+    def test_pinned_entry_survives_eviction_until_released(self):
+        first = self.put("a")
+        with self.cache.pinned(first.artifact_path):
+            self.put("b")
+            self.put("c")
+            self.assertTrue(Path(first.artifact_path).is_file())
+            self.assertEqual(self.cache.evictions, 1)  # b went instead
+        self.put("d")
+        self.assertFalse(Path(first.artifact_path).exists())  # unpinned: LRU again
+        self.assertLessEqual(self.cache.bytes, self.cache.max_bytes)
+
+    def test_missing_artifact_is_a_sandbox_error(self):
+        box = self.tmp / "iso" / "1" / "box"
+        box.mkdir(parents=True)
+        with mock.patch.object(sandbox, "ISOLATE_BASE", self.tmp / "iso"):
+            with self.assertRaises(SandboxError):
+                sandbox._install_artifact(1, str(self.tmp / "gone" / "solution"), Language.C)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""ArtifactStore orphan sweep versus scratch that requests are still using."""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import api_server  # noqa: E402
+import artifact_store  # noqa: E402
+from artifact_store import ArtifactStore  # noqa: E402
+
+
+class OrphanSweepTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        scratch = Path(tmp.name)
+        self.store = ArtifactStore(ttl_sec=600)
+        prefix = str(scratch / "run_")
+        patches = [
+            mock.patch.object(artifact_store, "RUN_TEMP_PREFIX", prefix),
+            mock.patch.object(artifact_store, "COMPILE_WORK_DIR", scratch / "compile"),
+            mock.patch.object(artifact_store, "_store", self.store),
+            mock.patch.object(api_server, "RUN_TEMP_PREFIX", prefix),
+            mock.patch.object(api_server, "scratch_root", return_value=scratch),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    @staticmethod
+    def age(path: Path) -> None:
+        old = time.time() - 3600
+        os.utime(path, (old, old))
+
+    def test_batch_scratch_in_use_is_not_swept(self):
+        batch = api_server._new_scratch_dir("batch")
+        (batch / "0").mkdir()
+        orphan = api_server._new_scratch_dir("check")
+        api_server._remove_scratch(orphan)
+        orphan.mkdir()  # left behind by a crashed request
+        for path in (batch, orphan):
+            self.age(path)
+
+        self.store.collect()
+
+        self.assertTrue((batch / "0").is_dir())
+        self.assertFalse(orphan.exists())
+        self.assertEqual(self.store.swept, 1)
+
+        api_server._remove_scratch(batch)
+        self.assertEqual(self.store.stats()["held"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+"""CompileScheduler: priority order and slot accounting under cancellation."""
+
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sandbox import CompileScheduler  # noqa: E402
+
+
+class CompileSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_waiters_are_served_contest_first(self):
+        scheduler = CompileScheduler(1)
+        order = []
+
+        async def compile_(name, priority):
+            async with scheduler.slot(priority):
+                order.append(name)
+                await asyncio.sleep(0)
+
+        async with scheduler.slot("practice"):
+            tasks = [
+                asyncio.create_task(compile_(name, priority))
+                for name, priority in [("r", "rejudge"), ("p", "practice"), ("c", "contest")]
+            ]
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+
+        self.assertEqual(order, ["c", "p", "r"])
+
+    async def test_release_skips_waiter_cancelled_in_the_queue(self):
+        scheduler = CompileScheduler(1)
+
+        async def compile_():
+            async with scheduler.slot():
+                pass
+
+        async with scheduler.slot("contest"):
+            queued = asyncio.create_task(compile_())
+            await asyncio.sleep(0)
+            queued.cancel()  # its future is cancelled before its except block runs
+        await asyncio.gather(queued, return_exceptions=True)
+
+        self.assertEqual(scheduler.stats()["running"], 0)
+        self.assertEqual(sum(scheduler.stats()["queued"].values()), 0)
+        await asyncio.wait_for(compile_(), timeout=1)  # the slot was not lost
+
+
+if __name__ == "__main__":
+    unittest.main()
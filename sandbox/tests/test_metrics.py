@@ -0,0 +1,39 @@
+"""/metrics exports the /health stats, per-core box use and artifact tokens included."""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import api_server  # noqa: E402
+import artifact_store  # noqa: E402
+import sandbox  # noqa: E402
+from metrics import CONTENT_TYPE_LATEST  # noqa: E402
+
+
+class MetricsTest(unittest.TestCase):
+    def test_core_and_artifact_store_stats_are_exported(self):
+        pool = sandbox.BoxPool(range(2), max_parallel=2, cores=[2, 3])
+        store = artifact_store.ArtifactStore()
+        store.register("/nonexistent/solution", "cpp")
+        with mock.patch.object(sandbox, "_box_pool", pool), \
+                mock.patch.object(artifact_store, "_store", store):
+            # No `with`: the lifespan (pool warm-up, PCH/CDS probes) is not needed
+            resp = TestClient(api_server.app).get("/metrics")
+
+        self.assertEqual(resp.headers["content-type"], CONTENT_TYPE_LATEST)
+        self.assertIn('sandbox_core_leases_total{core="3"} 0.0', resp.text)
+        self.assertIn('sandbox_core_utilization{core="2"} 0.0', resp.text)
+        self.assertIn("sandbox_artifact_tokens 1.0", resp.text)
+        self.assertIn('sandbox_artifact_tokens_dropped_total{reason="expired"} 0.0', resp.text)
+        self.assertIn("sandbox_scratch_swept_total 0.0", resp.text)
+
+
+if __name__ == "__main__":
+    unittest.main()
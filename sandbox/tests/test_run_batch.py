@@ -0,0 +1,100 @@
+"""/run_batch checks the full output, inline answers and special judges alike.
+
+Runs Python 3 programs through fake_isolate.py, so no root is needed.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import api_server  # noqa: E402
+import checker_store  # noqa: E402
+import sandbox  # noqa: E402
+from api_server import BatchCase, BatchChecker, RunBatchRequest  # noqa: E402
+
+# Right up to past the 64KB stdout cap; wrong only in the very last line
+LINES = 40000
+PROGRAM = (
+    "import sys\n"
+    "n = int(sys.stdin.readline())\n"
+    f"sys.stdout.write('1\\n' * {LINES - 1} + ('1\\n' if n == 1 else '2\\n'))\n"
+)
+ANSWER = "1\n" * LINES
+CHECKER = (
+    "import sys\n"
+    "inp, out, ans = (open(path).read() for path in sys.argv[1:4])\n"
+    "sys.exit(0 if out.split() == ans.split() else 1)\n"
+)
+
+
+class RunBatchFullOutputTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.scratch = self.tmp / "scratch"
+        self.pool = sandbox.BoxPool(range(2), max_parallel=2)
+        patches = [
+            mock.patch.dict(os.environ, FAKE_ISOLATE_BASE=str(self.tmp / "isolate")),
+            mock.patch.object(sandbox, "ISOLATE_BIN", str(ROOT / "fake_isolate.py")),
+            mock.patch.object(sandbox, "ISOLATE_BASE", self.tmp / "isolate"),
+            mock.patch.object(sandbox, "SCRATCH_ROOT", self.scratch),
+            mock.patch.object(sandbox, "COMPILE_WORK_DIR", self.scratch / "compile"),
+            mock.patch.object(sandbox, "RUN_TEMP_PREFIX", str(self.scratch / "run_")),
+            mock.patch.object(api_server, "RUN_TEMP_PREFIX", str(self.scratch / "run_")),
+            mock.patch.object(sandbox, "_box_pool", self.pool),
+            mock.patch.object(sandbox, "_compile_scheduler", None),
+            mock.patch.object(sandbox, "_artifact_cache", sandbox.ArtifactCache(self.tmp / "cache", 1 << 26)),
+            mock.patch.object(checker_store, "_store", checker_store.CheckerStore(self.tmp / "checkers")),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+
+    def cases(self) -> list[BatchCase]:
+        return [BatchCase(input_data=f"{n}\n", expected_data=ANSWER) for n in (1, 2)]
+
+    async def test_inline_answer_is_compared_past_the_stdout_cap(self):
+        batch = await api_server.api_run_batch(RunBatchRequest(
+            code=PROGRAM, language="python3", cases=self.cases(),
+        ))
+
+        self.assertEqual([r.verdict for r in batch.results], ["AC", "WA"])
+        self.assertEqual(batch.results[1].mismatch_line, LINES)
+        self.assertTrue(all(r.compared for r in batch.results))
+        self.assertEqual(list(self.scratch.glob("run_*")), [])
+
+    async def test_checker_gets_the_untruncated_output(self):
+        checker = BatchChecker(checker_id="sum-v1", language="python3", code=CHECKER)
+
+        batch = await api_server.api_run_batch(RunBatchRequest(
+            code=PROGRAM, language="python3", cases=self.cases(), checker=checker,
+        ))
+
+        self.assertEqual([r.verdict for r in batch.results], ["AC", "WA"])
+        self.assertTrue(all(r.compared for r in batch.results))
+        self.assertEqual(list(self.scratch.glob("run_*")), [])
+
+    async def test_unknown_checker_without_source_is_404(self):
+        checker = BatchChecker(checker_id="missing", language="python3")
+
+        with self.assertRaises(api_server.HTTPException) as raised:
+            await api_server.api_run_batch(RunBatchRequest(
+                code=PROGRAM, language="python3", cases=self.cases(), checker=checker,
+            ))
+
+        self.assertEqual(raised.exception.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()